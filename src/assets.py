@@ -1,38 +1,792 @@
 from src.consts import *
+import csv
+import json
+import time
+import mmap
+import queue
+import struct
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 pg.display.set_mode((scfg.TRUE_WIDTH, scfg.TRUE_HEIGHT), pg.RESIZABLE, vsync=1)
 
-def generate_surface(imagename: str, w:float, h:float):
+class asset_cache(object):
+    '''
+    process-wide LRU cache of decoded images and sounds, used by `generate_surface()` and `get_audio()`
+
+    cached surfaces and sounds are shared, so `copy()` a surface before drawing on it
+
+    ### Attributes:
+        `max_bytes`: memory budget, least recently used entries are evicted when it is exceeded
+
+        `nbytes`: memory currently held
+
+        `hits`, `misses`, `evictions`: counters since creation or the last `clear()`
+
+    ### Methods:
+        `get(key)`: returns the cached value for `key` or `None`
+
+        `peek(key)`: `get()` without counting a hit or miss, for lookups made on behalf of another one
+
+        `put(key, value, nbytes)`: caches `value` as taking up `nbytes` bytes
+
+        `preload(images, sounds)`: loads `images` (list of (name, w, h)) and `sounds` (list of names) into the cache
+
+        `evict(name)`: drops every cached entry of the asset file `name`
+
+        `clear()`: drops everything and resets the counters
+
+        `stats()`: returns a dict of the counters and memory use
+    '''
+    def __init__(self, max_bytes:int) -> None:
+        self.max_bytes = max_bytes
+        self._entries:OrderedDict[tuple,tuple[object,int]] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    def get(self, key:tuple):
+        entry = self._entries.get(key)
+        if entry==None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+    def peek(self, key:tuple):
+        entry = self._entries.get(key)
+        if entry==None: return None
+        self._entries.move_to_end(key)
+        return entry[0]
+    def put(self, key:tuple, value, nbytes:int):
+        if key in self._entries: self.nbytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes and self._entries:
+            _, (_, b) = self._entries.popitem(last=False)
+            self.nbytes -= b
+            self.evictions += 1
+    def preload(self, images:list[tuple[str,float,float]]=[], sounds:list[str]=[]):
+        for imagename, w, h in images: generate_surface(imagename, w, h)
+        for soundname in sounds: get_audio(soundname)
+    def evict(self, name:str):
+        for key in [k for k in self._entries if k[1]==name]:
+            self.nbytes -= self._entries.pop(key)[1]
+            self.evictions += 1
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+    def stats(self):
+        return {'entries':len(self._entries), 'bytes':self.nbytes, 'max_bytes':self.max_bytes,
+                'hits':self.hits, 'misses':self.misses, 'evictions':self.evictions}
+
+assetcache = asset_cache(ASSET_CACHE_BYTES)
+
+def surface_nbytes(surf:pg.Surface):
+    '''
+    returns the memory used by the pixels of `surf`
+    '''
+    return surf.get_pitch() * surf.get_height()
+
+class disk_cache(object):
+    '''
+    folder of preprocessed assets that lets later launches skip decoding, used by `generate_surface()`, `assetloader` and `get_font()`
+
+    images are stored scaled, as raw RGBA pixels in files named after a hash of the image file, the size and the alpha mode,
+    and are memory-mapped and turned into surfaces with `pg.image.frombuffer()` when loaded,
+    system fonts are stored as a table of paths so that finding one doesn't list every font installed
+
+    images are added the first time they're generated, the cache can also be filled before freezing the game with `python -m src.prebuild`,
+    an edited image gets a new hash so its old files are never read (`prune()` deletes them)
+
+    ### Attributes:
+        `path`: the cache folder, `None` disables the cache
+
+        `hits`, `misses`, `written`: image counters
+
+    ### Methods:
+        `load_image(imagename, size, alpha, fmt=None)`: returns the cached image converted to the display's format (or to `fmt`'s) or `None`
+
+        `store_image(imagename, size, alpha, surf)`: writes `surf` to the cache unless it's there already
+
+        `font_path(fontname)`: returns the path of a system font, `None` if there is none (pygame's default font is used then, like `pg.font.SysFont()`)
+
+        `prune()`: deletes the image files whose image changed or is gone, returns how many
+    '''
+    def __init__(self, path:str) -> None:
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        self._hashes:dict[str,tuple[int,int,str]] = {}
+        self._fonts:dict[str,str] = None
+    def _hash(self, imagename:str):
+        # hashing is a lot faster than decoding, and only redone if the file changed while running
+        path = os.path.join(os.path.dirname(__file__), 'images', imagename)
+        st = os.stat(path)
+        known = self._hashes.get(imagename)
+        if known!=None and known[:2]==(st.st_mtime_ns, st.st_size): return known[2]
+        with open(path, 'rb') as f: digest = hashlib.blake2b(f.read(), digest_size=12).hexdigest()
+        self._hashes[imagename] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+    def _image_file(self, imagename:str, size:tuple[float,float], alpha:bool):
+        return os.path.join(self.path, f'{self._hash(imagename)}_{size[0]:g}x{size[1]:g}_{"a" if alpha else "o"}.rgba')
+    def load_image(self, imagename:str, size:tuple[float,float], alpha:bool, fmt:pg.Surface=None) -> pg.Surface|None:
+        if self.path==None: return None
+        try:
+            with open(self._image_file(imagename, size, alpha), 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                w, h = struct.unpack_from('<II', mm)
+                view = memoryview(mm)[8:]
+                raw = pg.image.frombuffer(view, (w, h), 'RGBA')
+                # converting copies out of the mapping, which has to be let go of before it's closed
+                surf = raw.convert(fmt) if fmt!=None else (raw.convert_alpha() if alpha else raw.convert())
+                del raw
+                view.release()
+        except (OSError, ValueError, struct.error):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return surf
+    def store_image(self, imagename:str, size:tuple[float,float], alpha:bool, surf:pg.Surface):
+        if self.path==None: return
+        try:
+            path = self._image_file(imagename, size, alpha)
+            if os.path.exists(path): return
+            os.makedirs(self.path, exist_ok=True)
+            # written under another name first so a crash or another thread never leaves a partial file to be read
+            tmp = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(struct.pack('<II', *surf.get_size()))
+                f.write(pg.image.tobytes(surf, 'RGBA'))
+            os.replace(tmp, path)
+            self.written += 1
+        except OSError: pass
+    def font_path(self, fontname:str) -> str|None:
+        if self.path==None: return pg.font.match_font(fontname)
+        table = os.path.join(self.path, 'fonts.json')
+        if self._fonts==None:
+            try:
+                with open(table) as f: self._fonts = json.load(f)
+            except (OSError, ValueError): self._fonts = {}
+        if fontname in self._fonts:
+            path = self._fonts[fontname]
+            if path==None or os.path.exists(path): return path
+        path = self._fonts[fontname] = pg.font.match_font(fontname)
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(table, 'w') as f: json.dump(self._fonts, f, indent=1)
+        except OSError: pass
+        return path
+    def prune(self):
+        if self.path==None or not os.path.isdir(self.path): return 0
+        imgdir = os.path.join(os.path.dirname(__file__), 'images')
+        keep = {self._hash(n) for n in os.listdir(imgdir) if os.path.isfile(os.path.join(imgdir, n))} if os.path.isdir(imgdir) else set()
+        removed = 0
+        for fn in os.listdir(self.path):
+            if fn.endswith('.rgba') and fn.split('_')[0] not in keep:
+                os.remove(os.path.join(self.path, fn))
+                removed += 1
+        return removed
+
+diskcache = disk_cache(os.path.join(os.path.dirname(__file__), ASSET_DISK_CACHE) if ASSET_DISK_CACHE else None)
+
+def generate_surface(imagename: str, w:float, h:float, alpha:bool=True):
     '''
     returns a scaled surface from an image file in the images folder
 
+    surfaces are cached in `assetcache` (the unscaled image is shared between sizes), do not draw on the returned surface without copying it,
+    and in `diskcache` so that later launches don't decode the image
+
     ### Parameters:
         `imagename`: name of image file (including extension)
 
         `w`, `h`: width and height of returned surface
+
+        `alpha`: whether to keep per-pixel alpha (`convert_alpha()`) or not (`convert()`)
     '''
-    im_dir = os.path.join(os.path.dirname(__file__), 'images', imagename)
-    img = pg.image.load(im_dir).convert_alpha()
+    key = ('image', imagename, (w, h), alpha)
+    surf = _cached_image(imagename, w, h, alpha)
+    if surf!=None: return surf
+    img = assetcache.peek(('image', imagename, None, alpha))
+    if img==None:
+        surf = diskcache.load_image(imagename, (w, h), alpha)
+        if surf!=None:
+            assetcache.put(key, surf, surface_nbytes(surf))
+            return surf
+        img = _convert_image(imagename, pg.image.load(os.path.join(os.path.dirname(__file__), 'images', imagename)), alpha)
+    surf = _scale_image(imagename, img, w, h, alpha)
+    if surf is not img: diskcache.store_image(imagename, (w, h), alpha, surf)
+    return surf
+
+def _cached_image(imagename:str, w:float, h:float, alpha:bool):
+    # an image asked for at its own size is the unscaled one, which isn't cached a second time under its size
+    full = ('image', imagename, None, alpha)
+    img = assetcache.peek(full)
+    if img!=None and img.get_size()==(w, h): return assetcache.get(full)
+    return assetcache.get(('image', imagename, (w, h), alpha))
+
+def _convert_image(imagename:str, img:pg.Surface, alpha:bool):
+    # converts a freshly decoded image to the display format and caches it unscaled
+    img = img.convert_alpha() if alpha else img.convert()
+    assetcache.put(('image', imagename, None, alpha), img, surface_nbytes(img))
+    return img
+
+def _scale_image(imagename:str, img:pg.Surface, w:float, h:float, alpha:bool):
     if w==img.get_width() and h==img.get_height(): return img
-    return pg.transform.smoothscale(img, (w, h))
+    key = ('image', imagename, (w, h), alpha)
+    surf = pg.transform.smoothscale(img, (w, h))
+    assetcache.put(key, surf, surface_nbytes(surf))
+    return surf
 
 def get_audio(soundname:str):
     '''
     gets audio file from sounds folder
 
+    sounds are cached in `assetcache`, so changing the volume of the returned sound changes it for everything using it
+
     ### Parameters:
         `soundname`: name of sound file (including extension)
     '''
-    return pg.mixer.Sound(os.path.join(os.path.dirname(__file__), 'sounds', soundname))
+    key = ('sound', soundname)
+    sound = assetcache.get(key)
+    if sound!=None: return sound
+    sound = pg.mixer.Sound(os.path.join(os.path.dirname(__file__), 'sounds', soundname))
+    _cache_sound(soundname, sound)
+    return sound
+
+def _cache_sound(soundname:str, sound:pg.mixer.Sound):
+    freq, size, channels = pg.mixer.get_init()
+    assetcache.put(('sound', soundname), sound, int(sound.get_length()*freq*channels*abs(size)//8))
+
+class sound_manager(object):
+    '''
+    plays sounds through a fixed pool of mixer channels, limiting how many copies of a sound play at once and how often it can restart,
+    and deciding which sound gets cut off when the pool is full
+
+    sounds are loaded with `get_audio()`, so each file is decoded once and shared, everything is silently skipped if the mixer isn't available
+
+    ### Attributes:
+        `channels`: size of the channel pool (`pg.mixer.set_num_channels()`)
+
+        `played`, `throttled`, `stolen`, `dropped`: counters of started sounds, sounds skipped by cooldowns, voices cut off for another sound
+        and sounds not started because every voice had a higher priority
+
+    ### Methods:
+        `configure(soundname, max_voices, cooldown, priority, volume)`: sets the limits of a sound, `max_voices` copies of it can play at once
+        (starting another one restarts the oldest), it can't start again within `cooldown` seconds, and when the pool is full it cuts off
+        the oldest voice with the lowest priority at most its own `priority`, `volume` is multiplied into every voice of it
+
+        `play(soundname, volume, pan, loops, priority)`: starts a sound with `pan` from -1 (left) to 1 (right) and returns a voice id, or `None` if it was skipped
+
+        `set_voice(voice, volume, pan)`: changes a playing voice, applied by the next `update()` so only the last change per frame reaches the mixer
+
+        `stop(voice)`: stops a voice, `stop_sound(soundname)` stops every voice of a sound and `stop_all()` everything
+
+        `playing(voice)`: returns whether a voice is still playing
+
+        `update()`: applies the queued voice changes, called once per frame by the main loop
+
+        `stats()`: returns a dict of the counters and the number of busy channels
+    '''
+    def __init__(self, channels:int=MIXER_CHANNELS) -> None:
+        self.enabled = pg.mixer.get_init()!=None
+        self.channels = channels
+        self._pool:list[pg.mixer.Channel] = []
+        if self.enabled:
+            pg.mixer.set_num_channels(channels)
+            self._pool = [pg.mixer.Channel(i) for i in range(channels)]
+        # per channel: [voice id, sound name, priority, start time] of what was last started on it
+        self._voices:list[list] = [None]*len(self._pool)
+        self._settings:dict[str,tuple[int,float,int,float]] = {}
+        self._last_start:dict[str,float] = {}
+        self._updates:dict[int,tuple[float,float]] = {}
+        self._next_id = 0
+        self.played = self.throttled = self.stolen = self.dropped = 0
+    def configure(self, soundname:str, max_voices:int=4, cooldown:float=0., priority:int=0, volume:float=1.):
+        self._settings[soundname] = (max_voices, cooldown, priority, volume)
+    def _busy(self, i:int):
+        return self._voices[i]!=None and self._pool[i].get_busy()
+    def _find(self, voice:int):
+        for i, v in enumerate(self._voices):
+            if v!=None and v[0]==voice: return i if self._pool[i].get_busy() else None
+        return None
+    @staticmethod
+    def _stereo(volume:float, pan:float):
+        return volume*min(1., 1.-pan), volume*min(1., 1.+pan)
+    def play(self, soundname:str, volume:float=1., pan:float=0., loops:int=0, priority:int=None) -> int|None:
+        if not self.enabled: return None
+        max_voices, cooldown, default_priority, base_volume = self._settings.get(soundname, (4, 0., 0, 1.))
+        if priority==None: priority = default_priority
+        now = time.perf_counter()
+        if cooldown>0 and now-self._last_start.get(soundname, -cooldown) < cooldown:
+            self.throttled += 1
+            return None
+        same, free, victim = [], None, None
+        for i in range(len(self._pool)):
+            if not self._busy(i):
+                if free==None: free = i
+                continue
+            v = self._voices[i]
+            if v[1]==soundname: same.append(i)
+            # the oldest of the lowest priority voices
+            if v[2]<=priority and (victim==None or (v[2], v[3]) < (self._voices[victim][2], self._voices[victim][3])): victim = i
+        if len(same)>=max_voices: i = min(same, key=lambda j:self._voices[j][3])
+        elif free!=None: i = free
+        elif victim!=None: i = victim
+        else:
+            self.dropped += 1
+            return None
+        if self._busy(i):
+            self._pool[i].stop()
+            self.stolen += 1
+        sound = get_audio(soundname)
+        ch = self._pool[i]
+        ch.play(sound, loops)
+        ch.set_volume(*self._stereo(volume*base_volume, pan))
+        self._next_id += 1
+        self._voices[i] = [self._next_id, soundname, priority, now]
+        self._last_start[soundname] = now
+        self.played += 1
+        return self._next_id
+    def set_voice(self, voice:int, volume:float=1., pan:float=0.):
+        self._updates[voice] = (volume, pan)
+    def playing(self, voice:int):
+        return self.enabled and self._find(voice)!=None
+    def stop(self, voice:int):
+        i = self._find(voice) if self.enabled else None
+        if i!=None: self._pool[i].stop()
+    def stop_sound(self, soundname:str):
+        for i in range(len(self._pool)):
+            if self._busy(i) and self._voices[i][1]==soundname: self._pool[i].stop()
+    def stop_all(self):
+        for ch in self._pool: ch.stop()
+    def update(self):
+        if not self._updates: return
+        updates, self._updates = self._updates, {}
+        for i, v in enumerate(self._voices):
+            if v!=None and v[0] in updates and self._pool[i].get_busy():
+                volume, pan = updates[v[0]]
+                self._pool[i].set_volume(*self._stereo(volume*self._settings.get(v[1], (4, 0., 0, 1.))[3], pan))
+    def stats(self):
+        return {'played':self.played, 'throttled':self.throttled, 'stolen':self.stolen, 'dropped':self.dropped,
+                'busy':sum(self._busy(i) for i in range(len(self._pool))), 'channels':self.channels}
+
+soundmanager = sound_manager()
+
+_fonts:dict[tuple[str,float],pg.font.Font] = {}
+
+def get_font(fontname:str, size:float):
+    '''
+    returns a font shared by everything using the same name and size
+
+    ### Parameters:
+        `fontname`: name of font, the fonts folder is searched first (for `fontname`.ttf), then system fonts
+
+        `size`: size of font
+    '''
+    font = _fonts.get((fontname, size))
+    if font==None:
+        try:
+            fontdir = os.path.join(os.path.dirname(__file__), 'fonts')
+            font = pg.font.Font(os.path.join(fontdir, fontname+'.ttf'), size)
+        except FileNotFoundError:
+            # what `pg.font.SysFont()` does, but without listing the system fonts every launch
+            font = pg.font.Font(diskcache.font_path(fontname), size)
+        _fonts[(fontname, size)] = font
+    return font
+
+_lines:OrderedDict[tuple,pg.Surface] = OrderedDict()
+# texts can be rendered from the simulation thread and the main thread at once
+_lines_lock = threading.Lock()
+
+def render_line(font:pg.font.Font, line:str, color, antialias:bool=True):
+    '''
+    returns `font.render(line, antialias, color)`, keeping the last `TEXT_CACHE_LINES` results
+
+    the returned surface is shared, do not draw on it without copying it
+    '''
+    key = (font, line, color if isinstance(color, str) else tuple(color), antialias)
+    with _lines_lock:
+        surf = _lines.get(key)
+        if surf!=None:
+            _lines.move_to_end(key)
+            return surf
+        surf = font.render(line, antialias, color)
+        _lines[key] = surf
+        if len(_lines) > TEXT_CACHE_LINES: _lines.popitem(last=False)
+        return surf
+
+class spritesheet(object):
+    '''
+    a single surface holding many frames, so that sprites can share it and blit parts of it with `area=`
+
+    ### Attributes:
+        `surface`: the whole sheet
+
+        `frames`: list of `pg.Rect` areas of `surface`, one per frame
+
+        `names`: list of frame names (can be empty)
+
+        `surfaces`: list of subsurfaces of `surface` for each frame (they share pixels with the sheet)
+
+    ### Methods:
+        `index(idx_or_name)`: returns the frame index for a frame index or name
+
+        `save(name)`: writes the sheet to `name`.png and its frames to `name`.json in the images folder
+    '''
+    def __init__(self, surface:pg.Surface, frames:list[pg.Rect], names:list[str]=[]) -> None:
+        assert len(names)==0 or len(names)==len(frames), 'frame names do not match frames'
+        self.surface = surface
+        self.frames = [pg.Rect(f) for f in frames]
+        self.names = list(names)
+        self._name_idx = {nm:i for i, nm in enumerate(self.names)}
+        self.surfaces = [surface.subsurface(f) for f in self.frames]
+    def index(self, idx_or_name:int|str):
+        if isinstance(idx_or_name, int): return idx_or_name
+        return self._name_idx[idx_or_name]
+    def save(self, name:str):
+        im_dir = os.path.join(os.path.dirname(__file__), 'images')
+        pg.image.save(self.surface, os.path.join(im_dir, name+'.png'))
+        if self.names: frames = {nm:list(f) for nm, f in zip(self.names, self.frames)}
+        else: frames = [list(f) for f in self.frames]
+        with open(os.path.join(im_dir, name+'.json'), 'w') as f:
+            json.dump({'frames':frames}, f)
+
+def load_spritesheet(imagename:str, frame_size:tuple[int,int]=None, count:int=None, names:list[str]=[], scale:float=1.):
+    '''
+    loads a sprite sheet from the images folder
+
+    ### Parameters:
+        `imagename`: name of image file (including extension)
+
+        `frame_size`: (w, h) of the frames if the sheet is a grid read left to right, top to bottom,
+        if not given the frames are read from a json file with the same name, either
+        `{"frames": {"name": [x, y, w, h], ...}}` or `{"frames": [[x, y, w, h], ...]}`
+
+        `count`: number of frames in the grid, defaults to all cells
+
+        `names`: names of the frames of the grid (overridden by names in the json file)
+
+        `scale`: scale of the sheet and its frames (leave some padding between frames when smooth scaling)
+    '''
+    im_dir = os.path.join(os.path.dirname(__file__), 'images')
+    # decoded once, `generate_surface()` scales it from the cache
+    full = assetcache.peek(('image', imagename, None, True))
+    if full==None: full = _convert_image(imagename, pg.image.load(os.path.join(im_dir, imagename)), True)
+    sw, sh = full.get_size()
+    if frame_size!=None:
+        fw, fh = frame_size
+        cols, rows = sw//fw, sh//fh
+        if count==None: count = cols*rows
+        frames = [pg.Rect((i%cols)*fw, (i//cols)*fh, fw, fh) for i in range(count)]
+    else:
+        with open(os.path.join(im_dir, os.path.splitext(imagename)[0]+'.json')) as f:
+            desc = json.load(f)['frames']
+        if isinstance(desc, dict):
+            names = list(desc.keys())
+            desc = list(desc.values())
+        frames = [pg.Rect(d) for d in desc]
+    surf = generate_surface(imagename, round(sw*scale), round(sh*scale))
+    if scale!=1:
+        frames = [pg.Rect(round(f.x*scale), round(f.y*scale), round(f.w*scale), round(f.h*scale)) for f in frames]
+    return spritesheet(surf, frames, names)
+
+def pack_spritesheet(imagenames:list[str], padding:int=1, max_width:int=2048, save_as:str=None):
+    '''
+    packs images from the images folder into one sprite sheet with the image names as frame names
+
+    meant to be used when building the game, with `save_as` set so that the game itself only loads the packed sheet with `load_spritesheet()`
+
+    ### Parameters:
+        `imagenames`: names of image files (including extension)
+
+        `padding`: empty pixels around every frame
+
+        `max_width`: maximum width of the sheet
+
+        `save_as`: if given, the sheet is saved with `spritesheet.save()` under this name
+    '''
+    im_dir = os.path.join(os.path.dirname(__file__), 'images')
+    imgs = {nm:pg.image.load(os.path.join(im_dir, nm)).convert_alpha() for nm in imagenames}
+    # shelf packing, tallest images first
+    order = sorted(imagenames, key=lambda nm:imgs[nm].get_height(), reverse=True)
+    rects = {}
+    x = y = shelf_h = w = 0
+    for nm in order:
+        iw, ih = imgs[nm].get_size()
+        if x>0 and x+iw+padding > max_width:
+            x = 0
+            y += shelf_h
+            shelf_h = 0
+        rects[nm] = pg.Rect(x+padding, y+padding, iw, ih)
+        x += iw+padding
+        shelf_h = max(shelf_h, ih+padding)
+        w = max(w, x+padding)
+    surf = pg.Surface((w, y+shelf_h+padding), pg.SRCALPHA).convert_alpha()
+    surf.fill((0,0,0,0))
+    for nm in imagenames: surf.blit(imgs[nm], rects[nm])
+    sheet = spritesheet(surf, [rects[nm] for nm in imagenames], imagenames)
+    if save_as!=None: sheet.save(save_as)
+    return sheet
+
+class asset_handle(object):
+    '''
+    an image or sound requested from `assetloader`, usable before it has finished loading
+
+    ### Attributes:
+        `kind`: 'image' or 'sound'
+
+        `name`: file name inside the images or sounds folder
+
+        `size`: (w, h) the image is scaled to, `None` for sounds
+
+        `surface`: the loaded image, or a transparent placeholder of `size` until then
+
+        `sound`: the loaded sound, `None` until then
+
+        `loaded`: whether loading has finished (successfully or not)
+
+        `error`: the exception loading raised, `None` if it didn't
+
+    ### Methods:
+        `bind(elem, setter)`: makes `elem` show the image once it's loaded (right away if it already is), by setting its `surface`, `w` and `h`
+        and marking it dirty, or by calling `setter(surface)` instead if given
+
+        `on_load(fn)`: calls `fn(handle)` once loading has finished (right away if it already has)
+    '''
+    def __init__(self, kind:str, name:str, size:tuple[float,float]=None, alpha:bool=True) -> None:
+        self.kind = kind
+        self.name = name
+        self.size = size
+        self.alpha = alpha
+        self.surface:pg.Surface = pg.Surface(size, pg.SRCALPHA) if kind=='image' else None
+        self.sound:pg.mixer.Sound = None
+        self.loaded = False
+        self.error:Exception = None
+        self.groups:list[asset_group] = []
+        self._callbacks = []
+    def on_load(self, fn):
+        if self.loaded: fn(self)
+        else: self._callbacks.append(fn)
+    def bind(self, elem, setter=None):
+        def apply(handle:asset_handle):
+            if handle.error!=None: return
+            if setter!=None: setter(handle.surface)
+            else:
+                elem.surface = handle.surface
+                elem.w, elem.h = handle.surface.get_size()
+                elem.mark_dirty()
+        if setter==None: elem.surface = self.surface
+        self.on_load(apply)
+    def _finish(self):
+        self.loaded = True
+        for fn in self._callbacks: fn(self)
+        self._callbacks.clear()
+
+class asset_group(object):
+    '''
+    handles loaded together by `assetloader.load_manifest()`
+
+    ### Attributes:
+        `name`: name given to the group, sent with its events
+
+        `handles`: dict of file name to `asset_handle` (images requested at several sizes keep the last one)
+
+        `total`, `done`: number of assets in the group and how many of them have finished loading
+
+        `ready`: whether all of them have finished
+    '''
+    def __init__(self, name:str) -> None:
+        self.name = name
+        self.handles:dict[str,asset_handle] = {}
+        self.total = 0
+        self.done = 0
+    @property
+    def ready(self):
+        return self.done>=self.total
+
+def _post(msg:str, data:dict):
+    # same as `post_event()` from utils, which isn't importable here
+    payload = {'msg':msg}
+    payload.update(data)
+    pg.event.post(pg.event.Event(pg.USEREVENT, payload))
+
+class asset_loader(object):
+    '''
+    loads images and sounds in the background so that the game keeps running meanwhile
+
+    files are read, decoded, converted to the display's pixel format and scaled (or read from `diskcache`) by a pool of worker threads,
+    `pump()` then finishes them on the main thread (`convert_alpha()`/`convert()`, which is a plain copy by then, and caching),
+    it has to be called every frame (the main loop does this for `assetloader`) and spends at most `budget_ms` on it
+    (but always finishes at least one asset so loading can't stall)
+
+    finished assets go into `assetcache` like the ones from `generate_surface()` and `get_audio()`, so those return them instantly afterwards
+
+    events posted (with `post_event()`'s format) during `pump()`:
+    'asset_loaded' with `handle` for every finished asset, 'asset_progress' with `group`, `done` and `total` for every asset of a manifest,
+    and 'assets_ready' with `group` once a manifest is done
+
+    ### Attributes:
+        `threads`: number of worker threads, which are only started once something is loaded
+
+        `budget_ms`: time per `pump()` for finishing images
+
+    ### Methods:
+        `load_image(imagename, w, h, alpha)`: returns an `asset_handle` for the image scaled to (w, h), like `generate_surface()`
+
+        `load_sound(soundname)`: returns an `asset_handle` for a sound, like `get_audio()`
+
+        `load_manifest(manifest, name)`: starts loading every asset listed in `manifest` and returns an `asset_group`,
+        `manifest` is either a dict or the name of a json file in the data folder, with "images" (list of [name, w, h]) and "sounds" (list of names)
+
+        `pump()`: finishes loaded assets and posts the events, returns the number of assets still loading
+
+        `pending()`: returns the number of assets still loading
+
+        `shutdown()`: cancels whatever hasn't started loading and stops the worker threads
+    '''
+    def __init__(self, threads:int=ASSET_LOADER_THREADS, budget_ms:float=ASSET_FINALIZE_MS) -> None:
+        self.threads = threads
+        self.budget_ms = budget_ms
+        self._pool:ThreadPoolExecutor = None
+        self._done:queue.SimpleQueue = queue.SimpleQueue()
+        self._loading:dict[tuple,asset_handle] = {}
+        self._finishing:deque[tuple[tuple,object]] = deque()
+        self._formats:dict[bool,pg.Surface] = None
+    def _submit(self, key:tuple, handle:asset_handle, fn, *args):
+        if self._pool==None: self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix='assetloader')
+        self._loading[key] = handle
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(lambda f: self._done.put((key, f)))
+    # pygame only releases the GIL while reading and decoding when it's given a path rather than a file object,
+    # converting to a surface made on the main thread gives the display's format without touching the display from the worker
+    @staticmethod
+    def _read_image(imagename:str, fmt:pg.Surface, size:tuple[float,float], alpha:bool):
+        cached = diskcache.load_image(imagename, size, alpha, fmt)
+        if cached!=None: return None, cached
+        img = pg.image.load(os.path.join(os.path.dirname(__file__), 'images', imagename)).convert(fmt)
+        if img.get_size()==size: return img, img
+        scaled = pg.transform.smoothscale(img, size)
+        diskcache.store_image(imagename, size, alpha, scaled)
+        return img, scaled
+    @staticmethod
+    def _read_sound(path:str):
+        return pg.mixer.Sound(path)
+    def load_image(self, imagename:str, w:float, h:float, alpha:bool=True) -> asset_handle:
+        key = ('image', imagename, (w, h), alpha)
+        if key in self._loading: return self._loading[key]
+        handle = asset_handle('image', imagename, (w, h), alpha)
+        surf = _cached_image(imagename, w, h, alpha)
+        if surf==None:
+            img = assetcache.peek(('image', imagename, None, alpha))
+            # only the scaling is left, which isn't worth a round trip through the workers
+            if img!=None: surf = _scale_image(imagename, img, w, h, alpha)
+        if surf!=None:
+            handle.surface = surf
+            handle._finish()
+            return handle
+        if self._formats==None: self._formats = {True:pg.Surface((1, 1), pg.SRCALPHA).convert_alpha(), False:pg.Surface((1, 1)).convert()}
+        self._submit(key, handle, self._read_image, imagename, self._formats[alpha], (w, h), alpha)
+        return handle
+    def load_sound(self, soundname:str) -> asset_handle:
+        key = ('sound', soundname)
+        if key in self._loading: return self._loading[key]
+        handle = asset_handle('sound', soundname)
+        sound = assetcache.get(key)
+        if sound!=None:
+            handle.sound = sound
+            handle._finish()
+            return handle
+        self._submit(key, handle, self._read_sound, os.path.join(os.path.dirname(__file__), 'sounds', soundname))
+        return handle
+    def load_manifest(self, manifest:dict|str, name:str=None) -> asset_group:
+        if isinstance(manifest, str):
+            if name==None: name = manifest
+            with open(os.path.join(os.path.dirname(__file__), 'data', manifest)) as f: manifest = json.load(f)
+        group = asset_group(name)
+        handles = [self.load_image(*img) for img in manifest.get('images', [])]
+        handles += [self.load_sound(snd) for snd in manifest.get('sounds', [])]
+        group.total = len(handles)
+        for handle in handles:
+            group.handles[handle.name] = handle
+            if handle.loaded: group.done += 1
+            else: handle.groups.append(group)
+        if group.ready: _post('assets_ready', {'group':group})
+        return group
+    def pending(self):
+        return len(self._loading)
+    def pump(self):
+        while True:
+            try: self._finishing.append(self._done.get_nowait())
+            except queue.Empty: break
+        start = time.perf_counter()
+        while self._finishing:
+            key, future = self._finishing.popleft()
+            handle = self._loading.pop(key)
+            if future.cancelled(): continue
+            if future.exception()!=None: handle.error = future.exception()
+            elif handle.kind=='image':
+                img, scaled = future.result()
+                full = assetcache.peek(('image', handle.name, None, handle.alpha))
+                # images read from `diskcache` come without the unscaled image
+                if full==None and img!=None: full = _convert_image(handle.name, img, handle.alpha)
+                if scaled is img: handle.surface = full
+                else:
+                    handle.surface = scaled.convert_alpha() if handle.alpha else scaled.convert()
+                    assetcache.put(key, handle.surface, surface_nbytes(handle.surface))
+            else:
+                handle.sound = future.result()
+                _cache_sound(handle.name, handle.sound)
+            handle._finish()
+            _post('asset_loaded', {'handle':handle})
+            for group in handle.groups:
+                group.done += 1
+                _post('asset_progress', {'group':group, 'done':group.done, 'total':group.total})
+                if group.ready: _post('assets_ready', {'group':group})
+            handle.groups.clear()
+            if (time.perf_counter()-start)*1000 >= self.budget_ms: break
+        return len(self._loading)
+    def shutdown(self):
+        if self._pool!=None: self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+assetloader = asset_loader()
 
 # level data
 
+def load_tilegrid(filename:str) -> tuple[list[list[int]],dict]:
+    '''
+    loads a grid of tile indices from the levels folder for `tilemap`, returns (grid, meta)
+
+    `filename` is either a csv file with a row of tile indices per line, or a json file of the form
+    `{"tiles": [[...], ...], ...}` or `{"width": w, "data": [...], ...}` (rows flattened), the other keys are returned as `meta`
+    (e.g. `"solid": [indices]`), empty cells and -1 mean no tile
+    '''
+    path = os.path.join(os.path.dirname(__file__), 'levels', filename)
+    meta = {}
+    if filename.endswith('.json'):
+        with open(path) as f: meta = json.load(f)
+        if 'tiles' in meta: rows = meta.pop('tiles')
+        else:
+            data, w = meta.pop('data'), meta.pop('width')
+            rows = [data[i:i+w] for i in range(0, len(data), w)]
+    else:
+        with open(path, newline='') as f: rows = [r for r in csv.reader(f) if r]
+    grid = [[int(c) if str(c).strip() not in ('', '-1') else -1 for c in r] for r in rows]
+    return grid, meta
+
+# L_LEVEL1 = load_tilegrid('level1.csv')
 
 
 # images and sounds
 
 
 # S_MUSIC = os.path.join(os.path.dirname(__file__), 'sounds', 'music.mp3')
+# large assets can be loaded without delaying the window, e.g.
+# I_BACKGROUND = assetloader.load_image('background.png', 900, 600)
 
 
 
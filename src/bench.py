@@ -0,0 +1,313 @@
+'''
+headless benchmark runner, run with `python -m src.bench` from the project folder (see `python -m src.bench -h`)
+
+builds a game out of generated scenes, drives `process_input()`, `step()` and `update_screen()` for a number of frames
+with a fixed `dt` using SDL's dummy video and audio drivers, and prints per-phase timings as json
+
+with `--replay`, the game in `src/objects.py` is driven by a session recorded with `RECORD_INPUT` instead, as fast as possible
+'''
+import os, sys, json, time, random, argparse, tracemalloc
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from src.main import *
+
+PHASES = ['input', 'step', 'render', 'frame']
+
+class bench_wall(element, collidable):
+    def __init__(self, pos:tuple[float,float], size:tuple[int,int]) -> None:
+        surf = pg.Surface(size)
+        surf.fill((90, 90, 90))
+        element.__init__(self, 0, surf, pos)
+        collidable.__init__(self, True)
+
+class bench_body(element, physicsobject):
+    def __init__(self, pos:tuple[float,float], v:tuple[float,float]) -> None:
+        surf = pg.Surface((6, 6))
+        surf.fill((200, 60, 60))
+        element.__init__(self, 1, surf, pos)
+        physicsobject.__init__(self, 1, v)
+    def calculate_a(self):
+        self.a.x, self.a.y = 0, 200
+    def collided_behavior(self, other:collidable):
+        self.v.x, self.v.y = random.uniform(-150, 150), random.uniform(-300, -100)
+    def step(self, dt:float):
+        super().step(dt)
+        self.physics_step(dt)
+        # wrap around instead of falling out of the scene
+        if self.y > init_scfg.HEIGHT: self.y -= init_scfg.HEIGHT
+        if self.x < 0: self.x += init_scfg.WIDTH
+        elif self.x > init_scfg.WIDTH: self.x -= init_scfg.WIDTH
+
+class bench_counter(text):
+    def step(self, dt:float):
+        super().step(dt)
+        self.updatetext(f'{pg.time.get_ticks()//100}')
+
+class bench_scroller(element):
+    '''
+    invisible camera target moving across a world `world_w` wide and wrapping around
+    '''
+    def __init__(self, world_w:float) -> None:
+        super().__init__(0, pg.Surface((0, 0)), (0, init_scfg.HEIGHT/2))
+        self.world_w = world_w
+    def step(self, dt:float):
+        self.x = (self.x + 240*dt) % self.world_w
+
+def bench_scene(n_elements:int=0, n_texts:int=0, n_bodies:int=0, n_pushers:int=0, seed:int=0, world:int=1, **scene_kwargs):
+    '''
+    returns a scene of the initial window size filled with random elements
+
+    ### Parameters:
+        `n_elements`: static elements, every 10th one is pressable
+
+        `n_texts`: text elements, half of them change every frame
+
+        `n_bodies`: physics objects falling under gravity
+
+        `n_pushers`: walls pushing the physics objects
+
+        `world`: if above 1, the static elements are spread over this many window widths and marked `static`,
+        and a camera scrolls across them
+
+        `scene_kwargs`: passed on to `scene`
+    '''
+    rng = random.Random(seed)
+    W, H = int(init_scfg.WIDTH), int(init_scfg.HEIGHT)
+    elems:list[element] = []
+    for i in range(n_elements):
+        surf = pg.Surface((rng.randint(4, 40), rng.randint(4, 40)), pg.SRCALPHA)
+        surf.fill((rng.randrange(256), rng.randrange(256), rng.randrange(256), rng.randrange(64, 256)))
+        elems.append(element(rng.randrange(-1, 3), surf, (rng.randrange(W*world), rng.randrange(H)),
+                             pressed_behavior=(lambda: None) if i%10==0 else None))
+        elems[-1].static = world>1
+    for i in range(n_texts):
+        cls = bench_counter if i%2 else text
+        elems.append(cls(2, f'text {i}', 'left', (rng.randrange(W), rng.randrange(H)), 'Arial', (255, 255, 255)))
+    for i in range(n_pushers):
+        elems.append(bench_wall((rng.randrange(W), rng.randrange(H)), (rng.randint(10, 60), rng.randint(4, 20))))
+    for i in range(n_bodies):
+        elems.append(bench_body((rng.randrange(W), rng.randrange(H)), (rng.uniform(-100, 100), rng.uniform(-100, 100))))
+    if n_bodies or n_pushers: scene_kwargs.setdefault('physics', True)
+    if world>1: elems.append(bench_scroller(W*world))
+    s = scene((init_scfg.WIDTH, init_scfg.HEIGHT), elems, (30, 30, 30), **scene_kwargs)
+    if world>1: s.camera = camera(target=elems[-1], bounds=pg.Rect(0, 0, W*world, H))
+    return s
+
+class bench_game(gametemplate):
+    def __init__(self, screen_ref:pg.Surface, scenes:list[scene]) -> None:
+        super().__init__(screen_ref)
+        self.curscenes = scenes
+
+def percentiles(samples:list[float]) -> dict[str,float]:
+    '''
+    returns mean, p50, p90, p99 and max of `samples`
+    '''
+    if not samples: return {}
+    srt = sorted(samples)
+    pick = lambda q: srt[min(len(srt)-1, int(q*len(srt)))]
+    return {'mean':sum(srt)/len(srt), 'p50':pick(.5), 'p90':pick(.9), 'p99':pick(.99), 'max':srt[-1]}
+
+def synthetic_events(frame:int) -> list[pg.event.Event]:
+    '''
+    returns the input events fed to the game on `frame`: mouse motion every frame and a click every 30 frames
+    '''
+    pos = ((frame*7) % int(scfg.TRUE_WIDTH), (frame*5) % int(scfg.TRUE_HEIGHT))
+    events = [pg.event.Event(pg.MOUSEMOTION, {'pos':pos, 'rel':(7, 5), 'buttons':(0, 0, 0)})]
+    if frame%30==0: events.append(pg.event.Event(pg.MOUSEBUTTONDOWN, {'pos':pos, 'button':1}))
+    return events
+
+def run_frames(g:gametemplate, screen:pg.Surface, frames, dt:float=TICK, warmup:int=0, alloc:bool=False, per_frame:bool=False,
+               fixed_timestep:bool=FIXED_TIMESTEP, sim_tick:float=SIM_TICK) -> dict:
+    '''
+    drives `g` through `frames` and returns per-phase timings in milliseconds,
+    plus the bytes allocated during each frame if `alloc` is enabled (this slows everything down)
+    and the time of every frame if `per_frame` is enabled
+
+    `frames` is an iterable of lists of events per frame, stepped by `dt`, or of recorded (events, dt) frames from `read_recording()`,
+    which go through the same event handling and timestep as in `main()` (with `fixed_timestep` and `sim_tick` instead of the consts)
+
+    the first `warmup` frames are run but not measured
+    '''
+    times = {ph:[] for ph in PHASES}
+    allocs:list[int] = []
+    if alloc: tracemalloc.start()
+    clock = time.perf_counter
+    acc = 0.
+    for i, frame in enumerate(frames):
+        if alloc:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = clock()
+        # what main() does between frames
+        run_main_calls()
+        assetloader.pump()
+        soundmanager.update()
+        if type(frame) is tuple:
+            raw, fdt = frame
+            for e in raw:
+                if e.type==pg.VIDEORESIZE: pg.display.set_mode((e.w, e.h), pg.RESIZABLE)
+            # events the game posted last frame were in the queue before the ones that came in during it
+            events, cont = collect_events(pg.event.get()+raw)
+            if not cont: break
+            for e in events: g.process_input(e)
+            t1 = clock()
+            acc = simulate(g, [], fdt, acc, fixed_timestep, sim_tick)
+        else:
+            for e in frame: g.process_input(e)
+            # events posted by the game itself (post_event) are delivered the same frame like in main()
+            for e in pg.event.get(): g.process_input(e)
+            t1 = clock()
+            g.step(dt)
+        t2 = clock()
+        g.update_screen(screen)
+        t3 = clock()
+        if i < warmup: continue
+        times['input'].append((t1-t0)*1000)
+        times['step'].append((t2-t1)*1000)
+        times['render'].append((t3-t2)*1000)
+        times['frame'].append((t3-t0)*1000)
+        if alloc: allocs.append(tracemalloc.get_traced_memory()[1]-base)
+    if alloc: tracemalloc.stop()
+    result = {'frames':len(times['frame']), 'phases':{ph:percentiles(times[ph]) for ph in PHASES}}
+    if alloc: result['alloc_bytes'] = percentiles(allocs)
+    if per_frame: result['frame_ms'] = times['frame']
+    return result
+
+def replay_game(path:str) -> tuple[gametemplate,list[tuple[list[pg.event.Event],float]],dict]:
+    '''
+    restores the settings and seed of a recording made with `RECORD_INPUT` and returns the game of `src/objects.py`, the recorded frames
+    and the timestep it was recorded with as `run_frames()` arguments (`fixed_timestep`, `sim_tick`)
+
+    recordings made at another `TPS` are refused, game code can depend on `TICK`
+    '''
+    header, frames = read_recording(path)
+    if header['tps']!=TPS: raise ValueError(f"{path} was recorded at {header['tps']} TPS, set TPS to that to replay it")
+    timestep = {'fixed_timestep':header['fixed_timestep'], 'sim_tick':1/header['sim_tps']}
+    scfg.__dict__.update(header['scfg'])
+    screen = pg.display.set_mode((int(scfg.TRUE_WIDTH), int(scfg.TRUE_HEIGHT)), pg.RESIZABLE)
+    random.seed(header['seed'])
+    if np!=None: np.random.seed(header['seed'])
+    pg.event.clear()
+    g = game(screen)
+    # what load_cfg() posted when the session started
+    post_event('window_resize')
+    return g, frames, timestep
+
+def compare(result:dict, baseline:dict, threshold:float) -> list[str]:
+    '''
+    returns a line for every phase whose p50 or p90 got slower than `baseline` by more than `threshold` (a fraction)
+    '''
+    regressions = []
+    for ph in PHASES:
+        for stat in ('p50', 'p90'):
+            old = baseline.get('phases', {}).get(ph, {}).get(stat)
+            new = result['phases'].get(ph, {}).get(stat)
+            if not old or new==None: continue
+            if new > old*(1+threshold):
+                regressions.append(f'{ph} {stat}: {old:.3f} ms -> {new:.3f} ms (+{(new/old-1)*100:.1f}%)')
+    return regressions
+
+def count_vector_allocs(fn, *args) -> int:
+    '''
+    calls `fn(*args)` and returns how many vectors were constructed during the call
+    '''
+    count = 0
+    code = vector.__init__.__code__
+    def profile(frame, event, arg):
+        nonlocal count
+        if event=='call' and frame.f_code is code: count += 1
+    sys.setprofile(profile)
+    try: fn(*args)
+    finally: sys.setprofile(None)
+    return count
+
+def vector_microbench(n:int=1000, frames:int=200) -> dict:
+    '''
+    compares integrating and re-anchoring `n` bodies with vector operators (how physics and resizing used to be written)
+    against the in-place vector methods, and counts the vectors a real physics scene allocates per step
+
+    returns milliseconds and vectors allocated per frame for each
+    '''
+    dt = TICK
+    bodies = [(vector(i, i), vector(1., 2.), vector(0., 9.8)) for i in range(n)]
+    anchors = [(vector(450, 300), vector(i, -i), vector(0, 0)) for i in range(n)]
+    def operators():
+        for p, v, a in bodies:
+            p += v*dt + a*(dt**2/2)
+            v += a*dt
+        for ap, off, _ in anchors: _ = vector(ap.x*1.5, ap.y*1.5) + off
+    def inplace():
+        for p, v, a in bodies:
+            p.add_scaled(v, dt, a, dt**2/2)
+            v.add_scaled(a, dt)
+        for ap, off, pos in anchors: pos.set(ap.x*1.5 + off.x, ap.y*1.5 + off.y)
+    result = {}
+    for name, fn in (('operators', operators), ('inplace', inplace)):
+        t = time.perf_counter()
+        for _ in range(frames): fn()
+        result[name] = {'ms_per_frame':(time.perf_counter()-t)*1000/frames, 'vectors_per_frame':count_vector_allocs(fn)}
+    s = bench_scene(0, 0, n, n//10)
+    for _ in range(5): s.step(dt)
+    result['scene_step'] = {'bodies':n, 'vectors_per_frame':count_vector_allocs(s.step, dt)}
+    return result
+
+def bench_main(argv:list[str]=None):
+    parser = argparse.ArgumentParser(prog='python -m src.bench', description='headless framework benchmark')
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--dt', type=float, default=TICK)
+    parser.add_argument('--elements', type=int, default=500)
+    parser.add_argument('--texts', type=int, default=50)
+    parser.add_argument('--bodies', type=int, default=200)
+    parser.add_argument('--pushers', type=int, default=100)
+    parser.add_argument('--scale', type=float, default=1., help='SCALE_FACTOR to render at')
+    parser.add_argument('--scale-mode', default=scfg.SCALE_MODE, choices=SCALE_MODES)
+    parser.add_argument('--dirty', action='store_true', help='use dirty rendering')
+    parser.add_argument('--batch', action='store_true', help='use batched physics')
+    parser.add_argument('--static', type=int, default=0, metavar='K', help='bake elements unchanged for K frames into static layers')
+    parser.add_argument('--world', type=int, default=1, metavar='K', help='spread the elements over K window widths and scroll a camera across them')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--replay', metavar='FILE', help='replay a session recorded with RECORD_INPUT instead of the generated scenes')
+    parser.add_argument('--per-frame', action='store_true', help='include the time of every frame')
+    parser.add_argument('--alloc', action='store_true', help='measure bytes allocated per frame')
+    parser.add_argument('--micro', action='store_true', help='run the vector micro-benchmark with --bodies bodies instead')
+    parser.add_argument('--out', help='write the json result here instead of stdout')
+    parser.add_argument('--baseline', help='json result of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=.1, help='slowdown over the baseline counted as a regression')
+    args = parser.parse_args(argv)
+
+    scfg.SCALE_FACTOR = args.scale
+    scfg.SCALE_MODE = args.scale_mode
+    scfg.WIDTH, scfg.HEIGHT = scfg.TRUE_WIDTH/scfg.SCALE_FACTOR, scfg.TRUE_HEIGHT/scfg.SCALE_FACTOR
+    if args.micro:
+        print(json.dumps(vector_microbench(args.bodies or 1000), indent=2))
+        return
+    if args.replay:
+        g, frames, timestep = replay_game(args.replay)
+        result = run_frames(g, pg.display.get_surface(), frames, warmup=args.warmup, alloc=args.alloc, per_frame=args.per_frame, **timestep)
+        result['config'] = {'replay':args.replay, 'warmup':args.warmup, 'alloc':args.alloc}
+    else:
+        screen = pg.display.get_surface()
+        random.seed(args.seed)
+        s = bench_scene(args.elements, args.texts, args.bodies, args.pushers, args.seed, args.world,
+                        dirty_rendering=args.dirty, batch_physics=args.batch, auto_static=args.static)
+        g = bench_game(screen, [s])
+        g.process_input(pg.event.Event(pg.USEREVENT, {'msg':'window_resize'}))
+
+        frames = (synthetic_events(i) for i in range(args.frames+args.warmup))
+        result = run_frames(g, screen, frames, args.dt, args.warmup, args.alloc, args.per_frame)
+        result['config'] = {k:v for k, v in vars(args).items() if k not in ('out', 'baseline', 'threshold')}
+
+    out = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f: f.write(out)
+    else: print(out)
+    if args.baseline:
+        with open(args.baseline) as f: regressions = compare(result, json.load(f), args.threshold)
+        for r in regressions: print('regression:', r, file=sys.stderr)
+        if regressions: sys.exit(1)
+
+if __name__=='__main__':
+    bench_main()
@@ -2,8 +2,13 @@ import os
 import math
 import pickle
 import pygame as pg
+try: import numpy as np
+except ImportError: np = None
 
-pg.mixer.pre_init(channels=8)
+# channels here are speaker channels (2 is stereo), not sounds: the 8 this used to ask for is 7.1 surround, which most devices
+# don't have so SDL converted every sound down again, while the number of sounds playing at once stayed pygame's default of 8
+# (that number is MIXER_CHANNELS below)
+pg.mixer.pre_init(channels=2)
 pg.init()
 
 # necessary constants
@@ -28,6 +33,9 @@ class settings(object):
         self.WINDOW_W_SCALE = 1.
         self.WINDOW_H_SCALE = 1.
 
+        # how root scenes are scaled to the window: 'smooth', 'nearest', 'scale2x' (only at 2x) or 'auto' (nearest for whole number scales, smooth otherwise)
+        self.SCALE_MODE = 'smooth'
+
         self.cfg = {}
 
 scfg = settings()
@@ -36,6 +44,35 @@ init_scfg = settings()
 TPS = 60
 TICK = 1/TPS
 
+# fixed timestep: the game is stepped in steps of SIM_TICK while frames are still rendered at up to TPS
+FIXED_TIMESTEP = False
+SIM_TPS = 120
+SIM_TICK = 1/SIM_TPS
+MAX_CATCHUP_STEPS = 8 # most steps per frame, time that can't be caught up with is dropped
+
+# pipelined: input and steps for the next frame run on a worker thread while the main thread draws the last one from `snapshot()`s,
+# which overlaps simulation and rendering at the cost of a frame of latency (see `element.snapshot()` for what has to be thread-safe),
+# snapshots are always drawn in full, so `dirty_rendering` and `static_layers` of scenes aren't used
+PIPELINED = False
+
+# garbage collection: collect in the time left between frames instead of whenever allocations cross the threshold (see `gc_controller`)
+GC_IDLE_COLLECT = False
+# move everything alive once the game is made out of the collector's view, which makes later collections faster,
+# but scenes made in `game.__init__()` and replaced afterwards are then never freed
+GC_FREEZE = False
+
+# file the input events and frame times of every session are recorded to, to replay them with `python -m src.bench --replay`,
+# '' to not record
+RECORD_INPUT = ''
+
+ASSET_CACHE_BYTES = 256*1024*1024 # memory budget for decoded images and sounds kept by `assetcache`
+TEXT_CACHE_LINES = 1024 # number of rendered lines of text kept by `render_line()`
+BG_CACHE_SIZES = 4 # number of window sizes root scenes keep their scaled background for
+ASSET_LOADER_THREADS = 2 # worker threads reading and decoding files for `assetloader`
+ASSET_FINALIZE_MS = 4 # time per frame `assetloader.pump()` may spend finishing loaded images on the main thread
+ASSET_DISK_CACHE = '' # folder in src for preprocessed images and the font table kept by `diskcache`, '' to disable (set it to 'cache' for builds filled with `python -m src.prebuild`)
+MIXER_CHANNELS = 32 # sounds that can play at once through `soundmanager`, pygame's default of 8 is cut off by a few overlapping effects
+
 GAME_DIR = '' # save folder name inside documents
 if GAME_DIR != '': os.makedirs(os.path.expanduser(f'~/Documents/{GAME_DIR}/saves'), exist_ok=True)
 
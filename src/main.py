@@ -1,6 +1,52 @@
 from src.objects import *
 
 
+def simulate(g:gametemplate, events:list[pg.event.Event], dt:float, acc:float, fixed_timestep:bool=FIXED_TIMESTEP, sim_tick:float=SIM_TICK) -> float:
+    '''
+    passes `events` to `g` and steps it by `dt`, in steps of `sim_tick` if `fixed_timestep` is enabled (`SIM_TICK` and `FIXED_TIMESTEP` by default),
+    `acc` is the time that was left over from earlier frames and the time left over now is returned
+    '''
+    for event in events: g.process_input(event)
+    if not fixed_timestep:
+        g.step(dt)
+        return 0.
+    acc += dt
+    steps = 0
+    while acc >= sim_tick and steps < MAX_CATCHUP_STEPS:
+        g.step(sim_tick)
+        acc -= sim_tick
+        steps += 1
+    # drop the backlog instead of trying to catch up with it forever
+    if acc >= sim_tick: acc %= sim_tick
+    g.interp_alpha = acc / sim_tick
+    return acc
+
+def collect_events(raw:list[pg.event.Event]=None) -> tuple[list[pg.event.Event],bool]:
+    '''
+    returns the events of this frame (`raw` or else `pg.event.get()`) and whether the game should keep running
+
+    window resizes and 'window_resize' events posted by the game (scale changes) are coalesced into a single 'window_resize' event
+    where the first one was, so dragging the window edge only resizes the game once per frame
+    '''
+    events = []
+    resize_at = None
+    for event in (pg.event.get() if raw==None else raw):
+        if event.type==pg.QUIT: return events, False
+        if event.type==pg.VIDEORESIZE:
+            scfg.TRUE_WIDTH = event.w
+            scfg.TRUE_HEIGHT = event.h
+            scfg.WIDTH = scfg.TRUE_WIDTH / scfg.SCALE_FACTOR
+            scfg.HEIGHT = scfg.TRUE_HEIGHT / scfg.SCALE_FACTOR
+            scfg.WINDOW_W_SCALE = event.w / INIT_TRUE_WIDTH
+            scfg.WINDOW_H_SCALE = event.h / INIT_TRUE_HEIGHT
+        elif event_key(event)!='window_resize':
+            events.append(event)
+            continue
+        if resize_at==None:
+            resize_at = len(events)
+            events.append(pg.event.Event(pg.USEREVENT, {'msg':'window_resize'}))
+    return events, True
+
 def main():
     load_cfg()
 
@@ -10,25 +56,46 @@ def main():
     pg.display.set_caption(WINDOW_TITLE)
     clock = pg.time.Clock()
 
+    # seeds `random` before the game is made so that replays start the same
+    recorder = input_recorder(RECORD_INPUT) if RECORD_INPUT else None
     g = game(screen)
+    # everything built with the game lives until exit, so collections can skip it
+    if GC_FREEZE: gccontrol.freeze()
     dt = TICK
+    acc = 0.
     cont = True
+    simthread = ThreadPoolExecutor(1, thread_name_prefix='simulation') if PIPELINED else None
+    sim = None
+    snap = None
     while cont:
-        for event in pg.event.get():
-            if event.type==pg.QUIT: cont = False
-            elif event.type==pg.VIDEORESIZE:
-                scfg.TRUE_WIDTH = event.w
-                scfg.TRUE_HEIGHT = event.h
-                scfg.WIDTH = scfg.TRUE_WIDTH / scfg.SCALE_FACTOR
-                scfg.HEIGHT = scfg.TRUE_HEIGHT / scfg.SCALE_FACTOR
-                scfg.WINDOW_W_SCALE = event.w / INIT_TRUE_WIDTH
-                scfg.WINDOW_H_SCALE = event.h / INIT_TRUE_HEIGHT
-                g.process_input(pg.event.Event(pg.USEREVENT, {'msg':'window_resize'}))
-            else: g.process_input(event)
+        start = time.perf_counter()
+        # with PIPELINED the worker is idle from here until the next frame is submitted,
+        # so everything touching the game from the main thread happens in between
+        if sim!=None: acc, snap = sim.result()
+        run_main_calls()
+        # assets finished loading in the background get their events delivered this frame
+        assetloader.pump()
+        soundmanager.update()
+        raw = pg.event.get()
+        if recorder!=None: recorder.frame(raw, dt)
+        events, cont = collect_events(raw)
         if not cont: break
-        g.step(dt)
-        g.update_screen(screen)
+        if simthread!=None:
+            if snap==None: snap = g.snapshot()
+            # elements without a snapshot are drawn as they are, so the next step can't start before they are
+            live = any(s.live for s in snap)
+            if live: g.update_screen(screen, snap)
+            sim = simthread.submit(lambda events, dt, acc: (simulate(g, events, dt, acc), g.snapshot()), events, dt, acc)
+            if not live: g.update_screen(screen, snap)
+        else:
+            acc = simulate(g, events, dt, acc)
+            g.update_screen(screen)
+        gccontrol.idle(1000/TPS - (time.perf_counter()-start)*1000)
         dt = clock.tick(TPS) / 1000
 
+    if simthread!=None: simthread.shutdown()
+    if recorder!=None: recorder.close()
+    assetloader.shutdown()
     save_cfg()
     g.cleanup()
+    wait_saves()
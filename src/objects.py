@@ -16,13 +16,17 @@ class esc_menu(scene):
         self.scales_display = ['0.5', '0.75', '1', '1.25', '1.5', '2']
         self.scale_idx = 3
         self.update_scale(scfg.SCALE_FACTOR)
+        self.modetext = text(1, '', 'center', (100, 140), fontname, textcolor, pressed_behavior=lambda: post_event('scale_mode_next'))
+        self.modes_display = {'auto':'Auto', 'smooth':'Smooth', 'nearest':'Sharp', 'scale2x':'Scale2x'}
+        self.modetext.updatetext(f'Filter: {self.modes_display[scfg.SCALE_MODE]}')
         elems = [
             text(1, 'PAUSED', 'center', (100, 40), fontname, textcolor, 24),
             self.scaletext,
             text(1, ' < ', 'center', (30, 100), fontname, textcolor, pressed_behavior=lambda: post_event('scaling_down')),
             text(1, ' > ', 'center', (170, 100), fontname, textcolor, pressed_behavior=lambda: post_event('scaling_up')),
-            text(1, 'Toggle Fullscreen', 'center', (100, 150), fontname, textcolor, pressed_behavior=toggle_fullscreen),
-            text(1, 'Quit Game', 'center', (100, 200), fontname, textcolor, pressed_behavior=quitgame)
+            self.modetext,
+            text(1, 'Toggle Fullscreen', 'center', (100, 180), fontname, textcolor, pressed_behavior=toggle_fullscreen),
+            text(1, 'Quit Game', 'center', (100, 220), fontname, textcolor, pressed_behavior=quitgame)
         ]
         self.menu = scene((200, 400), elems, bgcolor, (init_scfg.WIDTH//2-100, init_scfg.HEIGHT//2-200), anchor='center')
         super().__init__((init_scfg.WIDTH, init_scfg.HEIGHT), [self.menu], (0, 0, 0))
@@ -51,6 +55,9 @@ class esc_menu(scene):
             self.update_scale_idx(self.scale_idx - 1)
         elif inpt.type==pg.USEREVENT and inpt.msg=='scaling_up':
             self.update_scale_idx(self.scale_idx + 1)
+        elif inpt.type==pg.USEREVENT and inpt.msg=='scale_mode_next':
+            set_scale_mode(SCALE_MODES[(SCALE_MODES.index(scfg.SCALE_MODE)+1) % len(SCALE_MODES)])
+            self.modetext.updatetext(f'Filter: {self.modes_display[scfg.SCALE_MODE]}')
         else: super().process_input(inpt)
 
 class game(gametemplate):
@@ -74,11 +81,8 @@ class game(gametemplate):
     def process_input(self, inpt: pg.event.Event):
         super().process_input(inpt)
         if not self.paused and inpt.type==pg.KEYDOWN and inpt.key==pg.K_ESCAPE:
-            self.temp_curscenes = self.curscenes
-            self.esc.init_env = pg.transform.smoothscale(self.screen_ref, (INIT_TRUE_WIDTH, INIT_TRUE_HEIGHT))
-            self.curscenes = [self.esc]
-            post_event('window_resize')
-            self.paused = True
+            # the screen is only safe to read between frames
+            run_on_main(self.pause)
         elif inpt.type==pg.USEREVENT:
             if self.paused and inpt.msg=='exit_esc_menu':
                 self.curscenes = self.temp_curscenes
@@ -87,4 +91,11 @@ class game(gametemplate):
             # if inpt.msg=='startgame':
             #     self.curscenes = [self.s1]
             pass
+    def pause(self):
+        if self.paused: return
+        self.temp_curscenes = self.curscenes
+        self.esc.init_env = pg.transform.smoothscale(self.screen_ref, (INIT_TRUE_WIDTH, INIT_TRUE_HEIGHT))
+        self.curscenes = [self.esc]
+        post_event('window_resize')
+        self.paused = True
 
@@ -0,0 +1,50 @@
+'''
+fills `diskcache` ahead of time, run with `python -m src.prebuild` from the project folder (see `python -m src.prebuild -h`)
+before freezing the game, so that its first launch doesn't decode images or look up system fonts either
+
+the cache is written to `--cache` (src/cache by default) when `ASSET_DISK_CACHE` is disabled, the game only reads it once `ASSET_DISK_CACHE` names that folder
+
+images are taken from manifests in the data folder (the format of `assetloader.load_manifest()`) and `--image` arguments,
+and with `--game` from whatever the game in `src/objects.py` generates while it's made (at the initial window size, saved settings aren't loaded)
+'''
+import os, sys, json, time, argparse
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from src.main import *
+
+def prebuild(manifests:list[str]=[], images:list[tuple[str,float,float]]=[], fonts:list[str]=[], build_game:bool=False, prune:bool=False) -> dict:
+    '''
+    writes the listed images and fonts to `diskcache` (and everything `game` generates if `build_game` is enabled) and returns counts of what was done
+    '''
+    if diskcache.path==None: raise RuntimeError("no cache folder, set ASSET_DISK_CACHE or pass one to prebuild_main()")
+    start = time.perf_counter()
+    for name in manifests:
+        with open(os.path.join(os.path.dirname(__file__), 'data', name)) as f: manifest = json.load(f)
+        images = images + [tuple(img) for img in manifest.get('images', [])]
+    for img in images: generate_surface(*img)
+    for fontname in fonts: diskcache.font_path(fontname)
+    if build_game:
+        g = game(pg.display.get_surface())
+        while assetloader.pump(): time.sleep(.001)
+        g.cleanup()
+    assetloader.shutdown()
+    return {'written':diskcache.written, 'cached':diskcache.hits, 'fonts':len(diskcache._fonts or {}),
+            'pruned':diskcache.prune() if prune else 0, 'seconds':time.perf_counter()-start}
+
+def prebuild_main(argv:list[str]=None):
+    parser = argparse.ArgumentParser(prog='python -m src.prebuild', description='fill the asset disk cache before packaging')
+    parser.add_argument('manifests', nargs='*', help='json manifests in src/data to cache the images of')
+    parser.add_argument('--image', nargs=3, action='append', default=[], metavar=('NAME', 'W', 'H'), help='cache an image at a size')
+    parser.add_argument('--font', action='append', default=[], metavar='NAME', help='look up a system font')
+    parser.add_argument('--game', action='store_true', help='make the game and cache everything it generates')
+    parser.add_argument('--prune', action='store_true', help='delete cached images whose image changed or is gone')
+    parser.add_argument('--cache', default='cache', metavar='DIR', help='folder in src to fill if ASSET_DISK_CACHE is disabled (default: cache)')
+    args = parser.parse_args(argv)
+    if diskcache.path==None: diskcache.path = os.path.join(os.path.dirname(__file__), args.cache)
+    images = [(name, float(w), float(h)) for name, w, h in args.image]
+    print(json.dumps(prebuild(args.manifests, images, args.font, args.game, args.prune), indent=1))
+
+if __name__=='__main__':
+    prebuild_main()
@@ -1,4 +1,8 @@
 from src.utils import *
+import time
+import bisect
+from itertools import groupby
+from collections import deque
 
 # objects
 
@@ -16,7 +20,7 @@ class element(object):
         `anchor`: the position to anchor the offset from when scaling the parent scene,
         one of "topleft", "top", "topright", "left", "center", "right", "bottomleft", "bottom", "bottomright"
         
-        `z`: z-index for layering
+        `z`: z-index for layering, changing it moves the element within its parent scene's `elements`
         
         `w`, `h`: width and height of `surface`
 
@@ -26,21 +30,80 @@ class element(object):
 
         `pressable`: boolean of whether there is a pressed behavior
 
+        `dirty`: whether the element needs to be redrawn even if its rect and surface didn't change (only used by scenes with dirty rendering)
+
+        `interpolate`: if enabled, the element is drawn between `prev_pos` and `pos` according to the parent scene's `interp_alpha`
+
+        `prev_pos`: (`x`, `y`) before the last step, only kept if `interpolate` is enabled
+
+        `subscriptions`: event types and `post_event()` messages that `process_input()` needs (on top of 'window_resize', and mouse presses if pressable),
+        if `None`, elements that override `process_input()` receive every event
+
+        `static`: promise that the element rarely changes, so scenes can cache it (call `mark_dirty()` after changing it)
+
+        `save_id`: key of the element in its scene's `save_state()`, elements without one are matched by their index in the scene's `elements`
+        (which only works as long as the same elements are in the scene when loading)
+
+        `save_fields`: names of extra attributes saved by `save_state()`, their values have to be picklable
+
+        `parallax`: how much the element moves with its scene's `camera`, 1 for world elements, below 1 for distant backgrounds, 0 to stay fixed on screen
+
     ### Methods:
         `get_rect()`: returns `pg.Rect` object with `x`, `y`, `w`, `h` attributes by default
 
         `blit(screen)`: blits `self.surface` to `screen` at `x`, `y` by default
 
+        `blit_at(screen, offset)`: draws like `blit()` moved up and left by `offset`, used by cameras,
+        classes that override `blit()` should override this too or they're drawn by moving them for the duration of `blit()`
+
         `collidepoint(pos)`: returns whether a point in parent scene coordinates is inside the element
 
         `step(dt)`: called every frame, used for updating element state, only handles presses by default
 
-        `handle_resize()`: called when window is resized, by default it scales the anchor positions and not the offsets
+        `handle_resize()`: called when window is resized, by default it scales the anchor positions and not the offsets,
+        it sets `pos` in place, so a reference to `pos` taken earlier sees the new position (copy it to keep the old one)
 
         `process_input(inpt)`: called when user input or events need to be processed
 
         `collisioncheck(other)`: returns `True` if `self` and `other` are colliding, `False` otherwise (uses `get_rect()` by default)
+
+        `mark_dirty()`: call this after drawing onto `surface` in place so that scenes with dirty rendering or static layers redraw the element
+
+        `wants_event(key)`: returns whether events with `event_key()` `key` should be routed to this element
+
+        `interpolated_pos()`: returns the position to draw at when `interpolate` is enabled
+
+        `snapshot()`: returns what `blit()` would draw as `Surface.blits()` arguments (surface, position[, area]),
+        taken at the end of a step when `PIPELINED` is enabled so the frame can be drawn while the next step runs,
+        the surface isn't copied unless the element is marked dirty, so replace `surface` instead of drawing on it in place (or call `mark_dirty()` after),
+        classes that override `blit()` should override this too, otherwise the main loop has to draw them before it starts the next step
+
+        `save_state()`: returns a picklable dict of the position, the velocity of physics objects and `save_fields`
+
+        `load_state(state)`: restores what `save_state()` returned in place
+
+        `on_acquire(**attrs)`: called by an `element_pool` when the element is handed out, resets the press state, velocity and acceleration,
+        sets the given attributes (vectors in place) and recomputes the resize offset, override it to reset anything else the element keeps
+
+        `on_release()`: called by an `element_pool` when the element is given back, before it leaves its scene
     '''
+    dirty = False
+    static = False
+    save_id = None
+    save_fields:tuple[str,...] = ()
+    _subscriptions:set = None
+    _pressable = False
+    _interpolate = False
+    prev_pos:tuple[float,float] = None
+    parallax = 1.
+    _z = None
+    _zkey:tuple[float,int] = None
+    _parent_scene:'scene' = None
+    # scene that will add the element once it's done iterating
+    _adding:'scene' = None
+    _pool:'element_pool' = None
+    _releasing = False
+    _pooled = False
     def __init__(self, z:int, surf:pg.Surface, pos:vector|tuple[float,float], anchor:str='topleft', pressed_behavior=None) -> None:
         assert anchor in ["topleft", "top", "topright", "left", "center", "right", "bottomleft", "bottom", "bottomright"]
         self.anchor = anchor
@@ -75,6 +138,44 @@ class element(object):
         self.init_anchor_pos = vector(_iax, _iay)
         self.anchor_offset = self.pos - self.init_anchor_pos
 
+    @property
+    def z(self):
+        return self._z
+    @z.setter
+    def z(self, val):
+        if val==self._z: return
+        self._z = val
+        if self._parent_scene!=None: self._parent_scene._reorder(self)
+
+    @property
+    def pressable(self):
+        return self._pressable
+    @pressable.setter
+    def pressable(self, val:bool):
+        self._pressable = val
+        # which events reach the element changed
+        if self._parent_scene!=None: self._parent_scene.refresh_routes()
+    @property
+    def subscriptions(self):
+        return self._subscriptions
+    @subscriptions.setter
+    def subscriptions(self, val:set):
+        self._subscriptions = val
+        if self._parent_scene!=None: self._parent_scene.refresh_routes()
+
+    @property
+    def interpolate(self):
+        return self._interpolate
+    @interpolate.setter
+    def interpolate(self, val:bool):
+        if val==self._interpolate: return
+        self._interpolate = val
+        self.prev_pos = None
+        ps = self._parent_scene
+        if ps==None: return
+        if val: ps._interpolated.append(self)
+        elif self in ps._interpolated: ps._interpolated.remove(self)
+
     @property
     def x(self):
         return self.pos.x
@@ -90,8 +191,20 @@ class element(object):
 
     def get_rect(self):
         return pg.Rect(self.x, self.y, self.w, self.h)
+    def interpolated_pos(self):
+        if self.prev_pos==None: return (self.x, self.y)
+        a = self.parent_scene.interp_alpha
+        px, py = self.prev_pos
+        return (px + (self.x-px)*a, py + (self.y-py)*a)
     def blit(self, screen:pg.Surface):
-        screen.blit(self.surface, (self.x, self.y))
+        screen.blit(self.surface, self.interpolated_pos() if self.interpolate else (self.x, self.y))
+    def blit_at(self, screen:pg.Surface, offset:tuple[float,float]):
+        it = self.snapshot()
+        if type(it) is tuple: screen.blit(it[0], (it[1][0]-offset[0], it[1][1]-offset[1]), *it[2:])
+        else: _blit_shifted(self, screen, *offset)
+    def snapshot(self):
+        if type(self).blit is not element.blit: return self
+        return (self.surface, self.interpolated_pos() if self.interpolate else (self.x, self.y))
     def collidepoint(self, pos):
         return self.get_rect().collidepoint((pos[0], pos[1]))
     def step(self, dt:float):
@@ -99,19 +212,52 @@ class element(object):
             self.pressed = False
             self.pressed_behavior()
     def handle_resize(self):
-        iax, iay = self.init_anchor_pos.tuple
-        anchor_pos = vector(iax * self.parent_scene.w_scale, iay * self.parent_scene.h_scale)
-        self.pos = anchor_pos + self.anchor_offset
+        ps, iap, off = self.parent_scene, self.init_anchor_pos, self.anchor_offset
+        self.pos.set(iap.x * ps.w_scale + off.x, iap.y * ps.h_scale + off.y)
     def process_input(self, inpt:pg.event.Event):
         if inpt.type==pg.USEREVENT and inpt.msg=='window_resize':
             self.handle_resize()
         elif self.pressable and inpt.type==pg.MOUSEBUTTONDOWN and inpt.button==1:
-            truepos = (inpt.pos[0]/scfg.SCALE_FACTOR-self.parent_scene.true_x,
-                        inpt.pos[1]/scfg.SCALE_FACTOR-self.parent_scene.true_y)
-            if self.collidepoint(truepos):
+            if self.collidepoint(self.parent_scene.mouse_pos(inpt.pos, self.parallax)):
                 self.pressed = True
     def collisioncheck(self, other:'element'):
         return self.get_rect().colliderect(other.get_rect())
+    def mark_dirty(self):
+        self.dirty = True
+        if self.static and self._parent_scene!=None: self._parent_scene._moved(self)
+    def wants_event(self, key):
+        if key=='window_resize' or (key==pg.MOUSEBUTTONDOWN and self.pressable): return True
+        if self.subscriptions!=None: return key in self.subscriptions
+        return type(self).process_input is not element.process_input
+    def save_state(self) -> dict:
+        state = {'pos':self.pos.tuple}
+        if isinstance(self, physicsobject): state['v'] = self.v.tuple
+        for f in self.save_fields: state[f] = getattr(self, f)
+        return state
+    def load_state(self, state:dict):
+        self.pos.set(*state['pos'])
+        if self.parent_scene!=None:
+            # keep resizing relative to the restored position
+            ps = self.parent_scene
+            self.anchor_offset.set(self.x - self.init_anchor_pos.x*ps.w_scale, self.y - self.init_anchor_pos.y*ps.h_scale)
+        if 'v' in state and isinstance(self, physicsobject): self.v.set(*state['v'])
+        for f in self.save_fields:
+            if f in state: setattr(self, f, state[f])
+    def on_acquire(self, **attrs):
+        self.pressed = False
+        self.prev_pos = None
+        if isinstance(self, physicsobject):
+            self.v.set(0, 0)
+            self.a.set(0, 0)
+        for k, v in attrs.items():
+            cur = getattr(self, k, None)
+            if isinstance(cur, vector) and not isinstance(v, vector): cur.set(*v)
+            else: setattr(self, k, v)
+        self.w, self.h = self.surface.get_size()
+        self.anchor_offset = self.pos - self.init_anchor_pos
+        self.dirty = True
+    def on_release(self):
+        self.pressed = False
     
 class sprite(element):
     '''
@@ -119,18 +265,40 @@ class sprite(element):
 
     if `surf_names` is provided as a list with the same length as `surfs`, then each surface can be set using the names
 
+    `surfs` can also be a `spritesheet`, in which case the frames are blitted from the shared sheet surface with `area=`
+    (`surface` is still set to the frame's subsurface) and the sheet's frame names are used if `surf_names` isn't given
+
     `set_surf(idx_or_name)` is called to change the surface
     '''
-    def __init__(self, z:int, surfs:list[pg.Surface], pos:vector|tuple[float,float], anchor:str='topleft', surf_names:list[str]=[]) -> None:
+    def __init__(self, z:int, surfs:list[pg.Surface]|spritesheet, pos:vector|tuple[float,float], anchor:str='topleft', surf_names:list[str]=[]) -> None:
+        self.sheet:spritesheet = None
+        if isinstance(surfs, spritesheet):
+            self.sheet = surfs
+            if len(surf_names)==0: surf_names = surfs.names
+            surfs = surfs.surfaces
         super().__init__(z, surfs[0], pos, anchor)
         self.surfs = surfs
         if len(surf_names)==len(surfs):
             self.surfs_name = {nm:surf for nm, surf in zip(surf_names, surfs)}
+        self.area:pg.Rect = None
+        if self.sheet!=None: self.area = pg.Rect(self.surface.get_offset(), self.surface.get_size())
     def set_surf(self, idx_or_name:int|str):
         if isinstance(idx_or_name, int):
             self.surface = self.surfs[idx_or_name]
         else:
             self.surface = self.surfs_name[idx_or_name]
+        if self.sheet!=None:
+            self.area = pg.Rect(self.surface.get_offset(), self.surface.get_size())
+            self.w, self.h = self.area.size
+    def blit(self, screen:pg.Surface):
+        pos = self.interpolated_pos() if self.interpolate else (self.x, self.y)
+        if self.sheet==None: screen.blit(self.surface, pos)
+        else: screen.blit(self.sheet.surface, pos, self.area)
+    def snapshot(self):
+        if type(self).blit is not sprite.blit: return self
+        pos = self.interpolated_pos() if self.interpolate else (self.x, self.y)
+        if self.sheet==None: return (self.surface, pos)
+        return (self.sheet.surface, pos, self.area)
 
 class collidable(object):
     '''
@@ -149,6 +317,76 @@ class collidable(object):
         if not self.push_others: return False
         return self.collisioncheck(other)
 
+class spatial_hash(object):
+    '''
+    uniform grid over element rects, used by physics scenes as a broadphase so that
+    each physics object only checks the pushers in the cells it overlaps
+
+    ### Attributes:
+        `cell_size`: width and height of a grid cell in in-game pixels
+
+        `cells`: dict of (column, row) to list of elements overlapping that cell
+
+    ### Methods:
+        `insert(elem)`: adds `elem` to the grid (uses `get_rect()`)
+
+        `remove(elem)`: removes `elem` from the grid
+
+        `update(elem)`: moves `elem` to the cells it currently overlaps, does nothing if it hasn't left its cells or isn't in the grid
+
+        `query(rect)`: returns the elements in the cells overlapped by `rect`, in insertion order
+    '''
+    def __init__(self, cell_size:int=64) -> None:
+        self.cell_size = cell_size
+        self.cells:dict[tuple[int,int],list[element]] = {}
+        self._bounds:dict[int,tuple[int,int,int,int]] = {}
+        self._order:dict[int,int] = {}
+        self._counter = 0
+    def _cell_bounds(self, rect:pg.Rect):
+        cs = self.cell_size
+        return (rect.left//cs, rect.top//cs, max(rect.right-1, rect.left)//cs, max(rect.bottom-1, rect.top)//cs)
+    def _add_cells(self, elem:element, b:tuple[int,int,int,int]):
+        for cx in range(b[0], b[2]+1):
+            for cy in range(b[1], b[3]+1):
+                self.cells.setdefault((cx, cy), []).append(elem)
+    def _remove_cells(self, elem:element, b:tuple[int,int,int,int]):
+        for cx in range(b[0], b[2]+1):
+            for cy in range(b[1], b[3]+1):
+                cell = self.cells[(cx, cy)]
+                cell.remove(elem)
+                if not cell: del self.cells[(cx, cy)]
+    def __contains__(self, elem:element):
+        return id(elem) in self._bounds
+    def insert(self, elem:element):
+        if id(elem) in self._bounds: return
+        b = self._cell_bounds(elem.get_rect())
+        self._bounds[id(elem)] = b
+        self._order[id(elem)] = self._counter
+        self._counter += 1
+        self._add_cells(elem, b)
+    def remove(self, elem:element):
+        b = self._bounds.pop(id(elem), None)
+        if b==None: return
+        del self._order[id(elem)]
+        self._remove_cells(elem, b)
+    def update(self, elem:element):
+        b = self._bounds.get(id(elem))
+        if b==None: return
+        nb = self._cell_bounds(elem.get_rect())
+        if nb==b: return
+        self._remove_cells(elem, b)
+        self._add_cells(elem, nb)
+        self._bounds[id(elem)] = nb
+    def query(self, rect:pg.Rect) -> list[element]:
+        x0, y0, x1, y1 = self._cell_bounds(rect)
+        if x0==x1 and y0==y1: return list(self.cells.get((x0, y0), ()))
+        found = {}
+        for cx in range(x0, x1+1):
+            for cy in range(y0, y1+1):
+                for e in self.cells.get((cx, cy), ()): found[id(e)] = e
+        if len(found) < 2: return list(found.values())
+        return sorted(found.values(), key=lambda e:self._order[id(e)])
+
 class physicsobject(collidable):
     '''
     template for physics objects (subclass of `collidable`)
@@ -165,8 +403,11 @@ class physicsobject(collidable):
 
         `collided_behavior(other)`: called when `self` collides with `other` (empty by default)
 
-        `physics_step(dt)`: always call this function every step to update position
+        `physics_step(dt)`: always call this function every step to update position,
+        only the pushers returned by the parent scene's `broadphase` for `get_rect()` and the scene's `tilemaps` are checked
+        (does nothing if the parent scene uses batched physics, which integrates all physics objects at once)
     '''
+    _batch:'physics_batch' = None
     def __init__(self, mass:float=1, v_init:vector|tuple[float,float]=(0,0), push_others:bool=False) -> None:
         super().__init__(push_others)
         if isinstance(v_init, vector): self.v = v_init
@@ -179,16 +420,853 @@ class physicsobject(collidable):
     def collided_behavior(self, other:collidable):
         pass
     def physics_step(self, dt:float):
+        if self._batch!=None: return
         self.calculate_a()
-        self.pos += self.v*dt + self.a*(dt**2/2)
-        self.v += self.a*dt
-        for p in self.parent_scene.pushers:
+        v, a = self.v, self.a
+        self.pos.add_scaled(v, dt, a, dt**2/2)
+        v.add_scaled(a, dt)
+        ps = self.parent_scene
+        found = ps.broadphase.query(self.get_rect())
+        if ps.tilemaps: found += ps.tilemaps
+        for p in found:
             if p.pushes(self):
-                self.pos -= self.v*dt - self.a*(dt**2/2)
-                self.v = vector(0, 0)
+                self.pos.add_scaled(v, -dt, a, dt**2/2)
+                v.set(0, 0)
                 self.collided_behavior(p)
                 break
 
+class array_vector(vector):
+    '''
+    `vector` whose components are stored in a row of a numpy array, used by `physics_batch`
+    so that `pos`, `v` and `a` of batched elements can still be read and written like normal vectors
+    '''
+    __slots__ = ('_arr', '_i')
+    def __init__(self, arr, idx:int) -> None:
+        self._arr = arr
+        self._i = idx
+    @property
+    def x(self):
+        return float(self._arr[self._i, 0])
+    @x.setter
+    def x(self, val):
+        self._arr[self._i, 0] = val
+    @property
+    def y(self):
+        return float(self._arr[self._i, 1])
+    @y.setter
+    def y(self, val):
+        self._arr[self._i, 1] = val
+
+class physics_batch(object):
+    '''
+    structure-of-arrays storage for all physics objects in a scene, integrated in one vectorized step (requires numpy)
+
+    `pos`, `v` and `a` of batched elements are replaced with `array_vector` views into the arrays,
+    if game code assigns a new vector to one of them it is copied back in at the start of the next step
+
+    collisions are resolved in bulk as rect overlaps against pushers using the default `pushes()` and `collisioncheck()`
+    and as grid lookups against tilemaps, pushers that override either of them are checked one by one afterwards,
+    bodies are taken as `pos` and `w`, `h` unless they override `get_rect()`
+
+    ### Attributes:
+        `bodies`: list of batched elements, row `i` of every array belongs to `bodies[i]`
+
+        `pos`, `v`, `a`: arrays of shape (capacity, 2)
+
+        `mass`: array of shape (capacity,)
+
+    ### Methods:
+        `add(elem)`: adds a physics object to the batch
+
+        `remove(elem)`: removes a physics object from the batch, giving it back plain vectors
+
+        `step(dt, pushers)`: integrates all bodies and resolves collisions with `pushers`
+    '''
+    def __init__(self, capacity:int=64) -> None:
+        if np==None: raise ImportError('batched physics requires numpy')
+        self.bodies:list[physicsobject] = []
+        self.pos = np.zeros((capacity, 2))
+        self.v = np.zeros((capacity, 2))
+        self.a = np.zeros((capacity, 2))
+        self.mass = np.ones(capacity)
+        self._views:list[tuple[array_vector,array_vector,array_vector]] = []
+        self._custom_a:list[physicsobject] = []
+        self._custom_rect:list[physicsobject] = []
+    def _grow(self):
+        cap = 2*len(self.mass)
+        for nm in ('pos', 'v', 'a', 'mass'):
+            old = getattr(self, nm)
+            new = np.ones((cap,)+old.shape[1:]) if nm=='mass' else np.zeros((cap,)+old.shape[1:])
+            new[:len(old)] = old
+            setattr(self, nm, new)
+        for pv, vv, av in self._views:
+            pv._arr, vv._arr, av._arr = self.pos, self.v, self.a
+    def _bind(self, i:int):
+        e = self.bodies[i]
+        self.pos[i] = e.pos.tuple
+        self.v[i] = e.v.tuple
+        self.a[i] = e.a.tuple
+        views = (array_vector(self.pos, i), array_vector(self.v, i), array_vector(self.a, i))
+        if i==len(self._views): self._views.append(views)
+        else: self._views[i] = views
+        e.pos, e.v, e.a = views
+    def add(self, elem:physicsobject):
+        if elem._batch is self: return
+        if len(self.bodies)==len(self.mass): self._grow()
+        i = len(self.bodies)
+        self.bodies.append(elem)
+        self._bind(i)
+        self.mass[i] = elem.mass
+        elem._batch = self
+        if type(elem).calculate_a is not physicsobject.calculate_a: self._custom_a.append(elem)
+        if type(elem).get_rect is not element.get_rect: self._custom_rect.append(elem)
+    def remove(self, elem:physicsobject):
+        if elem._batch is not self: return
+        # the position view knows its row unless game code replaced `pos` since the last step
+        i = elem.pos._i if isinstance(elem.pos, array_vector) and elem.pos._arr is self.pos else self.bodies.index(elem)
+        elem.pos, elem.v, elem.a = vector(elem.pos.tuple), vector(elem.v.tuple), vector(elem.a.tuple)
+        elem._batch = None
+        if elem in self._custom_a: self._custom_a.remove(elem)
+        if elem in self._custom_rect: self._custom_rect.remove(elem)
+        last = len(self.bodies)-1
+        if i!=last:
+            for nm in ('pos', 'v', 'a', 'mass'):
+                arr = getattr(self, nm)
+                arr[i] = arr[last]
+            self.bodies[i] = self.bodies[last]
+            self._views[i] = self._views[last]
+            for view in self._views[i]: view._i = i
+        self.bodies.pop()
+        self._views.pop()
+    def step(self, dt:float, pushers:list[collidable]):
+        n = len(self.bodies)
+        if n==0: return
+        for e in self._custom_a: e.calculate_a()
+        for i, e in enumerate(self.bodies):
+            pv, vv, av = self._views[i]
+            if e.pos is not pv or e.v is not vv or e.a is not av: self._bind(i)
+
+        pos, v, a = self.pos[:n], self.v[:n], self.a[:n]
+        old_pos = pos.copy()
+        pos += v*dt + a*(dt**2/2)
+        v += a*dt
+
+        bulk:list[collidable] = []
+        maps:list[tilemap] = []
+        custom:list[collidable] = []
+        for p in pushers:
+            if not p.push_others: continue
+            if type(p).pushes is collidable.pushes and type(p).collisioncheck is element.collisioncheck: bulk.append(p)
+            elif isinstance(p, tilemap) and type(p).pushes is collidable.pushes and type(p).collisioncheck is tilemap.collisioncheck: maps.append(p)
+            else: custom.append(p)
+        hit_by:dict[int,collidable] = {}
+        if bulk or maps:
+            # same truncation as pg.Rect(x, y, w, h)
+            left = np.trunc(pos[:, 0])
+            top = np.trunc(pos[:, 1])
+            right = left + np.array([int(e.w) for e in self.bodies])
+            bottom = top + np.array([int(e.h) for e in self.bodies])
+            for e in self._custom_rect:
+                r, i = e.get_rect(), e.pos._i
+                left[i], top[i], right[i], bottom[i] = r.left, r.top, r.right, r.bottom
+        if bulk:
+            pr = np.array([tuple(p.get_rect()) for p in bulk], dtype=float)
+            pl, pt = pr[:, 0], pr[:, 1]
+            prr, pb = pl+pr[:, 2], pt+pr[:, 3]
+            # pushers that are also bodies must not push themselves
+            self_pairs = [(self.bodies.index(p), j) for j, p in enumerate(bulk) if getattr(p, '_batch', None) is self]
+            chunk = 4096
+            for s in range(0, n, chunk):
+                sl = slice(s, min(s+chunk, n))
+                overlap = ((left[sl, None] < prr) & (right[sl, None] > pl) &
+                           (top[sl, None] < pb) & (bottom[sl, None] > pt))
+                for k, j in self_pairs:
+                    if sl.start <= k < sl.stop: overlap[k-s, j] = False
+                rows = np.flatnonzero(overlap.any(axis=1))
+                if len(rows)==0: continue
+                first = overlap[rows].argmax(axis=1)
+                for r, j in zip(rows.tolist(), first.tolist()): hit_by[r+s] = bulk[j]
+        for tm in maps:
+            for r in np.flatnonzero(tm.solid_mask(left, top, right, bottom)).tolist(): hit_by.setdefault(r, tm)
+        if custom:
+            for i, e in enumerate(self.bodies):
+                if i in hit_by: continue
+                for p in custom:
+                    if p.pushes(e):
+                        hit_by[i] = p
+                        break
+        if not hit_by: return
+        rows = np.fromiter(hit_by.keys(), dtype=int, count=len(hit_by))
+        pos[rows] = old_pos[rows]
+        v[rows] = 0
+        for i, p in hit_by.items(): self.bodies[i].collided_behavior(p)
+
+class tilemap(element, collidable):
+    '''
+    grid of tiles from a `spritesheet` drawn as one element, see `load_tilegrid()`
+
+    the map is cut into chunks of `chunk_size` by `chunk_size` tiles that are pre-rendered when they first come into view
+    and kept in a cache of the `cache_chunks` most recently drawn ones, only the chunks overlapping `screen` (or its clip) are blitted,
+    so drawing costs the same for any size of map
+
+    in physics scenes, physics objects collide with the solid tiles they overlap through a lookup in the grid,
+    the tilemap is kept in the scene's `tilemaps` instead of `pushers` and passed to `collided_behavior()`
+
+    ### Attributes:
+        `tileset`: `spritesheet` whose frames are the tiles
+
+        `grid`: list of rows of tile indices, -1 for no tile (use `set_tile()` to change it)
+
+        `cols`, `rows`: size of the grid
+
+        `tile_w`, `tile_h`: size of a tile, the size of the tileset's first frame by default
+
+        `solid`: set of tile indices physics objects collide with (frozen, assign a new set to change it)
+
+        `chunk_size`: width and height of a chunk in tiles
+
+        `cache_chunks`: number of rendered chunks kept, raised automatically if more than that are in view at once
+
+    ### Methods:
+        `tile_at(col, row)`: returns the tile index at `col`, `row`, -1 outside the grid
+
+        `set_tile(col, row, tile)`: changes a tile, its chunk is rendered again the next time it is drawn
+
+        `cell_at(pos)`: returns (col, row) of the tile under a position in scene coordinates
+
+        `chunk(cx, cy)`: returns the rendered surface of a chunk, `None` if it has no tiles
+
+        `solid_in(rect)`: returns whether `rect` overlaps a solid tile
+
+        `solid_mask(left, top, right, bottom)`: returns which of many rects (numpy arrays of their edges) overlap a solid tile, used by `physics_batch`
+
+        `snapshot()`: returns the chunks in view of the parent scene, drawn like the tilemap
+    '''
+    def __init__(self, z:int, tileset:spritesheet, grid:list[list[int]], pos:vector|tuple[float,float]=(0,0), solid=(), tile_size:tuple[int,int]=None, chunk_size:int=16, cache_chunks:int=64, anchor:str='topleft') -> None:
+        self.tileset = tileset
+        self.tile_w, self.tile_h = tile_size if tile_size!=None else tileset.frames[0].size
+        self.grid = [list(r) for r in grid]
+        self.rows, self.cols = len(self.grid), max((len(r) for r in self.grid), default=0)
+        for r in self.grid: r.extend([-1]*(self.cols-len(r)))
+        self._mask = None
+        self.solid = solid
+        self.chunk_size = chunk_size
+        self.cache_chunks = cache_chunks
+        self._chunks:OrderedDict[tuple[int,int],pg.Surface] = OrderedDict()
+        element.__init__(self, z, pg.Surface((0, 0)), pos, anchor)
+        collidable.__init__(self, True)
+        self.w, self.h = self.cols*self.tile_w, self.rows*self.tile_h
+    @property
+    def solid(self):
+        return self._solid
+    @solid.setter
+    def solid(self, val):
+        self._solid = frozenset(val)
+        self._mask = None
+    def _solid_grid(self):
+        # `is` because the mask can be a numpy array
+        if self._mask is None:
+            rows = [[t in self.solid for t in r] for r in self.grid]
+            self._mask = np.array(rows, dtype=bool).reshape(self.rows, self.cols) if np!=None else rows
+        return self._mask
+    def tile_at(self, col:int, row:int) -> int:
+        if 0<=col<self.cols and 0<=row<self.rows: return self.grid[row][col]
+        return -1
+    def set_tile(self, col:int, row:int, tile:int):
+        if self.grid[row][col]==tile: return
+        self.grid[row][col] = tile
+        if self._mask is not None: self._mask[row][col] = tile in self.solid
+        self._chunks.pop((col//self.chunk_size, row//self.chunk_size), None)
+        self.mark_dirty()
+    def cell_at(self, pos:tuple[float,float]) -> tuple[int,int]:
+        return (math.floor((pos[0]-self.x)/self.tile_w), math.floor((pos[1]-self.y)/self.tile_h))
+    def chunk(self, cx:int, cy:int) -> pg.Surface|None:
+        key = (cx, cy)
+        if key in self._chunks:
+            self._chunks.move_to_end(key)
+            return self._chunks[key]
+        n, tw, th = self.chunk_size, self.tile_w, self.tile_h
+        c0, r0 = cx*n, cy*n
+        c1, r1 = min(c0+n, self.cols), min(r0+n, self.rows)
+        frames, sheet = self.tileset.frames, self.tileset.surface
+        blits = [(sheet, ((c-c0)*tw, (r-r0)*th), frames[self.grid[r][c]])
+                 for r in range(r0, r1) for c in range(c0, c1) if self.grid[r][c]>=0]
+        surf = None
+        if blits:
+            surf = pg.Surface(((c1-c0)*tw, (r1-r0)*th), pg.SRCALPHA)
+            surf.blits(blits, False)
+        self._chunks[key] = surf
+        while len(self._chunks) > self.cache_chunks: self._chunks.popitem(last=False)
+        return surf
+    def blit(self, screen:pg.Surface):
+        self.blit_at(screen, (0, 0))
+    def blit_at(self, screen:pg.Surface, offset:tuple[float,float]):
+        x, y = self.interpolated_pos() if self.interpolate else (self.x, self.y)
+        screen.blits(self._chunk_blits(x-offset[0], y-offset[1], screen.get_clip()), False)
+    def snapshot(self):
+        p = self.parent_scene
+        if p==None: return self
+        x, y = self.interpolated_pos() if self.interpolate else (self.x, self.y)
+        cam = p.camera
+        if cam==None: view = p.surface.get_rect()
+        else:
+            ox, oy = cam.draw_pos(p.interp_alpha)
+            w, h = p._view_size(cam.zoom, p.w, p.h)
+            view = pg.Rect(math.floor(ox*self.parallax), math.floor(oy*self.parallax), w+1, h+1)
+        return _tilemap_frame(self._chunk_blits(x, y, view))
+    def _chunk_blits(self, x:float, y:float, view:pg.Rect) -> list[tuple[pg.Surface,tuple[float,float]]]:
+        # the chunks overlapping `view` with the map at `x`, `y`
+        cw, ch = self.chunk_size*self.tile_w, self.chunk_size*self.tile_h
+        c0, c1 = max(0, math.floor((view.x-x)/cw)), min(math.ceil(self.cols/self.chunk_size), math.ceil((view.right-x)/cw))
+        r0, r1 = max(0, math.floor((view.y-y)/ch)), min(math.ceil(self.rows/self.chunk_size), math.ceil((view.bottom-y)/ch))
+        # evicting chunks that are still in view would render them again every frame
+        self.cache_chunks = max(self.cache_chunks, (c1-c0)*(r1-r0))
+        blits = []
+        for cy in range(r0, r1):
+            for cx in range(c0, c1):
+                surf = self.chunk(cx, cy)
+                if surf!=None: blits.append((surf, (x+cx*cw, y+cy*ch)))
+        return blits
+    def _cells(self, rect:pg.Rect) -> tuple[int,int,int,int]:
+        # first and last column and row overlapped by `rect`, clipped to the grid
+        c0 = max(0, math.floor((rect.left-self.x)/self.tile_w))
+        c1 = min(self.cols-1, math.ceil((rect.right-self.x)/self.tile_w)-1)
+        r0 = max(0, math.floor((rect.top-self.y)/self.tile_h))
+        r1 = min(self.rows-1, math.ceil((rect.bottom-self.y)/self.tile_h)-1)
+        return c0, c1, r0, r1
+    def solid_in(self, rect:pg.Rect) -> bool:
+        if rect.w<=0 or rect.h<=0: return False
+        c0, c1, r0, r1 = self._cells(rect)
+        mask = self._solid_grid()
+        return any(mask[r][c] for r in range(r0, r1+1) for c in range(c0, c1+1))
+    def solid_mask(self, left, top, right, bottom):
+        mask = self._solid_grid()
+        c0 = np.floor((left-self.x)/self.tile_w).astype(int)
+        c1 = np.ceil((right-self.x)/self.tile_w).astype(int)-1
+        r0 = np.floor((top-self.y)/self.tile_h).astype(int)
+        r1 = np.ceil((bottom-self.y)/self.tile_h).astype(int)-1
+        inside = (c1>=0) & (c0<self.cols) & (r1>=0) & (r0<self.rows) & (right>left) & (bottom>top)
+        hit = np.zeros(len(left), dtype=bool)
+        if not inside.any() or not self.solid: return hit
+        c0, c1 = np.clip(c0, 0, self.cols-1), np.clip(c1, 0, self.cols-1)
+        r0, r1 = np.clip(r0, 0, self.rows-1), np.clip(r1, 0, self.rows-1)
+        # every rect checks as many tiles as the widest and tallest one overlaps, repeating its last column and row
+        for dc in range(int((c1-c0)[inside].max())+1):
+            cols = np.minimum(c0+dc, c1)
+            for dr in range(int((r1-r0)[inside].max())+1):
+                hit |= mask[np.minimum(r0+dr, r1), cols]
+        return hit & inside
+    def collisioncheck(self, other:element):
+        if isinstance(other, tilemap): return False
+        return self.solid_in(other.get_rect())
+
+class _tilemap_frame(object):
+    # chunks of a tilemap in view at the end of a step, rendered chunks are replaced instead of drawn on so they can be shared
+    def __init__(self, blits:list[tuple[pg.Surface,tuple[float,float]]]) -> None:
+        self.blits = blits
+    def blit(self, screen:pg.Surface):
+        screen.blits(self.blits, False)
+    def blit_at(self, screen:pg.Surface, offset:tuple[float,float]):
+        ox, oy = offset
+        screen.blits([(s, (x-ox, y-oy)) for s, (x, y) in self.blits], False)
+
+class particle_emitter(element):
+    '''
+    particles kept in numpy arrays, updated in one vectorized step and drawn as a single element (requires numpy)
+
+    without an `image`, particles are `size` by `size` squares of their color blended straight into the pixels of the target surface
+    with `pg.surfarray` (which has to be 32 bit like scene surfaces), with one the image is blitted centered on each particle
+    with `Surface.blits()`, picking one of `alpha_levels` pre-faded copies of it instead of a surface per particle
+
+    ### Attributes:
+        `capacity`: maximum number of live particles, further ones aren't emitted
+
+        `count`: number of live particles
+
+        `rate`: particles emitted per second while stepping, 0 to only emit with `emit()`
+
+        `lifetime`, `speed`, `angle`: (min, max) ranges each particle gets a random value from, `angle` in degrees (0 is right, 90 is down)
+
+        `spread`: radius around the emitter that particles start in
+
+        `gravity`: acceleration of all particles
+
+        `drag`: fraction of their velocity particles lose per second
+
+        `colors`: colors particles get one of at random, not used with `image`
+
+        `size`: width and height of particles without `image`
+
+        `image`: surface drawn for each particle, `None` for squares of `size`
+
+        `fade`: whether particles fade out over their lifetime
+
+        `local`: whether live particles move along with the emitter, otherwise they stay where they were emitted
+
+        `pool`: the `particle_pool` the emitter belongs to, the emitter then leaves its scene once it is idle and out of particles
+
+        `rng`: `np.random.Generator` used for emitting
+
+        `particle_pos`, `particle_v`, `particle_life`, `particle_max_life`, `particle_color`: the particle arrays, the first `count` rows are live,
+        positions are relative to the emitter
+
+    ### Methods:
+        `emit(n)`: emits `n` particles at once
+
+        `clear()`: removes all particles
+
+        `get_rect()`: returns the bounds of the live particles
+
+        `snapshot()`: returns a copy of the live particles that draws like the emitter
+    '''
+    def __init__(self, z:int, pos:vector|tuple[float,float], capacity:int=1000, rate:float=0., lifetime:tuple[float,float]=(.5,1.), speed:tuple[float,float]=(20.,80.), angle:tuple[float,float]=(0.,360.), spread:float=0., gravity:tuple[float,float]=(0.,0.), drag:float=0., colors:list=[(255,255,255)], size:int=1, image:pg.Surface=None, fade:bool=True, local:bool=False, alpha_levels:int=16, seed:int=None, anchor:str='topleft') -> None:
+        if np==None: raise ImportError('particles require numpy')
+        super().__init__(z, pg.Surface((0, 0)), pos, anchor)
+        self.capacity = capacity
+        self.count = 0
+        self.rate, self.lifetime, self.speed, self.angle, self.spread = rate, lifetime, speed, angle, spread
+        self.gravity, self.drag = gravity, drag
+        self.colors, self.size, self.fade, self.local = colors, size, fade, local
+        self.alpha_levels = alpha_levels
+        self.image = image
+        self.pool:'particle_pool' = None
+        self.rng = np.random.default_rng(seed)
+        self.particle_pos = np.zeros((capacity, 2))
+        self.particle_v = np.zeros((capacity, 2))
+        self.particle_life = np.zeros(capacity)
+        self.particle_max_life = np.ones(capacity)
+        self.particle_color = np.zeros((capacity, 3), dtype=np.uint8)
+        self._due = 0.
+        self._last_pos = self.pos.tuple
+        self._rect:pg.Rect = None
+
+    @property
+    def image(self):
+        return self._image
+    @image.setter
+    def image(self, val:pg.Surface):
+        self._image = val
+        self._faded:list[pg.Surface] = []
+        if val==None: return
+        for k in range(self.alpha_levels):
+            faded = val.copy()
+            faded.set_alpha(round(255*(k+1)/self.alpha_levels))
+            self._faded.append(faded)
+
+    def emit(self, n:int):
+        n = min(n, self.capacity-self.count)
+        if n<=0: return
+        s, rng = slice(self.count, self.count+n), self.rng
+        ang = np.radians(rng.uniform(self.angle[0], self.angle[1], n))
+        spd = rng.uniform(self.speed[0], self.speed[1], n)
+        self.particle_v[s, 0] = np.cos(ang)*spd
+        self.particle_v[s, 1] = np.sin(ang)*spd
+        if self.spread:
+            r, a = self.spread*np.sqrt(rng.random(n)), rng.uniform(0, 2*math.pi, n)
+            self.particle_pos[s, 0] = r*np.cos(a)
+            self.particle_pos[s, 1] = r*np.sin(a)
+        else: self.particle_pos[s] = 0
+        life = rng.uniform(self.lifetime[0], self.lifetime[1], n)
+        self.particle_life[s] = life
+        self.particle_max_life[s] = life
+        palette = np.array([tuple(pg.Color(c))[:3] for c in self.colors], dtype=np.uint8)
+        self.particle_color[s] = palette[rng.integers(len(palette), size=n)] if len(palette)>1 else palette[0]
+        self.count += n
+        self._rect = None
+    def clear(self):
+        self.count = 0
+        self._due = 0.
+        self._rect = None
+    def step(self, dt:float):
+        super().step(dt)
+        if not self.local and self.pos.tuple!=self._last_pos:
+            # particles are stored relative to the emitter, so they move the other way to stay put
+            self.particle_pos[:self.count] -= (self.x-self._last_pos[0], self.y-self._last_pos[1])
+        self._last_pos = self.pos.tuple
+        n = self.count
+        if n:
+            life = self.particle_life[:n]
+            life -= dt
+            alive = life > 0
+            if not alive.all():
+                k = int(alive.sum())
+                for arr in (self.particle_pos, self.particle_v, self.particle_life, self.particle_max_life, self.particle_color):
+                    arr[:k] = arr[:n][alive]
+                self.count = n = k
+            v = self.particle_v[:n]
+            if self.gravity[0] or self.gravity[1]: v += (self.gravity[0]*dt, self.gravity[1]*dt)
+            if self.drag: v *= max(0., 1-self.drag*dt)
+            self.particle_pos[:n] += v*dt
+        if self.rate>0:
+            self._due += self.rate*dt
+            k = int(self._due)
+            self._due -= k
+            if k: self.emit(k)
+        self._rect = None
+        if self.pool!=None and self.count==0 and self.rate==0 and self.parent_scene!=None: self.parent_scene.remove_element(self)
+    def get_rect(self):
+        if self._rect==None:
+            n = self.count
+            if n==0: self._rect = pg.Rect(self.x, self.y, 0, 0)
+            else:
+                p = self.particle_pos[:n]
+                w, h = self._image.get_size() if self._image!=None else (self.size, self.size)
+                (x0, y0), (x1, y1) = p.min(axis=0), p.max(axis=0)
+                if self._image!=None: x0, y0, x1, y1 = x0-w/2, y0-h/2, x1-w/2, y1-h/2
+                x0, y0 = math.floor(self.x+x0), math.floor(self.y+y0)
+                self._rect = pg.Rect(x0, y0, math.ceil(self.x+x1)-x0+w, math.ceil(self.y+y1)-y0+h)
+        return self._rect.copy()
+    def _alphas(self) -> np.ndarray:
+        n = self.count
+        if not self.fade: return np.ones(n)
+        return np.clip(self.particle_life[:n]/self.particle_max_life[:n], 0, 1)
+    def _draw(self, screen:pg.Surface, x:float, y:float, pos:np.ndarray, color:np.ndarray, alpha:np.ndarray):
+        if len(pos)==0: return
+        if self._image!=None:
+            w, h = self._image.get_size()
+            levels = np.minimum((alpha*len(self._faded)).astype(int), len(self._faded)-1).tolist()
+            faded = self._faded
+            xs, ys = (pos[:, 0]+(x-w/2)).tolist(), (pos[:, 1]+(y-h/2)).tolist()
+            screen.blits([(faded[k], (px, py)) for k, px, py in zip(levels, xs, ys)], False)
+            return
+        view = screen.get_clip()
+        xs, ys = np.floor(pos[:, 0]+x).astype(int), np.floor(pos[:, 1]+y).astype(int)
+        # gathering mapped 32 bit pixels is much faster than going through `pixels3d()`, the channels are unpacked with the surface's shifts
+        pixels = pg.surfarray.pixels2d(screen)
+        rs, gs, bs, as_ = screen.get_shifts()
+        has_alpha = screen.get_masks()[3]!=0
+        src, alpha = color.astype(np.float32), alpha.astype(np.float32)
+        for dx in range(self.size):
+            for dy in range(self.size):
+                px, py = xs+dx, ys+dy
+                inside = (px>=view.left) & (px<view.right) & (py>=view.top) & (py<view.bottom)
+                if not inside.any(): continue
+                px, py, a, c = px[inside], py[inside], alpha[inside], src[inside]
+                d = pixels[px, py]
+                dc = np.stack(((d>>rs)&255, (d>>gs)&255, (d>>bs)&255), axis=1).astype(np.float32)
+                if has_alpha:
+                    # blending over a transparent pixel has to weigh its color by its alpha
+                    out = a + ((d>>as_)&255)/np.float32(255)*(1-a)
+                    a = a/np.maximum(out, 1e-6)
+                rgb = (dc + (c-dc)*a[:, None] + .5).astype(np.uint32)
+                packed = (rgb[:, 0]<<rs) | (rgb[:, 1]<<gs) | (rgb[:, 2]<<bs)
+                if has_alpha: packed |= (out*255 + .5).astype(np.uint32)<<as_
+                pixels[px, py] = packed
+        del pixels
+    def blit(self, screen:pg.Surface):
+        self.blit_at(screen, (0, 0))
+    def blit_at(self, screen:pg.Surface, offset:tuple[float,float]):
+        x, y = self.interpolated_pos() if self.interpolate else (self.x, self.y)
+        n = self.count
+        self._draw(screen, x-offset[0], y-offset[1], self.particle_pos[:n], self.particle_color[:n], self._alphas())
+    def snapshot(self):
+        return _particle_frame(self)
+
+class _particle_frame(object):
+    # live particles of an emitter copied at the end of a step, drawn while the next step changes the arrays
+    def __init__(self, emitter:particle_emitter) -> None:
+        n = emitter.count
+        self.emitter = emitter
+        self.pos = vector(emitter.interpolated_pos() if emitter.interpolate else emitter.pos.tuple)
+        self.prev_pos = None
+        self.arrays = (emitter.particle_pos[:n].copy(), emitter.particle_color[:n].copy(), emitter._alphas())
+    def blit(self, screen:pg.Surface):
+        self.blit_at(screen, (0, 0))
+    def blit_at(self, screen:pg.Surface, offset:tuple[float,float]):
+        self.emitter._draw(screen, self.pos.x-offset[0], self.pos.y-offset[1], *self.arrays)
+
+class particle_pool(object):
+    '''
+    fixed set of `particle_emitter`s reused for short bursts (explosions, hits, dust) instead of creating an emitter for each
+
+    emitters leave their scene once their particles are gone and become idle again (emitters waiting to be added by a scene that is stepping aren't idle),
+    when no emitter is idle the one with the fewest live particles is cleared and reused
+
+    ### Attributes:
+        `emitters`: the pooled emitters
+
+        `settings`: emitter attributes applied to an emitter before every burst
+
+    ### Methods:
+        `burst(parent, pos, n, **settings)`: emits `n` particles at `pos` in scene `parent` from an idle emitter,
+        with `settings` overriding the pool's, and returns the emitter
+    '''
+    def __init__(self, size:int, z:int, capacity:int=1000, **settings) -> None:
+        self.settings = settings
+        self.emitters = [particle_emitter(z, (0, 0), capacity) for _ in range(size)]
+        for e in self.emitters: e.pool = self
+    def burst(self, parent:'scene', pos:tuple[float,float], n:int, **settings) -> particle_emitter:
+        e = next((e for e in self.emitters if e.parent_scene==None and e._adding==None), None)
+        if e==None:
+            e = min(self.emitters, key=lambda e:e.count)
+            e.clear()
+        for k, v in {'rate':0., **self.settings, **settings}.items(): setattr(e, k, v)
+        e.pos.set(*pos)
+        e._last_pos = e.pos.tuple
+        e.emit(n)
+        owner = e.parent_scene if e.parent_scene!=None else e._adding
+        if owner is not parent:
+            if owner!=None: owner.remove_element(e)
+            parent.add_element(e)
+        return e
+
+class static_layer(object):
+    '''
+    static elements of a scene pre-rendered onto one surface, see `scene`'s `static_layers`
+
+    ### Attributes:
+        `elements`: the baked elements, in drawing order
+
+        `base`: whether the scene background is baked in too
+
+        `rects`: the parts of `surface` that are blitted
+
+    ### Methods:
+        `bake(parent)`: redraws `surface`
+
+        `blit(screen, area)`: blits the layer to `screen`, only inside `area` if given
+    '''
+    def __init__(self, elements:list[element], base:bool) -> None:
+        self.elements = elements
+        self.base = base
+        self.rect:pg.Rect = None
+        self.rects:list[pg.Rect] = []
+        self.surface:pg.Surface = None
+        self._blits:list[tuple[pg.Surface,pg.Rect,pg.Rect]] = []
+    def bake(self, parent:'scene'):
+        size = parent.surface.get_size()
+        if self.surface==None or self.surface.get_size()!=size: self.surface = pg.Surface(size, pg.SRCALPHA)
+        self.surface.fill((0,0,0,0))
+        bounds = self.surface.get_rect()
+        if self.base:
+            self.surface.blit(parent.scaled_init_env, (0, 0))
+            self.rects = [bounds]
+        else:
+            # blitting the union of scattered elements would cost more than blitting them one by one
+            self.rects = merge_rects([e.get_rect().clip(bounds) for e in self.elements], len(self.elements))
+        self.rect = self.rects[0].unionall(self.rects) if self.rects else pg.Rect(0, 0, 0, 0)
+        self._blits = [(self.surface, r, r) for r in self.rects]
+        for e in self.elements: e.blit(self.surface)
+    def blit(self, screen:pg.Surface, area:pg.Rect=None):
+        if area==None: screen.blits(self._blits, False)
+        else: screen.blits([(self.surface, r.clip(area), r.clip(area)) for r in self.rects if r.colliderect(area)], False)
+
+def _blit_shifted(e:element, screen:pg.Surface, dx:float, dy:float):
+    # draws `e` moved up and left by `dx`, `dy` so that overridden `blit()`s work unchanged, then puts back its exact position,
+    # only safe on the thread that steps `e`
+    x, y, prev = e.pos.x, e.pos.y, e.prev_pos
+    e.pos.set(x-dx, y-dy)
+    if prev!=None: e.prev_pos = (prev[0]-dx, prev[1]-dy)
+    try: e.blit(screen)
+    finally:
+        e.pos.set(x, y)
+        if prev!=None: e.prev_pos = prev
+
+class camera(object):
+    '''
+    view onto the world of a scene larger than the window, attached with `scene.camera`
+
+    elements keep their positions in world coordinates and are drawn shifted by the camera position times their `parallax`,
+    elements whose rect is outside the view aren't drawn at all
+
+    ### Attributes:
+        `pos`: vector of the world position shown at the top left corner of the scene
+
+        `x`, `y`: position
+
+        `zoom`: magnification, above 1 zooms in, the view then covers `w/zoom` by `h/zoom` of the world
+
+        `target`: element kept in view by `update()`, `None` to leave the camera where it is
+
+        `smoothing`: seconds the camera takes to close most (63%) of the distance to `target`, 0 to stay locked to it
+
+        `focus`: where `target` is kept in the view, as fractions of the view's width and height
+
+        `bounds`: world `pg.Rect` the view is kept inside, `None` for no limit
+
+        `scene`: the scene the camera is attached to
+
+        `prev_pos`: (`x`, `y`) before the last `update()`, the camera is drawn between it and `pos` according to the scene's `interp_alpha`,
+        set it to `None` after moving the camera by hand so it jumps instead of sliding over
+
+    ### Methods:
+        `follow(target, smoothing)`: starts following `target`
+
+        `update(dt)`: moves towards `target` and keeps the view inside `bounds`, called at the end of the scene's `step()`
+
+        `view_size()`: returns the size of the world area in view
+
+        `view_rect(parallax)`: returns the world rect in view for elements with `parallax`
+
+        `set_zoom(zoom)`: changes `zoom` keeping the center of the view in place
+
+        `draw_pos(alpha)`: returns the camera position to draw with
+
+        `to_world(pos, parallax)`: converts a position in scene coordinates to world coordinates of elements with `parallax`
+
+        `to_view(pos, parallax)`: converts the other way
+    '''
+    def __init__(self, pos:vector|tuple[float,float]=(0,0), zoom:float=1., target:element=None, smoothing:float=0., focus:tuple[float,float]=(.5,.5), bounds:pg.Rect=None) -> None:
+        self.pos = pos if isinstance(pos, vector) else vector(pos)
+        self.zoom = zoom
+        self.target = target
+        self.smoothing = smoothing
+        self.focus = focus
+        self.bounds = bounds
+        self.scene:'scene' = None
+        self.prev_pos:tuple[float,float] = None
+
+    @property
+    def x(self):
+        return self.pos.x
+    @x.setter
+    def x(self, val):
+        self.pos.x = val
+    @property
+    def y(self):
+        return self.pos.y
+    @y.setter
+    def y(self, val):
+        self.pos.y = val
+
+    def follow(self, target:element, smoothing:float=None):
+        self.target = target
+        if smoothing!=None: self.smoothing = smoothing
+    def view_size(self) -> tuple[float,float]:
+        w, h = (self.scene.w, self.scene.h) if self.scene!=None else (scfg.WIDTH, scfg.HEIGHT)
+        return (w/self.zoom, h/self.zoom)
+    def view_rect(self, parallax:float=1.) -> pg.Rect:
+        w, h = self.view_size()
+        return pg.Rect(self.x*parallax, self.y*parallax, math.ceil(w), math.ceil(h))
+    def set_zoom(self, zoom:float):
+        w, h = self.view_size()
+        self.zoom = zoom
+        nw, nh = self.view_size()
+        self.pos.set(self.x + (w-nw)/2, self.y + (h-nh)/2)
+        self.prev_pos = None
+    def update(self, dt:float):
+        self.prev_pos = self.pos.tuple
+        w, h = self.view_size()
+        if self.target!=None:
+            r, p = self.target.get_rect(), self.target.parallax
+            tx, ty = r.centerx - w*self.focus[0], r.centery - h*self.focus[1]
+            # a target with parallax p is drawn at its position minus p times the camera's
+            if p!=0 and p!=1: tx, ty = tx/p, ty/p
+            if self.smoothing<=0: self.pos.set(tx, ty)
+            else:
+                k = 1 - math.exp(-dt/self.smoothing)
+                self.pos.set(self.x + (tx-self.x)*k, self.y + (ty-self.y)*k)
+        if self.bounds!=None:
+            b = self.bounds
+            self.pos.set(b.x + (b.w-w)/2 if w>=b.w else min(max(self.x, b.x), b.right-w),
+                         b.y + (b.h-h)/2 if h>=b.h else min(max(self.y, b.y), b.bottom-h))
+    def draw_pos(self, alpha:float=1.) -> tuple[float,float]:
+        if self.prev_pos==None or alpha>=1: return (self.x, self.y)
+        px, py = self.prev_pos
+        return (px + (self.x-px)*alpha, py + (self.y-py)*alpha)
+    def to_world(self, pos:tuple[float,float], parallax:float=1.) -> tuple[float,float]:
+        return (pos[0]/self.zoom + self.x*parallax, pos[1]/self.zoom + self.y*parallax)
+    def to_view(self, pos:tuple[float,float], parallax:float=1.) -> tuple[float,float]:
+        return ((pos[0] - self.x*parallax)*self.zoom, (pos[1] - self.y*parallax)*self.zoom)
+
+class scene_snapshot(object):
+    '''
+    what a scene draws in a frame, taken by `scene.snapshot()` at the end of a step so that it can be drawn while the next step runs
+
+    ### Attributes:
+        `scene`: the scene it was taken of
+
+        `surface`, `env`: the scene's `surface` and `scaled_init_env` at the time
+
+        `x`, `y`, `w`, `h`: the scene's position and size at the time
+
+        `items`: in drawing order, `Surface.blits()` arguments of elements, `scene_snapshot`s of child scenes,
+        and elements without a snapshot (drawn by calling their `blit()`), only the ones in view and already shifted if the scene has a camera
+        (elements without a snapshot are kept as [element, dx, dy] then and drawn with `blit_at()`)
+
+        `zoom`: the zoom of the scene's camera at the time, `None` without one
+
+        `live`: whether any item (or child snapshot) is an element without a snapshot, the main loop draws those before starting the next step
+
+    ### Methods:
+        `render()`: draws the background and `items` onto `surface`
+
+        `present(screen)`: renders and blits to `screen` like `scene.present()`
+    '''
+    __slots__ = ('scene', 'surface', 'env', 'x', 'y', 'w', 'h', 'items', 'zoom', 'live')
+    def __init__(self, s:'scene', items:list, live:bool=False) -> None:
+        self.scene = s
+        self.surface, self.env = s.surface, s.scaled_init_env
+        self.x, self.y, self.w, self.h = s.x, s.y, s.w, s.h
+        self.items = items
+        self.zoom = s.camera.zoom if s.camera!=None else None
+        self.live = live
+    def render(self):
+        self.surface.fill((0,0,0,0))
+        self.surface.blit(self.env, (0, 0))
+        surf = self.surface if self.zoom==None else self.scene._camera_view(self.zoom, self.w, self.h)
+        run = []
+        for it in self.items:
+            if type(it) is tuple:
+                run.append(it)
+                continue
+            # consecutive elements are drawn with a single blits() call
+            if run:
+                surf.blits(run, False)
+                run = []
+            if isinstance(it, scene_snapshot):
+                it.render()
+                surf.blit(it.surface, (it.x, it.y))
+            elif type(it) is list: it[0].blit_at(surf, (it[1], it[2]))
+            else: it.blit(surf)
+        if run: surf.blits(run, False)
+        if self.zoom!=None: self.scene._present_view(surf, self.zoom)
+    def present(self, screen:pg.Surface):
+        self.render()
+        if self.scene.parent_scene!=None: screen.blit(self.surface, (self.x, self.y))
+        else: self.scene._present_full(screen, self.surface, self.x, self.y, self.w, self.h)
+
+class element_list(list):
+    '''
+    list of a scene's elements that counts changes in `version`, so that scenes notice when game code edits `elements` directly
+    '''
+    version = 0
+    def __setitem__(self, i, val):
+        self.version += 1
+        list.__setitem__(self, i, val)
+    def __delitem__(self, i):
+        self.version += 1
+        list.__delitem__(self, i)
+    def __iadd__(self, other):
+        self.version += 1
+        return list.__iadd__(self, other)
+    def __imul__(self, n):
+        self.version += 1
+        return list.__imul__(self, n)
+    def append(self, val):
+        self.version += 1
+        list.append(self, val)
+    def extend(self, vals):
+        self.version += 1
+        list.extend(self, vals)
+    def insert(self, i, val):
+        self.version += 1
+        list.insert(self, i, val)
+    def pop(self, i=-1):
+        self.version += 1
+        return list.pop(self, i)
+    def remove(self, val):
+        self.version += 1
+        list.remove(self, val)
+    def clear(self):
+        self.version += 1
+        list.clear(self)
+    def sort(self, *, key=None, reverse=False):
+        self.version += 1
+        list.sort(self, key=key, reverse=reverse)
+    def reverse(self):
+        self.version += 1
+        list.reverse(self)
 
 class scene(element):
     '''
@@ -197,7 +1275,9 @@ class scene(element):
     scenes are isolated environments that contain elements
 
     ### Attributes:
-        `elements`: list of elements contained within scene, sorted by z
+        `elements`: `element_list` of elements contained within scene, sorted by z (ties keep the order they were added in),
+        it is a copy of the list passed in, so changing that list afterwards doesn't change the scene (unlike in older versions),
+        use the methods below instead of changing it by hand, scenes resort it, (un)register the elements and rebuild their routes when it was
 
         `w`, `h`: width and height, gets overridden if custom surface is given
 
@@ -213,18 +1293,79 @@ class scene(element):
 
         `pushers`: list of elements that push other elements
 
+        `broadphase`: `spatial_hash` of `pushers` with cells of `cell_size`, kept up to date every step
+
+        `tilemaps`: `tilemap`s physics objects collide with, checked by grid lookup instead of through `broadphase`
+
+        `batch`: `physics_batch` holding every physics object if `batch_physics` is enabled (implies `physics`), `None` otherwise
+
+        `dirty_rendering`: if enabled, only the regions of elements that moved, changed surface or called `mark_dirty()` are redrawn,
+        this requires `get_rect()` to cover everything an element draws (not used with `PIPELINED`, snapshots are always drawn in full)
+
+        `screen_dirty`: rects of `screen` changed by the last `blit()` of a root scene, `None` if all of it was redrawn
+
+        `interp_alpha`: how far rendering is between the last two fixed timesteps (0 to 1), always 1 without `FIXED_TIMESTEP`,
+        set on root scenes by the game and read from the root scene by child scenes
+
+        `profiler`: `frame_profiler` shared by all scenes while the game's profiler is enabled, `None` otherwise
+
+        `event_routing`: if enabled, events are only passed to the elements whose `wants_event()` accepts them
+        (and mouse presses only to the pressable elements under the mouse), otherwise every event goes to every element
+
+        `static_layers`: if enabled, static elements are drawn from cached `static_layer`s, below the dynamic elements of the same z
+        (pays off for many overlapping UI panels and texts, not for scattered opaque elements, and not used with `PIPELINED`),
+        translucent elements overlapping each other only share the bottom layer, above it they'd blend differently than drawn one by one
+
+        `auto_static`: if above 0, elements unchanged for this many frames are treated as static (implies `static_layers`)
+
+        `camera`: `camera` the elements are viewed through, `None` to draw them where they are,
+        with a camera only the elements in view are drawn but all of them are redrawn every frame (so `dirty_rendering` and `static_layers` have to be disabled),
+        static elements are found through a grid rebuilt whenever `elements` changes, the others are checked one by one every frame
+
     ### Methods:
-        `add_element(elem)`: adds `elem` to `self.elements`
+        `add_element(elem)`: inserts `elem` into `self.elements` at its z
+
+        `add_elements(elems)`: adds every element of `elems` with a single sort, use this when spawning many elements at once
+
+        `remove_element(elem)`: removes `elem` from the scene (and from `pushers`, the broadphase and the physics batch)
+
+        `remove_elements(elems)`: removes every element of `elems` in one pass over `self.elements`
+
+        adding, removing and changing `z` while the scene is iterating over its elements (during `step()` and `process_input()`)
+        is deferred until the iteration is done, so elements can spawn and despawn each other from their own `step()`
 
-        `handle_resize()`: default behavior is to scale the background and position if a root scene and scale position like an element otherwise
+        `handle_resize()`: default behavior is to scale the background and position if a root scene and scale position like an element otherwise,
+        root scenes keep the scaled background of the last `BG_CACHE_SIZES` window sizes
 
-        `process_input(inpt)`: for when user input or events need to be processed (empty by default)
+        `process_input(inpt)`: for when user input or events need to be processed, passes them on to the elements by default
 
-        `blit(screen)`: blits
+        `refresh_routes()`: call this after editing the `subscriptions` of an element already in the scene in place (assigning `pressable` or `subscriptions` calls it)
+
+        `blit(screen)`: renders and presents the scene to `screen`
+
+        `render()`: draws the background and elements onto `surface`, returns the redrawn rects in scene coordinates or `None` if everything was redrawn
+
+        `present(screen, rects)`: blits `surface` (only `rects` of it if not `None`) to `screen`,
+        root scenes are scaled by `scfg.SCALE_FACTOR` with `scfg.SCALE_MODE` into a buffer that is reused between frames
+
+        `save_state()`: returns a picklable dict of the states of all elements (recursing into child scenes), keyed by `save_id` or index,
+        root scenes don't save their own position since it depends on the window
+
+        `load_state(state)`: restores what `save_state()` returned onto the elements with the same key and class, others are left alone
+
+        `snapshot()`: returns a `scene_snapshot` of the elements (see `element.snapshot()`), recursing into child scenes
+
+        `invalidate(layers, area)`: makes the next `render()` redraw everything (only `area` if given, in scene coordinates),
+        and rebake the static layers if `layers`, call this with `layers=True` after drawing onto `scaled_init_env` in place
+
+        `mouse_pos(pos, parallax)`: converts a mouse position in window pixels to the coordinates of elements of the scene with `parallax`
+        (world coordinates if the scene has a camera)
 
         `step(dt)`: calls `step(dt)` on all elements by default
     '''
-    def __init__(self, size:tuple[float,float], elems:list[element], bgcolor, pos:vector|tuple[float,float]=(0,0), z:int=-1, surf:pg.Surface=None, anchor:str='topleft', physics:bool=False) -> None:
+    profiler:'frame_profiler' = None
+    _camera:camera = None
+    def __init__(self, size:tuple[float,float], elems:list[element], bgcolor, pos:vector|tuple[float,float]=(0,0), z:int=-1, surf:pg.Surface=None, anchor:str='topleft', physics:bool=False, cell_size:int=64, batch_physics:bool=False, dirty_rendering:bool=False, event_routing:bool=True, static_layers:bool=False, auto_static:int=0) -> None:
         self._parent_scene:scene = None
         if surf==None:
             self.init_env = pg.Surface(size, pg.SRCALPHA)
@@ -236,16 +1377,54 @@ class scene(element):
         self._w, self._h = self.w, self.h
         self._x, self._y = self.pos.tuple
 
+        # `elements` can't be the caller's list, it has to count changes
         self.elements = elems
         for e in self.elements: e.parent_scene = self
-        self.elements.sort(key=lambda x:x.z)
-
-        self.physics = physics
+        # (z, insertion number) of every element, kept parallel to `elements` for bisecting
+        self._zkeys:list[tuple[float,int]] = []
+        self._zseq = 0
+        self._resort()
+        self._iterating = 0
+        self._pending:list[tuple[str,element]] = []
+
+        self.physics = physics or batch_physics
         self.pushers:list[collidable] = []
-        if physics:
-            for e in self.elements:
-                if isinstance(e, collidable) and e.push_others:
-                    self.pushers.append(e)
+        self.tilemaps:list[tilemap] = []
+        self.broadphase = spatial_hash(cell_size)
+        self.batch = physics_batch() if batch_physics else None
+        self._interpolated:list[element] = []
+        # every registered element by id, to find the ones added or removed by hand
+        self._members:dict[int,element] = {}
+        for e in self.elements: self._register(e)
+
+        self.dirty_rendering = dirty_rendering
+        self.screen_dirty:list[pg.Rect] = None
+        self._full_redraw = True
+        self._invalid:list[pg.Rect] = []
+        self._drawn:dict[int,tuple[element,pg.Rect,pg.Surface]] = {}
+        self._present_buf:pg.Surface = None
+
+        self.event_routing = event_routing
+        self._routes:dict[object,list[element]] = {}
+
+        self._interp_alpha = 1.
+
+        self.static_layers = static_layers or auto_static>0
+        self.auto_static = auto_static
+        # id -> (element, rect, surface, frames unchanged) as of the last render
+        self._seen:dict[int,tuple[element,pg.Rect,pg.Surface,int]] = {}
+        self._layers:list[static_layer] = []
+        self._plan:list[element|static_layer] = None
+        self._plan_elems:list[element] = None
+        self._plan_flags:list[bool] = None
+        self._layer_env:pg.Surface = None
+        self._camera_buf:pg.Surface = None
+        self._zoom_buf:pg.Surface = None
+        self._cull_elems:list[element] = None
+        self._cull_grids:dict[float,spatial_hash] = {}
+        self._cull_dynamic:list[element] = []
+        self._bg_cache:OrderedDict[tuple[int,int],tuple[pg.Surface,pg.Surface]] = OrderedDict()
+        self._bg_src:pg.Surface = None
     @property
     def x(self):
         return self.pos.x
@@ -259,6 +1438,17 @@ class scene(element):
     def y(self, val):
         self.pos.y = val
 
+    @property
+    def camera(self):
+        return self._camera
+    @camera.setter
+    def camera(self, val:camera):
+        assert val==None or not (self.dirty_rendering or self.static_layers), 'scenes with a camera redraw everything, disable dirty_rendering and static_layers'
+        if self._camera!=None: self._camera.scene = None
+        self._camera = val
+        if val!=None: val.scene = self
+        self.invalidate()
+
     @property
     def w_scale(self):
         return self.w / self._w
@@ -266,6 +1456,13 @@ class scene(element):
     def h_scale(self):
         return self.h / self._h
     @property
+    def interp_alpha(self):
+        if self.parent_scene==None: return self._interp_alpha
+        return self.parent_scene.interp_alpha
+    @interp_alpha.setter
+    def interp_alpha(self, val:float):
+        self._interp_alpha = val
+    @property
     def true_x(self):
         if self.parent_scene==None: return self.x
         else: return self.parent_scene.true_x + self.x
@@ -274,34 +1471,713 @@ class scene(element):
         if self.parent_scene==None: return self.y
         else: return self.parent_scene.true_y + self.y
         
-    def add_element(self, elem:element):
-        elem.parent_scene = self
-        self.elements.append(elem)
+    @property
+    def elements(self):
+        return self._elements
+    @elements.setter
+    def elements(self, val:list[element]):
+        self._elements = val if isinstance(val, element_list) else element_list(val)
+        self._synced = -1
+    def _resort(self):
         self.elements.sort(key=lambda x:x.z)
-        if self.physics and isinstance(elem, collidable) and elem.push_others:
+        self._zkeys = []
+        for e in self.elements:
+            e._zkey = (e.z, self._zseq)
+            self._zseq += 1
+            self._zkeys.append(e._zkey)
+        self._synced = self._elements.version
+    def _check_edits(self):
+        # `elements` was changed by hand since the scene last changed it
+        if self._elements.version==self._synced: return
+        present = {id(e) for e in self.elements}
+        for e in [e for k, e in self._members.items() if k not in present]: self._unregister(e)
+        for e in self.elements:
+            if id(e) not in self._members:
+                e.parent_scene = self
+                self._register(e)
+        self._resort()
+        self._interpolated = [e for e in self.elements if e.interpolate]
+        self.refresh_routes()
+    def _new_zkey(self, elem:element):
+        elem._zkey = (elem.z, self._zseq)
+        self._zseq += 1
+        return elem._zkey
+    def _index(self, elem:element) -> int|None:
+        self._check_edits()
+        if elem._zkey==None: return None
+        i = bisect.bisect_left(self._zkeys, elem._zkey)
+        if i<len(self.elements) and self.elements[i] is elem: return i
+        return None
+    def _register(self, elem:element):
+        if self.physics and isinstance(elem, tilemap): self.tilemaps.append(elem)
+        elif self.physics and isinstance(elem, collidable) and elem.push_others:
             self.pushers.append(elem)
+            self.broadphase.insert(elem)
+        if self.batch!=None and isinstance(elem, physicsobject): self.batch.add(elem)
+        if elem.interpolate: self._interpolated.append(elem)
+        self._members[id(elem)] = elem
+    def _unregister(self, elem:element):
+        self._members.pop(id(elem), None)
+        if isinstance(elem, tilemap) and elem in self.tilemaps: self.tilemaps.remove(elem)
+        if elem in self.broadphase:
+            self.pushers.remove(elem)
+            self.broadphase.remove(elem)
+        if self.batch!=None and isinstance(elem, physicsobject): self.batch.remove(elem)
+        if elem.interpolate and elem in self._interpolated: self._interpolated.remove(elem)
+        # an element moved into another scene's `elements` by hand belongs to that one already
+        if elem._parent_scene is not self: return
+        elem._parent_scene = None
+        elem._zkey = None
+        if elem._releasing: elem._pool._returned(elem)
+    def add_element(self, elem:element):
+        if self._iterating:
+            self._pending.append(('add', elem))
+            elem._adding = self
+            return
+        self._check_edits()
+        elem._adding = None
+        elem.parent_scene = self
+        key = self._new_zkey(elem)
+        i = bisect.bisect_right(self._zkeys, key)
+        self._zkeys.insert(i, key)
+        self.elements.insert(i, elem)
+        self._synced = self._elements.version
+        self._register(elem)
+        self._drop_routes(elem)
+    def add_elements(self, elems:list[element]):
+        if self._iterating:
+            self._pending.extend(('add', e) for e in elems)
+            for e in elems: e._adding = self
+            return
+        self._check_edits()
+        for e in elems:
+            e._adding = None
+            e.parent_scene = self
+            self._zkeys.append(self._new_zkey(e))
+            self.elements.append(e)
+            self._register(e)
+        # both lists are two sorted runs now, which sorting merges in linear time
+        self.elements.sort(key=lambda x:x._zkey)
+        self._zkeys.sort()
+        self._synced = self._elements.version
+        self.refresh_routes()
+    def remove_element(self, elem:element):
+        if self._iterating:
+            self._pending.append(('remove', elem))
+            return
+        if elem._parent_scene is not self: return
+        i = self._index(elem)
+        if i==None: return
+        self._drop_routes(elem)
+        del self.elements[i]
+        del self._zkeys[i]
+        self._synced = self._elements.version
+        self._unregister(elem)
+    def remove_elements(self, elems:list[element]):
+        if self._iterating:
+            self._pending.extend(('remove', e) for e in elems)
+            return
+        gone = {id(e) for e in elems if e._parent_scene is self}
+        if not gone: return
+        self._check_edits()
+        keep = [i for i, e in enumerate(self.elements) if id(e) not in gone]
+        for e in self.elements:
+            if id(e) in gone: self._unregister(e)
+        self.elements[:] = [self.elements[i] for i in keep]
+        self._zkeys = [self._zkeys[i] for i in keep]
+        self._synced = self._elements.version
+        self.refresh_routes()
+    def _reorder(self, elem:element):
+        # called by `elem.z`'s setter
+        if self._iterating:
+            self._pending.append(('z', elem))
+            return
+        i = self._index(elem)
+        if i==None or self._zkeys[i][0]==elem.z: return
+        del self.elements[i]
+        del self._zkeys[i]
+        key = self._new_zkey(elem)
+        i = bisect.bisect_right(self._zkeys, key)
+        self._zkeys.insert(i, key)
+        self.elements.insert(i, elem)
+        self._synced = self._elements.version
+        for k in [k for k in self._routes if elem.wants_event(k)]: del self._routes[k]
+        # its place in the stacking changed without it moving
+        elem.dirty = True
+    def _apply_pending(self):
+        pending, self._pending = self._pending, []
+        for op, group in groupby(pending, key=lambda p:p[0]):
+            elems = [e for _, e in group]
+            if op=='add': self.add_elements(elems)
+            elif op=='remove':
+                if len(elems)==1: self.remove_element(elems[0])
+                else: self.remove_elements(elems)
+            else:
+                for e in elems: self._reorder(e)
     def handle_resize(self):
         if self.parent_scene!=None:
             super().handle_resize()
         else:
             _scaled_wh = (self._w * scfg.WINDOW_W_SCALE / scfg.SCALE_FACTOR, self._h * scfg.WINDOW_H_SCALE / scfg.SCALE_FACTOR)
             _scaled_xy = (self._x * scfg.WINDOW_W_SCALE / scfg.SCALE_FACTOR, self._y * scfg.WINDOW_H_SCALE / scfg.SCALE_FACTOR)
-            self.scaled_init_env = pg.transform.smoothscale(self.init_env, _scaled_wh)
-            self.surface = self.scaled_init_env.convert_alpha()
+            self.scaled_init_env, self.surface = self._scaled_bg((int(_scaled_wh[0]), int(_scaled_wh[1])))
             self.w, self.h = _scaled_wh
             self.x, self.y = _scaled_xy
+        self.invalidate()
+    def wants_event(self, key):
+        if key=='window_resize' or (key==pg.MOUSEBUTTONDOWN and self.pressable): return True
+        if self.subscriptions!=None:
+            if key in self.subscriptions: return True
+        elif type(self).process_input is not scene.process_input: return True
+        return len(self._route(key)) > 0
+    def _scaled_bg(self, size:tuple[int,int]) -> tuple[pg.Surface,pg.Surface]:
+        # (background, surface) of a root scene at `size`, the last `BG_CACHE_SIZES` sizes are kept for as long as `init_env` stays the same
+        if self._bg_src is not self.init_env:
+            self._bg_cache.clear()
+            self._bg_src = self.init_env
+        if size in self._bg_cache:
+            self._bg_cache.move_to_end(size)
+            return self._bg_cache[size]
+        bg = pg.transform.smoothscale(self.init_env, size)
+        self._bg_cache[size] = (bg, bg.convert_alpha())
+        while len(self._bg_cache) > BG_CACHE_SIZES: self._bg_cache.popitem(last=False)
+        return self._bg_cache[size]
+    def refresh_routes(self):
+        self._routes.clear()
+        if self._parent_scene!=None: self._parent_scene.refresh_routes()
+    def _drop_routes(self, elem:element):
+        # only the routes `elem` is (or was) part of change when it is added or removed
+        for k in [k for k in self._routes if elem.wants_event(k)]: del self._routes[k]
+        if self._parent_scene!=None: self._parent_scene._drop_routes(elem)
+    def _route(self, key) -> list[element]:
+        if self._elements.version!=self._synced: self._check_edits()
+        route = self._routes.get(key)
+        if route==None:
+            route = [e for e in self.elements if e.wants_event(key)]
+            self._routes[key] = route
+        return route
     def process_input(self, inpt:pg.event.Event):
         super().process_input(inpt)
-        for e in self.elements: e.process_input(inpt)
-    def blit(self, screen:pg.Surface):
+        self._iterating += 1
+        try: self._dispatch(inpt)
+        finally: self._iterating -= 1
+        if not self._iterating and self._pending: self._apply_pending()
+    def _dispatch(self, inpt:pg.event.Event):
+        if not self.event_routing:
+            for e in self.elements: e.process_input(inpt)
+        elif inpt.type==pg.MOUSEBUTTONDOWN:
+            # plain pressable elements are hit-tested here instead of each working out the mouse position
+            truepos = self.mouse_pos(inpt.pos)
+            for e in self._route(pg.MOUSEBUTTONDOWN):
+                if type(e).process_input is element.process_input:
+                    if inpt.button==1 and e.collidepoint(truepos if e.parallax==1 or self._camera==None else self.mouse_pos(inpt.pos, e.parallax)):
+                        e.pressed = True
+                else: e.process_input(inpt)
+        elif inpt.type==pg.USEREVENT and inpt.msg=='window_resize':
+            # plain elements only move back to their anchors, which is done here in one pass
+            ws, hs = self.w_scale, self.h_scale
+            for e in self._route('window_resize'):
+                if type(e).process_input is not element.process_input: e.process_input(inpt)
+                elif type(e).handle_resize is element.handle_resize:
+                    iap, off = e.init_anchor_pos, e.anchor_offset
+                    e.pos.set(iap.x * ws + off.x, iap.y * hs + off.y)
+                else: e.handle_resize()
+        else:
+            for e in self._route(event_key(inpt)): e.process_input(inpt)
+    def mouse_pos(self, pos:tuple[float,float], parallax:float=1.) -> tuple[float,float]:
+        if self.parent_scene==None: x, y = pos[0]/scfg.SCALE_FACTOR-self.x, pos[1]/scfg.SCALE_FACTOR-self.y
+        else:
+            x, y = self.parent_scene.mouse_pos(pos, self.parallax)
+            x, y = x-self.x, y-self.y
+        if self._camera!=None: return self._camera.to_world((x, y), parallax)
+        return (x, y)
+    def save_state(self) -> dict:
+        state = super().save_state() if self.parent_scene!=None else {f:getattr(self, f) for f in self.save_fields}
+        state['elements'] = {(e.save_id if e.save_id!=None else i):(type(e).__name__, e.save_state()) for i, e in enumerate(self.elements)}
+        return state
+    def load_state(self, state:dict):
+        if self.parent_scene!=None: super().load_state(state)
+        else:
+            for f in self.save_fields:
+                if f in state: setattr(self, f, state[f])
+        saved = state['elements']
+        for i, e in enumerate(self.elements):
+            key = e.save_id if e.save_id!=None else i
+            if key in saved and saved[key][0]==type(e).__name__: e.load_state(saved[key][1])
+    def snapshot(self) -> scene_snapshot:
+        items = []
+        cam = self._camera
+        if cam==None: shown = ((e, 0, 0) for e in self.elements)
+        else:
+            ox, oy = cam.draw_pos(self.interp_alpha)
+            shown = self._visible(ox, oy, *self._view_size(cam.zoom, self.w, self.h))
+        live = False
+        for e, dx, dy in shown:
+            it = e.snapshot()
+            live = live or it is e or (isinstance(it, scene_snapshot) and it.live)
+            if e.dirty:
+                # drawn on in place, so the next step could draw on it again while this frame is being drawn
+                if type(it) is tuple: it = (it[0].copy(),)+it[1:]
+                e.dirty = False
+            if cam!=None:
+                if type(it) is tuple: it = (it[0], (it[1][0]-dx, it[1][1]-dy))+it[2:]
+                elif isinstance(it, scene_snapshot): it.x, it.y = it.x-dx, it.y-dy
+                else: it = [it, dx, dy]
+            items.append(it)
+        return scene_snapshot(self, items, live)
+    def invalidate(self, layers:bool=False, area:pg.Rect=None):
+        if layers: self._plan_flags = self._layers = None
+        if area!=None and not layers:
+            self._invalid.append(pg.Rect(area))
+            return
+        self._full_redraw = True
+        self._cull_elems = None
+    def _bakeable(self, e:element):
+        # elements drawn some other way than blitting their (unchanged) surface can't be detected as static
+        return not e.interpolate and not isinstance(e, scene) and type(e).blit in (element.blit, sprite.blit, text.blit)
+    def _static_plan(self) -> list[element|static_layer]:
+        # returns what to draw in order: dynamic elements and the static layers, rebaking the layers that changed
+        K = self.auto_static
+        seen, self._seen = self._seen, {}
+        flags:list[bool] = []
+        changed:set[int] = set()
+        for e in self.elements:
+            if K==0 and not e.static:
+                flags.append(False)
+                continue
+            r, surf = e.get_rect(), e.surface
+            prev = seen.get(id(e))
+            same = prev!=None and prev[0] is e and prev[1]==r and prev[2] is surf and not e.dirty
+            still = prev[3]+1 if same else 0
+            self._seen[id(e)] = (e, r, surf, still)
+            flags.append(e.static or (K>0 and still>=K and self._bakeable(e)))
+            if not same: changed.add(id(e))
+            if e.dirty and not self.dirty_rendering: e.dirty = False
+        if self._layer_env is not self.scaled_init_env:
+            self._layer_env = self.scaled_init_env
+            self._plan_flags = None
+        if flags==self._plan_flags and self.elements==self._plan_elems:
+            if changed:
+                for layer in self._layers:
+                    if any(id(e) in changed for e in layer.elements): layer.bake(self)
+            return self._plan
+        old = {(l.base,)+tuple(map(id, l.elements)):l for l in self._layers or ()}
+        plan:list[element|static_layer] = []
+        self._layers = []
+        baked:list[element] = []
+        # rects of the translucent elements in `baked`
+        blended:list[pg.Rect] = []
+        def flush(before:list[element]):
+            # a single element is only worth a layer if it can share the background's blit
+            if len(baked)==1 and plan: plan.append(baked[0])
+            elif baked:
+                layer = old.get((not plan,)+tuple(map(id, baked)))
+                if layer==None or any(id(e) in changed for e in layer.elements):
+                    if layer==None: layer = static_layer(list(baked), not plan)
+                    layer.bake(self)
+                plan.append(layer)
+                self._layers.append(layer)
+            baked.clear()
+            blended.clear()
+            plan.extend(before)
+        i, n = 0, len(self.elements)
+        while i < n:
+            # static elements of a z-band go into a layer below its dynamic elements, auto-detected ones only
+            # if no dynamic element comes before them so that the drawing order doesn't change
+            z = self.elements[i].z
+            dynamic:list[element] = []
+            while i<n and self.elements[i].z==z:
+                e = self.elements[i]
+                if flags[i] and (e.static or not dynamic):
+                    # a layer is transparent where nothing is baked yet, which blends translucent pixels onto each other
+                    # and surface alpha onto anything differently from the scene (the bottom layer starts from the background instead)
+                    surf = e.surface
+                    if plan and surf.get_alpha() not in (None, 255):
+                        flush([e])
+                        i += 1
+                        continue
+                    if surf.get_flags() & pg.SRCALPHA or surf.get_alpha()!=None:
+                        r = e.get_rect()
+                        if plan and r.collidelist(blended)!=-1: flush([])
+                        blended.append(r)
+                    baked.append(e)
+                else: dynamic.append(e)
+                i += 1
+            if dynamic: flush(dynamic)
+        flush([])
+        self._plan, self._plan_elems, self._plan_flags = plan, list(self.elements), flags
+        return plan
+    def _view_size(self, zoom:float, w:float, h:float) -> tuple[int,int]:
+        return (max(1, math.ceil(w/zoom)), max(1, math.ceil(h/zoom)))
+    def _cull_index(self):
+        # static elements are culled through a grid per parallax, the others are checked one by one
+        if self.elements==self._cull_elems: return
+        if len(self._zkeys)!=len(self.elements): self._resort()
+        self._cull_grids, self._cull_dynamic = {}, []
+        for e in self.elements:
+            if e.static: self._cull_grids.setdefault(e.parallax, spatial_hash(256)).insert(e)
+            else: self._cull_dynamic.append(e)
+        self._cull_elems = list(self.elements)
+    def _moved(self, elem:element):
+        # called by `mark_dirty()` of static elements
+        grid = self._cull_grids.get(elem.parallax)
+        if grid!=None: grid.update(elem)
+    def _visible(self, ox:float, oy:float, w:int, h:int) -> list[tuple[element,float,float]]:
+        # elements overlapping the view of a camera at `ox`, `oy` in drawing order, with how far to shift each
+        self._cull_index()
+        views:dict[float,pg.Rect] = {}
+        def view(p:float) -> pg.Rect:
+            # a pixel of margin for the rounding of element rects
+            if p not in views: views[p] = pg.Rect(math.floor(ox*p)-1, math.floor(oy*p)-1, w+2, h+2)
+            return views[p]
+        shown = []
+        for p, grid in self._cull_grids.items():
+            v = view(p)
+            shown.extend(e for e in grid.query(v) if v.colliderect(e.get_rect()))
+        for e in self._cull_dynamic:
+            v, r = view(e.parallax), e.get_rect()
+            if v.colliderect(r): shown.append(e)
+            # interpolated elements are drawn somewhere between their last two positions
+            elif e.interpolate and e.prev_pos!=None and v.colliderect(r.move(e.prev_pos[0]-e.x, e.prev_pos[1]-e.y)): shown.append(e)
+        if self._cull_grids: shown.sort(key=lambda e:e._zkey)
+        return [(e, ox*e.parallax, oy*e.parallax) for e in shown]
+    def _camera_view(self, zoom:float, w:float, h:float) -> pg.Surface:
+        # the surface a camera draws onto, a cleared buffer of the size of the view if zoomed
+        if zoom==1: return self.surface
+        size = self._view_size(zoom, w, h)
+        if self._camera_buf==None or self._camera_buf.get_size()!=size: self._camera_buf = pg.Surface(size, pg.SRCALPHA)
+        self._camera_buf.fill((0,0,0,0))
+        return self._camera_buf
+    def _present_view(self, view:pg.Surface, zoom:float):
+        if view is self.surface: return
+        mode = resolve_scale_mode(scfg.SCALE_MODE, zoom)
+        vw, vh = view.get_size()
+        size = (round(vw*zoom), round(vh*zoom)) if mode!='scale2x' else (2*vw, 2*vh)
+        if self._zoom_buf==None or self._zoom_buf.get_size()!=size: self._zoom_buf = pg.Surface(size, 0, view)
+        self.surface.blit(scale_surface(view, size, mode, self._zoom_buf), (0, 0))
+    def _render_camera(self):
+        # everything moves with the camera, so only culling saves work
+        cam = self._camera
+        assert not (self.dirty_rendering or self.static_layers), 'scenes with a camera redraw everything, disable dirty_rendering and static_layers'
+        ox, oy = cam.draw_pos(self.interp_alpha)
         self.surface.fill((0,0,0,0))
         self.surface.blit(self.scaled_init_env, (0, 0))
-        for e in self.elements: e.blit(self.surface)
-        if self.parent_scene==None: screen.blit(pg.transform.smoothscale(self.surface, (self.w*scfg.SCALE_FACTOR, self.h*scfg.SCALE_FACTOR)), (self.x*scfg.SCALE_FACTOR, self.y*scfg.SCALE_FACTOR))
-        else: screen.blit(self.surface, (self.x, self.y))
+        view = self._camera_view(cam.zoom, self.w, self.h)
+        timed = self.profiler!=None and self.profiler.per_element
+        for e, dx, dy in self._visible(ox, oy, *view.get_size()):
+            if timed: self.profiler.time_element(e, 'blit', e.blit_at, view, (dx, dy))
+            else: e.blit_at(view, (dx, dy))
+        self._present_view(view, cam.zoom)
+    def _drawn_rect(self, e:element) -> pg.Rect:
+        # interpolated elements are drawn somewhere between their last two positions, a pixel of margin covers the rounding
+        r = e.get_rect()
+        if not e.interpolate or e.prev_pos==None: return r
+        ix, iy = e.interpolated_pos()
+        return r.move(round(ix-e.x), round(iy-e.y)).inflate(2, 2)
+    def _draw_element(self, e:element, rendered:bool=True):
+        # child scenes were already rendered if `rendered` and only need presenting, otherwise they are rendered too
+        if rendered and isinstance(e, scene): fn, args = e.present, (self.surface, None)
+        else: fn, args = e.blit, (self.surface,)
+        if self.profiler!=None and self.profiler.per_element: self.profiler.time_element(e, 'blit', fn, *args)
+        else: fn(*args)
+    def _paint(self, plan:list[element|static_layer], area:pg.Rect=None, rendered:bool=True):
+        # draws the background and `plan` onto `surface`, only what's inside `area` if it isn't `None`
+        bg, start = self.scaled_init_env, 0
+        if plan and isinstance(plan[0], static_layer) and plan[0].base: bg, start = plan[0].surface, 1
+        if area==None:
+            self.surface.fill((0,0,0,0))
+            self.surface.blit(bg, (0, 0))
+        else:
+            self.surface.set_clip(area)
+            self.surface.fill((0,0,0,0), area)
+            self.surface.blit(bg, area, area)
+        if plan is self.elements and area==None and not rendered and (self.profiler==None or not self.profiler.per_element):
+            for e in plan: e.blit(self.surface)
+            return
+        for i in range(start, len(plan)):
+            e = plan[i]
+            if isinstance(e, static_layer):
+                if area==None or e.rect.colliderect(area): e.blit(self.surface, area)
+            elif area==None or self._drawn[id(e)][1].colliderect(area): self._draw_element(e, rendered)
+        if area!=None: self.surface.set_clip(None)
+    def render(self) -> list[pg.Rect]|None:
+        if self._camera!=None:
+            self._render_camera()
+            return None
+        plan = self._static_plan() if self.static_layers else self.elements
+        if not self.dirty_rendering or self._full_redraw:
+            self._invalid.clear()
+            self._paint(plan, rendered=False)
+            if self.dirty_rendering:
+                self._drawn = {id(e):(e, self._drawn_rect(e), e.surface) for e in self.elements}
+                for e in self.elements:
+                    if e.dirty: e.dirty = False
+                self._full_redraw = False
+            return None
+
+        dirty:list[pg.Rect] = []
+        drawn = {}
+        for e in self.elements:
+            r = self._drawn_rect(e)
+            # child scenes are rendered here and only presented when repainting
+            if isinstance(e, scene): sub = e.render()
+            prev = self._drawn.pop(id(e), None)
+            if prev==None: dirty.append(r)
+            elif e.dirty or prev[1]!=r or prev[2] is not e.surface:
+                dirty.append(prev[1])
+                dirty.append(r)
+            elif isinstance(e, scene):
+                if sub==None: dirty.append(r)
+                else: dirty.extend(sr.move(r.x, r.y) for sr in sub)
+            if e.dirty: e.dirty = False
+            drawn[id(e)] = (e, r, e.surface)
+        # whatever is left was removed from the scene since the last frame
+        for _, r, _ in self._drawn.values(): dirty.append(r)
+        self._drawn = drawn
+        if self._invalid:
+            dirty.extend(self._invalid)
+            self._invalid.clear()
+
+        bounds = self.surface.get_rect()
+        dirty = [r.clip(bounds) for r in dirty]
+        if len(dirty) > 64 or sum(r.w*r.h for r in dirty) > bounds.w*bounds.h//2:
+            # too much changed for partial redraws to pay off
+            self._paint(plan)
+            return None
+        rects = merge_rects(dirty)
+        for r in rects: self._paint(plan, r)
+        return rects
+    def present(self, screen:pg.Surface, rects:list[pg.Rect]|None):
+        if self.parent_scene!=None:
+            screen.blit(self.surface, (self.x, self.y))
+            return
+        if rects==None:
+            self.screen_dirty = None
+            self._present_full(screen, self.surface, self.x, self.y, self.w, self.h)
+            return
+        sf = scfg.SCALE_FACTOR
+        mode = resolve_scale_mode(scfg.SCALE_MODE, sf)
+        self.screen_dirty = []
+        bounds = self.surface.get_rect()
+        for r in rects:
+            if mode=='none':
+                screen.blit(self.surface, (self.x+r.x, self.y+r.y), r)
+                self.screen_dirty.append(pg.Rect(self.x+r.x, self.y+r.y, r.w, r.h))
+                continue
+            # one pixel of margin so the smoothing at the edges matches the neighbouring pixels
+            src = r.inflate(2, 2).clip(bounds)
+            x0, y0 = math.floor((self.x+src.x)*sf), math.floor((self.y+src.y)*sf)
+            x1, y1 = math.ceil((self.x+src.right)*sf), math.ceil((self.y+src.bottom)*sf)
+            screen.blit(scale_surface(self.surface.subsurface(src), (x1-x0, y1-y0), mode), (x0, y0))
+            self.screen_dirty.append(pg.Rect(x0, y0, x1-x0, y1-y0))
+    def _present_full(self, screen:pg.Surface, surf:pg.Surface, x:float, y:float, w:float, h:float):
+        sf = scfg.SCALE_FACTOR
+        mode = resolve_scale_mode(scfg.SCALE_MODE, sf)
+        if mode=='none':
+            screen.blit(surf, (x, y))
+            return
+        size = (int(w*sf), int(h*sf)) if mode!='scale2x' else (2*surf.get_width(), 2*surf.get_height())
+        if self._present_buf==None or self._present_buf.get_size()!=size:
+            self._present_buf = pg.Surface(size, 0, surf)
+        screen.blit(scale_surface(surf, size, mode, self._present_buf), (x*sf, y*sf))
+    def blit(self, screen:pg.Surface):
+        self.present(screen, self.render())
+    def blit_at(self, screen:pg.Surface, offset:tuple[float,float]):
+        self.render()
+        screen.blit(self.surface, (self.x-offset[0], self.y-offset[1]))
     def step(self, dt:float):
         super().step(dt)
-        for e in self.elements: e.step(dt)
+        if self._elements.version!=self._synced: self._check_edits()
+        self._iterating += 1
+        try: self._step_elements(dt)
+        finally: self._iterating -= 1
+        if not self._iterating and self._pending: self._apply_pending()
+    def _step_elements(self, dt:float):
+        for e in self._interpolated: e.prev_pos = (e.x, e.y)
+        if self.physics:
+            if self.batch!=None: self.batch.step(dt, self.pushers+self.tilemaps if self.tilemaps else self.pushers)
+            # pushers may have been moved outside of step (resizes, game code), and may move during it
+            for p in self.pushers: self.broadphase.update(p)
+        if self.profiler!=None and self.profiler.per_element:
+            for e in self.elements:
+                self.profiler.time_element(e, 'step', e.step, dt)
+                if self.physics: self.broadphase.update(e)
+        elif not self.physics:
+            for e in self.elements: e.step(dt)
+        else:
+            for e in self.elements:
+                e.step(dt)
+                self.broadphase.update(e)
+        if self._camera!=None: self._camera.update(dt)
+
+class element_pool(object):
+    '''
+    reuses elements of one kind (projectiles, effects, popup text) instead of constructing a new one every time,
+    which skips the setup in `__init__` and leaves no garbage for the cyclic collector (elements and their scene reference each other)
+
+    ### Attributes:
+        `factory`: function with no arguments that makes a new element when none is free
+
+        `free`: elements waiting to be handed out
+
+        `max_size`: most free elements kept, elements released beyond it are dropped, `None` for no limit
+
+        `created`, `reused`: how many elements were made by `factory` and how many acquires were served from `free`
+
+    ### Methods:
+        `acquire(parent=None, **attrs)`: returns a free element (or a new one) after calling its `on_acquire(**attrs)`, and adds it to scene `parent` if given
+
+        `release(elem)`: calls `elem.on_release()` and removes it from its scene, it becomes free once the scene has let go of it
+        (after the current step if the scene is iterating), releasing an element twice does nothing
+    '''
+    def __init__(self, factory, size:int=0, max_size:int=None) -> None:
+        self.factory = factory
+        self.max_size = max_size
+        self.free:list[element] = []
+        self.created = 0
+        self.reused = 0
+        for _ in range(size): self._returned(self._make(), True)
+    def _make(self):
+        e = self.factory()
+        e._pool = self
+        self.created += 1
+        return e
+    def acquire(self, parent:'scene'=None, **attrs) -> element:
+        if self.free:
+            e = self.free.pop()
+            self.reused += 1
+        else: e = self._make()
+        e._pooled = False
+        e.on_acquire(**attrs)
+        if parent!=None: parent.add_element(e)
+        return e
+    def release(self, elem:element):
+        if elem._pool is not self or elem._pooled or elem._releasing: return
+        elem._releasing = True
+        elem.on_release()
+        # an element acquired during its scene's step is only added after it, the removal is queued behind the add
+        owner = elem._parent_scene if elem._parent_scene!=None else elem._adding
+        if owner!=None: owner.remove_element(elem)
+        else: self._returned(elem)
+    def _returned(self, elem:element, force:bool=False):
+        # called by `scene._unregister()` once a released element is out of its scene
+        if not (elem._releasing or force): return
+        elem._releasing = False
+        if self.max_size!=None and len(self.free)>=self.max_size:
+            elem._pool = None
+            return
+        elem._pooled = True
+        self.free.append(elem)
+
+class frame_profiler(object):
+    '''
+    records how long the phases of recent frames took, created with `gametemplate.enable_profiler()`
+
+    ### Attributes:
+        `frames`: the last frames recorded, each a dict with the `start` and `end` time, `spans` (list of (phase, start, duration)),
+        `scenes` (list of ('name.phase', start, duration) of every active scene, named after the `game` attribute holding it)
+        and `elements` (dict of 'class.step' or 'class.blit' to total duration, times include child elements)
+
+        `per_element`: whether scenes time every element's `step()` and `blit()` by class
+
+        `overlay`: whether the frame time graph and slowest element classes are drawn over the screen
+
+    ### Methods:
+        `timed(phase, fn)`: returns `fn` wrapped to record a span of `phase` every call
+
+        `add_span(phase, start, dur)`: records a span of `phase` in the current frame
+
+        `time_element(elem, phase, fn, *args)`: calls `fn(*args)` and adds its duration to `elem`'s class
+
+        `time_scene(name, phase, fn, *args)`: calls `fn(*args)` and records it in `scenes`
+
+        `scene_times(frame)`: returns milliseconds spent per 'name.phase' of the active scenes in `frame`
+
+        `end_frame()`: finishes the current frame
+
+        `phase_times(frame)`: returns milliseconds spent in input, step, blit and flip and in total in `frame`
+
+        `slowest(n)`: returns the `n` slowest element classes and their average milliseconds per frame
+
+        `draw_overlay(screen)`: draws the frame time graph and the slowest element classes into `overlay_rect` of `screen`
+
+        `dump_trace(path)`: writes the recorded frames as Chrome Trace Event json (open in chrome://tracing or Perfetto)
+    '''
+    overlay_rect = pg.Rect(0, 0, 200, 108)
+    def __init__(self, history:int=300, per_element:bool=False, overlay:bool=False) -> None:
+        self.frames:deque[dict] = deque(maxlen=history)
+        self.per_element = per_element
+        self.overlay = overlay
+        self._cur = {'start':None, 'spans':[], 'scenes':[], 'elements':{}}
+    def add_span(self, phase:str, start:float, dur:float):
+        if self._cur['start']==None: self._cur['start'] = start
+        self._cur['spans'].append((phase, start, dur))
+    def timed(self, phase:str, fn):
+        def wrapper(*args):
+            t = time.perf_counter()
+            r = fn(*args)
+            self.add_span(phase, t, time.perf_counter()-t)
+            return r
+        return wrapper
+    def time_element(self, elem:element, phase:str, fn, *args):
+        t = time.perf_counter()
+        fn(*args)
+        d = time.perf_counter()-t
+        key = f'{type(elem).__name__}.{phase}'
+        self._cur['elements'][key] = self._cur['elements'].get(key, 0.) + d
+    def time_scene(self, name:str, phase:str, fn, *args):
+        t = time.perf_counter()
+        fn(*args)
+        self._cur['scenes'].append((f'{name}.{phase}', t, time.perf_counter()-t))
+    def scene_times(self, frame:dict) -> dict[str,float]:
+        t:dict[str,float] = {}
+        for key, _, dur in frame['scenes']: t[key] = t.get(key, 0.) + dur*1000
+        return t
+    def end_frame(self):
+        self._cur['end'] = time.perf_counter()
+        if self._cur['start']==None: self._cur['start'] = self._cur['end']
+        self.frames.append(self._cur)
+        self._cur = {'start':None, 'spans':[], 'scenes':[], 'elements':{}}
+    def phase_times(self, frame:dict) -> dict[str,float]:
+        t = {'input':0., 'step':0., 'blit':0., 'flip':0.}
+        for phase, _, dur in frame['spans']:
+            if phase=='update_screen': t['blit'] += dur*1000
+            else: t[phase] = t.get(phase, 0.) + dur*1000
+        t['blit'] -= t['flip']
+        t['total'] = (frame['end']-frame['start'])*1000
+        return t
+    def slowest(self, n:int=5) -> list[tuple[str,float]]:
+        totals:dict[str,float] = {}
+        for f in self.frames:
+            for key, d in f['elements'].items(): totals[key] = totals.get(key, 0.) + d
+        avg = [(key, d*1000/max(1, len(self.frames))) for key, d in totals.items()]
+        return sorted(avg, key=lambda x:x[1], reverse=True)[:n]
+    def draw_overlay(self, screen:pg.Surface):
+        w, h, ms_h = self.overlay_rect.w, 48, 2 # 2 pixels per millisecond, the line is at one 60 fps frame
+        panel = pg.Surface(self.overlay_rect.size, pg.SRCALPHA)
+        panel.fill((0, 0, 0, 160))
+        frames = list(self.frames)[-w//2:]
+        for i, f in enumerate(frames):
+            t = self.phase_times(f)['total']
+            bar = min(h, int(t*ms_h))
+            panel.fill((220, 60, 60) if t > 1000/60 else (60, 220, 60), (i*2, h-bar, 2, bar))
+        panel.fill((255, 255, 255), (0, h-int(1000/60*ms_h), w, 1))
+        font = get_font('Arial', 12)
+        lines = [f'{self.phase_times(frames[-1])["total"]:.1f} ms' if frames else '']
+        lines += [f'{key} {ms:.2f} ms' for key, ms in self.slowest(3)]
+        for i, l in enumerate(lines): panel.blit(render_line(font, l, (255, 255, 255)), (2, h+2+i*14))
+        screen.blit(panel, self.overlay_rect)
+    def dump_trace(self, path:str):
+        events = []
+        for f in self.frames:
+            events.append({'name':'frame', 'ph':'X', 'pid':0, 'tid':0, 'ts':f['start']*1e6, 'dur':(f['end']-f['start'])*1e6,
+                           'args':{key:d*1000 for key, d in f['elements'].items()}})
+            for phase, start, dur in f['spans']:
+                events.append({'name':phase, 'ph':'X', 'pid':0, 'tid':0, 'ts':start*1e6, 'dur':dur*1e6})
+            for key, start, dur in f['scenes']:
+                events.append({'name':key, 'ph':'X', 'pid':0, 'tid':1, 'ts':start*1e6, 'dur':dur*1e6})
+        with open(path, 'w') as fl:
+            json.dump({'traceEvents':events, 'displayTimeUnit':'ms'}, fl)
 
 class gametemplate(object):
     '''
@@ -310,25 +2186,104 @@ class gametemplate(object):
     ### Attributes:
         `curscenes`: list of scenes currently active
 
+        `interp_alpha`: set by the main loop when `FIXED_TIMESTEP` is enabled, passed on to active scenes before blitting
+
+        `profiler`: the `frame_profiler` while profiling is enabled, `None` otherwise
+
     ### Methods:
         `process_input(inpt)`: calls `process_input()` on all active scenes
 
         `step(dt)`: calls `step(dt)` on all active scenes
 
-        `update_screen(screen)`: blits all active scenes to `screen` and updates display
+        `update_screen(screen, snapshot)`: blits all active scenes to `screen` and updates display (only the changed rects if the active scene uses dirty rendering),
+        or draws `snapshot` (from `snapshot()`) instead of the scenes if given, always in full
+
+        `snapshot()`: returns `scene_snapshot`s of the active scenes, used by the main loop when `PIPELINED` is enabled
 
         `cleanup()`: called when game is closed (empty by default)
+
+        `enable_profiler(history, per_element, overlay)`: starts recording the last `history` frames in a `frame_profiler`,
+        optionally timing every element by class and drawing an overlay (nothing is timed while disabled)
+
+        `disable_profiler()`: stops recording, returns the profiler
     '''
     def __init__(self, screen_ref:pg.Surface) -> None:
         self.curscenes:list[scene] = []
         self.screen_ref = screen_ref
+        self.interp_alpha = 1.
+        self.profiler:frame_profiler = None
+        self._last_curscenes:list[scene] = []
+    def enable_profiler(self, history:int=300, per_element:bool=False, overlay:bool=False):
+        if self.profiler!=None: self.disable_profiler()
+        self.profiler = frame_profiler(history, per_element, overlay)
+        scene.profiler = self.profiler
+        self._scene_names:dict[int,str] = {}
+        # the wrappers shadow the methods on this instance only, so subclass overrides are timed too
+        cls = type(self)
+        self.process_input = self.profiler.timed('input', cls.process_input.__get__(self))
+        self.step = self.profiler.timed('step', cls.step.__get__(self))
+        timed_update = self.profiler.timed('update_screen', cls.update_screen.__get__(self))
+        def update_screen(screen:pg.Surface, snapshot:list[scene_snapshot]=None):
+            timed_update(screen, snapshot)
+            self.profiler.end_frame()
+        self.update_screen = update_screen
+        return self.profiler
+    def disable_profiler(self):
+        prof = self.profiler
+        for nm in ('process_input', 'step', 'update_screen'): self.__dict__.pop(nm, None)
+        self.profiler = None
+        scene.profiler = None
+        return prof
+    def _scene_name(self, s:scene) -> str:
+        # scenes are named after the attribute of the game holding them
+        name = self._scene_names.get(id(s))
+        if name==None:
+            name = next((k for k, v in vars(self).items() if v is s), type(s).__name__)
+            self._scene_names[id(s)] = name
+        return name
     def process_input(self, inpt:pg.event.Event):
-        for s in self.curscenes: s.process_input(inpt)
+        if self.profiler==None:
+            for s in self.curscenes: s.process_input(inpt)
+        else:
+            for s in self.curscenes: self.profiler.time_scene(self._scene_name(s), 'input', s.process_input, inpt)
     def step(self, dt:float):
-        for s in self.curscenes: s.step(dt)
-    def update_screen(self, screen:pg.Surface):
-        for s in self.curscenes: s.blit(screen)
-        pg.display.flip()
+        if self.profiler==None:
+            for s in self.curscenes: s.step(dt)
+        else:
+            for s in self.curscenes: self.profiler.time_scene(self._scene_name(s), 'step', s.step, dt)
+    def snapshot(self) -> list[scene_snapshot]:
+        for s in self.curscenes: s.interp_alpha = self.interp_alpha
+        return [s.snapshot() for s in self.curscenes]
+    def update_screen(self, screen:pg.Surface, snapshot:list[scene_snapshot]=None):
+        rects:list[pg.Rect] = []
+        if snapshot!=None:
+            for snap in snapshot: snap.present(screen)
+            # the scenes themselves weren't drawn, so they have to redraw everything once they are again
+            self._last_curscenes = []
+            rects = None
+        else:
+            # partial updates are only safe when a single scene owns the screen and it was also the one drawn last frame
+            if len(self.curscenes)>1 or self.curscenes!=self._last_curscenes:
+                for s in self.curscenes: s.invalidate()
+                self._last_curscenes = list(self.curscenes)
+            overlay = self.profiler!=None and self.profiler.overlay
+            for s in self.curscenes:
+                s.interp_alpha = self.interp_alpha
+                if overlay and s.dirty_rendering:
+                    # the overlay is translucent, so what's below it has to be redrawn every frame
+                    r, sf = self.profiler.overlay_rect, scfg.SCALE_FACTOR
+                    s.invalidate(area=pg.Rect(math.floor(r.x/sf-s.x), math.floor(r.y/sf-s.y), math.ceil(r.w/sf)+2, math.ceil(r.h/sf)+2))
+                if self.profiler==None: s.blit(screen)
+                else: self.profiler.time_scene(self._scene_name(s), 'blit', s.blit, screen)
+                if rects!=None: rects = None if s.screen_dirty==None else rects+s.screen_dirty
+        if self.profiler!=None:
+            if self.profiler.overlay:
+                self.profiler.draw_overlay(screen)
+                if rects!=None: rects.append(self.profiler.overlay_rect)
+            t = time.perf_counter()
+        if rects==None: pg.display.flip()
+        elif rects: pg.display.update(rects)
+        if self.profiler!=None: self.profiler.add_span('flip', t, time.perf_counter()-t)
     def cleanup(self):
         pass
 
@@ -370,22 +2325,25 @@ class text(element):
         super().__init__(z, pg.Surface((0, 0)), pos, anchor, pressed_behavior)
         assert align in {'left', 'center', 'right'}, "incorrect text alignment"
         self.alignment = align
-        if isinstance(font, str):
-            try:
-                fontdir = os.path.join(os.path.dirname(__file__), 'fonts')
-                self.font = pg.font.Font(os.path.join(fontdir, font+'.ttf'), size)
-            except FileNotFoundError:
-                self.font = pg.font.SysFont(font, size)
-        else:
-            self.font = font
+        if isinstance(font, str): self.font = get_font(font, size)
+        else: self.font = font
         self.color = color
+        self._render_key = None
         self.updatetext(text)
+    def on_acquire(self, **attrs):
+        txt = attrs.pop('text', self.text)
+        super().on_acquire(**attrs)
+        self.updatetext(txt)
     def updatetext(self, text:str):
         self.text = text
+        # text set every frame (scores, timers) usually hasn't changed
+        render_key = (text, self.font, self.color if isinstance(self.color, str) else tuple(self.color), self.alignment)
+        if render_key==self._render_key: return
+        self._render_key = render_key
         m = 0.
         lns = []
         for l in text.split('\n'):
-            r = self.font.render(l, True, self.color)
+            r = render_line(self.font, l, self.color)
             if m<r.get_width(): m=r.get_width()
             lns.append(r)
         self.surface = pg.Surface((m, self.font.get_linesize()*len(lns)), pg.SRCALPHA)
@@ -400,6 +2358,10 @@ class text(element):
     def blit(self, screen:pg.Surface):
         newx = {'left': 0, 'center': self.surface.get_width()/2, 'right': self.surface.get_width()}
         screen.blit(self.surface, (self.x-newx[self.alignment], self.y))
+    def snapshot(self):
+        if type(self).blit is not text.blit: return self
+        newx = {'left': 0, 'center': self.surface.get_width()/2, 'right': self.surface.get_width()}
+        return (self.surface, (self.x-newx[self.alignment], self.y))
 
 class forced_multiline_text(text):
     '''
@@ -441,21 +2403,27 @@ class forced_multiline_text(text):
         self.max_width = max_width
         super().__init__(z, text, align, pos, font, color, size, anchor, pressed_behavior)
     def updatetext(self, text: str):
+        # every word is measured once and line widths are added up, then each finished line is measured once
+        # and gives its last words back to the next line if kerning made it too wide
+        # words wider than `max_width` get a line of their own
+        space_w = self.font.size(' ')[0]
+        word_w:dict[str,int] = {}
         ls = []
         for l in text.split('\n'):
-            ls.append(l)
-            while self.font.size(ls[-1])[0]>self.max_width:
-                t_l = ls[-1]
-                ls[-1] = ''
-                ws = t_l.split(' ')
-                for i in range(len(ws)):
-                    if self.font.size(ls[-1]+ws[i])[0]<=self.max_width:
-                        ls[-1] += ws[i]+' '
-                    else:
-                        ls[-1] = ls[-1].rstrip()
-                        ls.append(' '.join(ws[i:]))
-                        break
-        newtext = ''
-        for l in ls:
-            newtext += l+'\n'
-        super().updatetext(newtext.strip())
+            ws = l.split(' ')
+            line:list[str] = []
+            line_w = 0
+            i = 0
+            while i < len(ws):
+                if ws[i] not in word_w: word_w[ws[i]] = self.font.size(ws[i])[0]
+                if not line or line_w+space_w+word_w[ws[i]] <= self.max_width:
+                    line_w += word_w[ws[i]] + (space_w if line else 0)
+                    line.append(ws[i])
+                    i += 1
+                    if i < len(ws): continue
+                while len(line)>1 and self.font.size(' '.join(line))[0] > self.max_width:
+                    line.pop()
+                    i -= 1
+                ls.append(' '.join(line))
+                line, line_w = [], 0
+        super().updatetext('\n'.join(ls).strip())
@@ -1,4 +1,12 @@
 from src.assets import *
+import zlib
+import lzma
+import struct
+import gc
+import random
+import marshal
+import hashlib
+import threading
 
 
 def xy_to_theta(x:float, y:float) -> float:
@@ -35,13 +43,32 @@ class vector(object):
     '''
     2d vector, supports operations
 
+    operators return new vectors, the in-place methods `set()`, `add_scaled()`, `scale()`, `normalize()` and `rotate()`
+    change the vector without allocating and return it so they can be chained
+
     ### Attributes:
         `x`, `y`: x and y components
 
         `theta`: direction in radians
 
         `magnitude`: magnitude of vector
+
+    ### Methods:
+        `set(x, y)`: sets both components
+
+        `add_scaled(other, s, other2, s2)`: adds `other*s` (plus `other2*s2` if given) in place
+
+        `scale(s)`: multiplies in place
+
+        `length_squared()`: returns the squared magnitude
+
+        `normalize()`: scales to magnitude 1 in place (zero vectors stay zero)
+
+        `rotate(theta)`: rotates by `theta` radians in place
+
+        `dot(other)`: returns the dot product
     '''
+    __slots__ = ('x', 'y')
     def __init__(self, arg1:float|tuple[float,float], arg2:float=1., polar:bool=False) -> None:
         if isinstance(arg1, tuple):
             if len(arg1)!=2: raise ValueError('tuple must have length 2')
@@ -55,16 +82,43 @@ class vector(object):
         return xy_to_theta(self.x, self.y)
     @property
     def magnitude(self):
-        return dist((0,0), (self.x, self.y))
+        return math.hypot(self.x, self.y)
     @theta.setter
     def theta(self, theta:float):
         self.x, self.y = theta_to_xy(theta, self.magnitude)
     @magnitude.setter
     def magnitude(self, mag:float):
-        self.x, self.y = theta_to_xy(self.theta, mag)
+        m = math.hypot(self.x, self.y)
+        if m==0: self.x, self.y = mag, 0.
+        else: self.scale(mag/m)
     @property
     def tuple(self):
         return (self.x, self.y)
+
+    def set(self, x:float, y:float):
+        self.x = x
+        self.y = y
+        return self
+    def add_scaled(self, other:'vector', s:float, other2:'vector'=None, s2:float=0.):
+        if other2==None:
+            self.x += other.x*s
+            self.y += other.y*s
+        else:
+            self.x += other.x*s + other2.x*s2
+            self.y += other.y*s + other2.y*s2
+        return self
+    def scale(self, s:float):
+        self.x *= s
+        self.y *= s
+        return self
+    def length_squared(self):
+        return self.x*self.x + self.y*self.y
+    def normalize(self):
+        m = math.hypot(self.x, self.y)
+        if m!=0: self.scale(1/m)
+        return self
+    def dot(self, other:'vector'):
+        return self.x*other.x + self.y*other.y
     
     def __add__(self, other:'vector'):
         return vector(self.x+other.x, self.y+other.y)
@@ -98,7 +152,54 @@ class vector(object):
     def __copy__(self):
         return vector(self.x, self.y)
     def rotate(self, theta:float):
-        self.x, self.y = theta_to_xy(self.theta+theta, self.magnitude)
+        c, s = math.cos(theta), math.sin(theta)
+        self.x, self.y = self.x*c - self.y*s, self.x*s + self.y*c
+        return self
+
+def merge_rects(rects:list[pg.Rect], max_rects:int=16) -> list[pg.Rect]:
+    '''
+    returns a list of rects covering `rects` where overlapping rects are merged into their union,
+    empty rects are dropped and the result is unioned further until there are at most `max_rects` rects
+    '''
+    merged:list[pg.Rect] = []
+    for r in rects:
+        if r.w<=0 or r.h<=0: continue
+        r = pg.Rect(r)
+        i = 0
+        while i < len(merged):
+            if r.colliderect(merged[i]):
+                r.union_ip(merged.pop(i))
+                i = 0
+            else: i += 1
+        merged.append(r)
+    while len(merged) > max_rects:
+        r = merged.pop()
+        merged[-1].union_ip(r)
+    return merged
+
+SCALE_MODES = ['auto', 'smooth', 'nearest', 'scale2x']
+
+def resolve_scale_mode(mode:str, scaling:float) -> str:
+    '''
+    returns the scaling function to actually use for `mode` at `scaling`: 'none', 'smooth', 'nearest' or 'scale2x'
+    '''
+    if scaling==1: return 'none'
+    if mode=='auto': return 'nearest' if scaling==int(scaling) else 'smooth'
+    if mode=='scale2x' and scaling!=2: return 'nearest' if scaling==int(scaling) else 'smooth'
+    return mode
+
+def scale_surface(surf:pg.Surface, size:tuple[int,int], mode:str, dest:pg.Surface=None) -> pg.Surface:
+    '''
+    scales `surf` to `size` with a mode returned by `resolve_scale_mode()`
+
+    if `dest` is given it must have size `size` and the format of `surf`, and is drawn into instead of allocating a new surface
+    '''
+    if mode=='none': return surf
+    if mode=='scale2x':
+        return pg.transform.scale2x(surf) if dest==None else pg.transform.scale2x(surf, dest)
+    if mode=='nearest':
+        return pg.transform.scale(surf, size) if dest==None else pg.transform.scale(surf, size, dest)
+    return pg.transform.smoothscale(surf, size) if dest==None else pg.transform.smoothscale(surf, size, dest)
 
 
 def post_event(msg:str, data:dict={}):
@@ -111,6 +212,13 @@ def post_event(msg:str, data:dict={}):
     payload.update(data)
     pg.event.post(pg.event.Event(pg.USEREVENT, payload))
 
+def event_key(inpt:pg.event.Event):
+    '''
+    returns the key events are routed by: `msg` for events posted with `post_event()`, the event type otherwise
+    '''
+    if inpt.type==pg.USEREVENT: return getattr(inpt, 'msg', pg.USEREVENT)
+    return inpt.type
+
 def quitgame():
     '''
     Call this function to quit the game.
@@ -124,21 +232,60 @@ def set_scaling(scaling:float):
     scfg.SCALE_FACTOR = scaling
     post_event('window_resize')
 
+def set_scale_mode(mode:str):
+    '''
+    Call this function to change how the game is scaled to the window, one of `SCALE_MODES`.
+    '''
+    assert mode in SCALE_MODES
+    scfg.SCALE_MODE = mode
+    post_event('window_resize')
+
+_main_calls:deque = deque()
+
+def run_on_main(fn, *args):
+    '''
+    calls `fn(*args)` right away on the main thread, or queues it for the main loop to call between frames when called from another thread
+    (the simulation thread when `PIPELINED` is enabled), for anything touching the window or display
+    '''
+    if threading.current_thread() is threading.main_thread(): fn(*args)
+    else: _main_calls.append((fn, args))
+
+def run_main_calls():
+    '''
+    calls everything queued by `run_on_main()`, called by the main loop every frame
+    '''
+    while _main_calls:
+        fn, args = _main_calls.popleft()
+        fn(*args)
+
 def toggle_fullscreen():
     '''
     Call this function to toggle fullscreen. According to pygame, this may not work sometimes.
     '''
-    pg.display.toggle_fullscreen()
+    run_on_main(pg.display.toggle_fullscreen)
 
 
-def write_savefile(filename:str, content:str):
+def atomic_write(path:str, data:str|bytes):
+    '''
+    writes `data` to a temporary file next to `path` and then renames it to `path`,
+    so that a crash or power loss leaves either the old or the new file but never a partly written one
+    '''
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w' if isinstance(data, str) else 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def savefile_path(filename:str):
     assert GAME_DIR != '', 'game directory not specified'
-    with open(os.path.expanduser(f'~/Documents/{GAME_DIR}/saves/{filename}'), 'w') as f:
-        f.write(content)
+    return os.path.expanduser(f'~/Documents/{GAME_DIR}/saves/{filename}')
+
+def write_savefile(filename:str, content:str):
+    atomic_write(savefile_path(filename), content)
 
 def read_savefile(filename:str):
-    assert GAME_DIR != '', 'game directory not specified'
-    with open(os.path.expanduser(f'~/Documents/{GAME_DIR}/saves/{filename}')) as f:
+    with open(savefile_path(filename)) as f:
         return f.read()
     
 def list_savefiles():
@@ -146,17 +293,340 @@ def list_savefiles():
     for fn in os.listdir(os.path.expanduser(f'~/Documents/{GAME_DIR}/saves')):
         yield fn
 
+SAVE_CODECS = {'none':0, 'zlib':1, 'lzma':2}
+_SAVE_MAGIC = b'PGFS'
+_SAVE_VERSION = 1
+_SAVE_HEADER = struct.Struct('<4sHH') # magic, version, number of sections
+_SAVE_ENTRY = struct.Struct('<HBQQQI') # name length, codec, offset, stored length, pickled length, crc32 of the pickle, followed by the name
+
+def _compress(raw:bytes, codec:int):
+    if codec==1: return zlib.compress(raw, 6)
+    if codec==2: return lzma.compress(raw)
+    return raw
+
+def _decompress(blob:bytes, codec:int):
+    if codec==1: return zlib.decompress(blob)
+    if codec==2: return lzma.decompress(blob)
+    return blob
+
+class save_snapshot(object):
+    '''
+    save file written by `write_snapshot()`, opened without loading it: only the section table is read,
+    and each section is read, decompressed and unpickled the first time it's accessed
+
+    ### Attributes:
+        `path`: path of the file
+
+        `names`: names of the sections in the file
+
+    ### Methods:
+        `snapshot[name]`: returns the unpickled section `name`
+
+        `get(name, default)`: returns section `name` or `default` if the file doesn't have it
+
+        `raw(name)`: returns the section as stored, (codec, compressed bytes, pickled length, crc32)
+    '''
+    def __init__(self, path:str) -> None:
+        self.path = path
+        self._entries:dict[str,tuple[int,int,int,int,int]] = {}
+        self._values:dict[str,object] = {}
+        with open(path, 'rb') as f:
+            try:
+                magic, version, count = _SAVE_HEADER.unpack(f.read(_SAVE_HEADER.size))
+                if magic!=_SAVE_MAGIC: raise ValueError(f'{path} is not a save snapshot')
+                if version>_SAVE_VERSION: raise ValueError(f'{path} was saved by a newer version (format {version})')
+                for _ in range(count):
+                    namelen, codec, offset, length, rawlen, crc = _SAVE_ENTRY.unpack(f.read(_SAVE_ENTRY.size))
+                    self._entries[f.read(namelen).decode()] = (codec, offset, length, rawlen, crc)
+            except (struct.error, UnicodeDecodeError): raise ValueError(f'{path} is truncated') from None
+    @property
+    def names(self):
+        return list(self._entries)
+    def __contains__(self, name:str):
+        return name in self._entries
+    def raw(self, name:str) -> tuple[int,bytes,int,int]:
+        codec, offset, length, rawlen, crc = self._entries[name]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return codec, f.read(length), rawlen, crc
+    def __getitem__(self, name:str):
+        if name not in self._values:
+            codec, blob, rawlen, crc = self.raw(name)
+            if len(blob)!=self._entries[name][2]: raise ValueError(f'section {name} of {self.path} is truncated')
+            try: raw = _decompress(blob, codec)
+            except (zlib.error, lzma.LZMAError): raise ValueError(f'section {name} of {self.path} is corrupted') from None
+            if len(raw)!=rawlen or zlib.crc32(raw)!=crc: raise ValueError(f'section {name} of {self.path} is corrupted')
+            self._values[name] = pickle.loads(raw)
+        return self._values[name]
+    def get(self, name:str, default=None):
+        return self[name] if name in self._entries else default
+
+# path -> section name -> (digest of the pickle, codec, compressed bytes, pickled length, crc32) of the last snapshot written there
+_snapshots:dict[str,dict[str,tuple[bytes,int,bytes,int,int]]] = {}
+_save_pool:ThreadPoolExecutor = None
+
+def _write_snapshot(path:str, raws:dict[str,bytes], codec:int, partial:bool, filename:str):
+    # runs on the save thread, one snapshot at a time
+    try:
+        prev = _snapshots.get(path)
+        if prev==None and partial and os.path.exists(path):
+            old = save_snapshot(path)
+            prev = {nm:(None,)+old.raw(nm) for nm in old.names}
+        entries = dict(prev) if partial and prev!=None else {}
+        for nm, raw in raws.items():
+            digest = hashlib.blake2b(raw, digest_size=16).digest()
+            old = prev.get(nm) if prev!=None else None
+            # unchanged sections keep the bytes compressed last time
+            if old!=None and old[0]==digest and old[1]==codec: entries[nm] = old
+            else: entries[nm] = (digest, codec, _compress(raw, codec), len(raw), zlib.crc32(raw))
+        names = {nm:nm.encode() for nm in entries}
+        offset = _SAVE_HEADER.size + sum(_SAVE_ENTRY.size+len(n) for n in names.values())
+        parts = [_SAVE_HEADER.pack(_SAVE_MAGIC, _SAVE_VERSION, len(entries))]
+        for nm, (_, cd, blob, rawlen, crc) in entries.items():
+            parts.append(_SAVE_ENTRY.pack(len(names[nm]), cd, offset, len(blob), rawlen, crc))
+            parts.append(names[nm])
+            offset += len(blob)
+        parts.extend(e[2] for e in entries.values())
+        atomic_write(path, b''.join(parts))
+        _snapshots[path] = entries
+        post_event('save_finished', {'filename':filename, 'error':None})
+    except Exception as e:
+        post_event('save_finished', {'filename':filename, 'error':e})
+        raise
+
+def write_snapshot(filename:str, sections:dict[str,object], codec:str='zlib', partial:bool=False, background:bool=True):
+    '''
+    saves `sections` (name to any picklable object) into a binary save file in the saves folder, readable with `read_snapshot()`
+
+    the sections are pickled right away so that the game can keep changing its state, compressing and writing the file
+    (atomically, see `atomic_write()`) happens on a background thread, which posts 'save_finished' with `filename` and `error` (`None` if it worked)
+    when it's done, snapshots are written one at a time in the order they were requested
+
+    sections that pickle to the same bytes as in the last snapshot written to the file reuse its compressed bytes instead of being compressed again
+
+    returns a `Future` of the write if `background`, otherwise writes before returning and returns `None`
+
+    ### Parameters:
+        `filename`: name of the file in the saves folder
+
+        `sections`: the state to save by section name, e.g. one section per scene from `scene.save_state()`
+
+        `codec`: compression of the sections, one of `SAVE_CODECS` ('lzma' is smaller but several times slower than 'zlib')
+
+        `partial`: if enabled, sections of the previous snapshot that aren't in `sections` are kept, so only what changed has to be passed
+    '''
+    path = savefile_path(filename)
+    raws = {nm:pickle.dumps(obj, pickle.HIGHEST_PROTOCOL) for nm, obj in sections.items()}
+    if not background:
+        _write_snapshot(path, raws, SAVE_CODECS[codec], partial, filename)
+        return None
+    global _save_pool
+    if _save_pool==None: _save_pool = ThreadPoolExecutor(1, thread_name_prefix='save')
+    return _save_pool.submit(_write_snapshot, path, raws, SAVE_CODECS[codec], partial, filename)
+
+def read_snapshot(filename:str):
+    '''
+    returns a `save_snapshot` of a save file in the saves folder written by `write_snapshot()`, its sections are loaded when accessed
+
+    raises `ValueError` if the file isn't a snapshot or is truncated, and when a section that is truncated or fails its crc is accessed
+    '''
+    return save_snapshot(savefile_path(filename))
+
+def wait_saves():
+    '''
+    blocks until every snapshot requested so far has been written
+    '''
+    if _save_pool!=None: _save_pool.submit(lambda: None).result()
+
+_RECORDING_MAGIC = b'PGFR'
+_RECORDING_VERSION = 1
+_RECORDING_HEADER = struct.Struct('<4sHI') # magic, version, length of the pickled header
+_RECORDING_FRAME = struct.Struct('<dH') # dt, number of events
+_RECORDING_EVENT = struct.Struct('<II') # event type, length of the marshalled attributes
+
+def _marshal_event(event:pg.event.Event) -> bytes:
+    try: return marshal.dumps(event.dict)
+    except ValueError:
+        # attributes marshal can't store (pygame objects) are left out
+        def storable(v):
+            try: marshal.dumps(v)
+            except ValueError: return False
+            return True
+        return marshal.dumps({k:v for k, v in event.dict.items() if storable(v)})
+
+class input_recorder(object):
+    '''
+    records the input events and `dt` of every frame into a binary file that `read_recording()` and `python -m src.bench --replay` read,
+    `main()` records every session to `RECORD_INPUT` if it is set
+
+    the file starts with a header of the settings (`scfg`) and the seed `random` (and numpy's generator) were seeded with,
+    followed by a zlib stream of frames: `dt` and the type and marshalled attributes of each event,
+    the stream is flushed every `flush_frames` frames so a crash loses at most that many
+
+    events posted by the game itself (`pg.USEREVENT`) aren't recorded since the game posts them again when replayed
+
+    ### Attributes:
+        `path`: the file recorded to
+
+        `seed`: the seed of the session
+
+        `frames`: number of frames recorded so far
+
+    ### Methods:
+        `frame(events, dt)`: records a frame's events as returned by `pg.event.get()` and the `dt` it is simulated with
+
+        `close()`: finishes the file
+    '''
+    def __init__(self, path:str, seed:int=None, flush_frames:int=60) -> None:
+        self.path = path
+        self.seed = seed if seed!=None else random.randrange(2**32)
+        random.seed(self.seed)
+        if np!=None: np.random.seed(self.seed)
+        self.frames = 0
+        self.flush_frames = flush_frames
+        header = pickle.dumps({'scfg':dict(scfg.__dict__), 'seed':self.seed, 'tps':TPS, 'fixed_timestep':FIXED_TIMESTEP, 'sim_tps':SIM_TPS}, pickle.HIGHEST_PROTOCOL)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'wb')
+        self._file.write(_RECORDING_HEADER.pack(_RECORDING_MAGIC, _RECORDING_VERSION, len(header)) + header)
+        self._z = zlib.compressobj(6)
+    def frame(self, events:list[pg.event.Event], dt:float):
+        parts = []
+        for e in events:
+            if e.type==pg.USEREVENT: continue
+            attrs = _marshal_event(e)
+            parts.append(_RECORDING_EVENT.pack(e.type, len(attrs)))
+            parts.append(attrs)
+        self._file.write(self._z.compress(_RECORDING_FRAME.pack(dt, len(parts)//2) + b''.join(parts)))
+        self.frames += 1
+        if self.frames % self.flush_frames==0:
+            self._file.write(self._z.flush(zlib.Z_SYNC_FLUSH))
+            self._file.flush()
+    def close(self):
+        if self._file==None: return
+        self._file.write(self._z.flush())
+        self._file.close()
+        self._file = None
+
+def read_recording(path:str) -> tuple[dict,list[tuple[list[pg.event.Event],float]]]:
+    '''
+    returns the header (settings `scfg`, `seed`, `tps`, `fixed_timestep`, `sim_tps`) and the frames (events, dt) of a file written by `input_recorder`,
+    a file cut short by a crash is read up to its last complete frame
+    '''
+    with open(path, 'rb') as f: data = f.read()
+    magic, version, hlen = _RECORDING_HEADER.unpack_from(data)
+    if magic!=_RECORDING_MAGIC: raise ValueError(f'{path} is not an input recording')
+    if version>_RECORDING_VERSION: raise ValueError(f'{path} was recorded by a newer version (format {version})')
+    start = _RECORDING_HEADER.size
+    header = pickle.loads(data[start:start+hlen])
+    # a decompressobj returns what it can of a truncated stream
+    raw = zlib.decompressobj().decompress(data[start+hlen:])
+    frames = []
+    off = 0
+    while off+_RECORDING_FRAME.size <= len(raw):
+        dt, n = _RECORDING_FRAME.unpack_from(raw, off)
+        o = off+_RECORDING_FRAME.size
+        events = []
+        for _ in range(n):
+            if o+_RECORDING_EVENT.size > len(raw): break
+            etype, alen = _RECORDING_EVENT.unpack_from(raw, o)
+            o += _RECORDING_EVENT.size
+            if o+alen > len(raw): break
+            events.append(pg.event.Event(etype, marshal.loads(raw[o:o+alen])))
+            o += alen
+        if len(events)<n: break
+        frames.append((events, dt))
+        off = o
+    return header, frames
+
+class gc_controller(object):
+    '''
+    control over when Python's cyclic garbage collector runs, shared as `gccontrol`
+
+    elements reference their scene and the scene its elements, so dropped elements are only freed by the cyclic collector,
+    whose pauses land in the middle of whatever frame crosses its threshold, and a full collection walks every object the game holds
+
+    ### Attributes:
+        `idle_collect`: if enabled, automatic collection is off and `idle()` collects the generations that are due between frames instead,
+        a generation is collected anyway once it is `force_factor` times over its threshold
+
+        `pauses`: recent collections as (generation, milliseconds, whether it ran from `idle()`), only recorded while `idle_collect` is enabled
+
+    ### Methods:
+        `freeze()`: collects and then moves every object alive into the permanent generation so that collections skip it,
+        call this after building scenes or loading a level, only for objects that stay alive until exit (`main()` does it once the game is made if `GC_FREEZE` is enabled)
+
+        `idle(ms_left)`: collects the oldest due generation whose last collection took less than `ms_left` (or that is forced),
+        called by `main()` before waiting for the next frame
+
+        `stats()`: returns the count, total, max and 99th percentile of collection pauses in milliseconds by generation,
+        and how many happened outside of `idle()`
+    '''
+    def __init__(self, idle_collect:bool=False, force_factor:float=10., history:int=1000) -> None:
+        self.force_factor = force_factor
+        self.pauses:deque[tuple[int,float,bool]] = deque(maxlen=history)
+        self._last_ms = [0., 0., 0.]
+        self._start = None
+        self._in_idle = False
+        self._idle_collect = False
+        self.idle_collect = idle_collect
+    @property
+    def idle_collect(self):
+        return self._idle_collect
+    @idle_collect.setter
+    def idle_collect(self, val:bool):
+        self._idle_collect = val
+        if val:
+            gc.disable()
+            if self._track not in gc.callbacks: gc.callbacks.append(self._track)
+        else:
+            gc.enable()
+            if self._track in gc.callbacks: gc.callbacks.remove(self._track)
+    def _track(self, phase:str, info:dict):
+        if phase=='start':
+            self._start = time.perf_counter()
+            return
+        if self._start==None: return
+        ms = (time.perf_counter()-self._start)*1000
+        self._start = None
+        gen = info['generation']
+        self._last_ms[gen] = ms
+        self.pauses.append((gen, ms, self._in_idle))
+    def freeze(self):
+        gc.collect()
+        gc.freeze()
+    def idle(self, ms_left:float):
+        if not self._idle_collect: return
+        counts, thresholds = gc.get_count(), gc.get_threshold()
+        for gen in (2, 1, 0):
+            # an older generation that doesn't fit waits until it is forced, the younger ones still get collected meanwhile
+            if counts[gen] < thresholds[gen]: continue
+            if self._last_ms[gen] < ms_left or counts[gen] >= thresholds[gen]*self.force_factor:
+                self._in_idle = True
+                try: gc.collect(gen)
+                finally: self._in_idle = False
+                return
+    def stats(self) -> dict:
+        result = {}
+        for gen in range(3):
+            ms = sorted(p[1] for p in self.pauses if p[0]==gen)
+            if not ms: continue
+            result[gen] = {'count':len(ms), 'total':sum(ms), 'max':ms[-1], 'p99':ms[min(len(ms)-1, int(.99*len(ms)))]}
+        result['outside_idle'] = sum(1 for p in self.pauses if not p[2])
+        return result
+
+gccontrol = gc_controller(GC_IDLE_COLLECT)
+
 def save_cfg():
     if GAME_DIR=='': return
-    with open(os.path.expanduser(f'~/Documents/{GAME_DIR}/cfg'), 'wb') as f:
-        pickle.dump(scfg, f)
+    atomic_write(os.path.expanduser(f'~/Documents/{GAME_DIR}/cfg'), pickle.dumps(scfg.__dict__))
 
 def load_cfg() -> settings:
     if GAME_DIR=='': return
     try:
         with open(os.path.expanduser(f'~/Documents/{GAME_DIR}/cfg'), 'rb') as f:
             _scfg = pickle.load(f)
-        scfg.__dict__.update(_scfg.__dict__)
+        # older versions pickled the whole settings object
+        scfg.__dict__.update(_scfg if isinstance(_scfg, dict) else _scfg.__dict__)
         post_event('window_resize')
     except FileNotFoundError: return
 
@@ -0,0 +1,26 @@
+import os, sys
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture
+def image_file(tmp_path, monkeypatch):
+    # a png in the images folder, with the disk cache pointed at a temporary folder
+    import pygame as pg
+    from src import assets
+    imgdir = os.path.join(os.path.dirname(assets.__file__), 'images')
+    made = not os.path.isdir(imgdir)
+    os.makedirs(imgdir, exist_ok=True)
+    name = '_test_%d.png' % os.getpid()
+    surf = pg.Surface((64, 48), pg.SRCALPHA)
+    for x in range(64): surf.fill((x*4, 255-x*4, 90, 60+x*3), (x, 0, 1, 48))
+    pg.image.save(surf, os.path.join(imgdir, name))
+    monkeypatch.setattr(assets.diskcache, 'path', str(tmp_path/'cache'))
+    assets.assetcache.clear()
+    yield name
+    assets.assetcache.clear()
+    os.remove(os.path.join(imgdir, name))
+    if made: os.rmdir(imgdir)
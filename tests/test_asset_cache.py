@@ -0,0 +1,40 @@
+from src.assets import *
+
+def test_lru_evicts_least_recently_used():
+    c = asset_cache(30)
+    c.put('a', 1, 10)
+    c.put('b', 2, 10)
+    c.put('c', 3, 10)
+    assert c.get('a')==1
+    c.put('d', 4, 10)
+    assert c.get('b')==None and c.get('a')==1 and c.get('d')==4
+    assert c.nbytes==30 and c.evictions==1
+
+def test_put_replaces_bytes():
+    c = asset_cache(100)
+    c.put('a', 1, 40)
+    c.put('a', 2, 10)
+    assert c.nbytes==10 and c.get('a')==2
+
+def test_scaled_miss_counts_once(image_file):
+    generate_surface(image_file, 32, 24)
+    assert (assetcache.hits, assetcache.misses)==(0, 1)
+    generate_surface(image_file, 16, 12)
+    assert (assetcache.hits, assetcache.misses)==(0, 2)
+    generate_surface(image_file, 16, 12)
+    assert (assetcache.hits, assetcache.misses)==(1, 2)
+
+def test_native_size_is_a_hit(image_file):
+    stored = diskcache.written
+    generate_surface(image_file, 64, 48)
+    assert (assetcache.hits, assetcache.misses)==(0, 1)
+    assert generate_surface(image_file, 64, 48) is generate_surface(image_file, 64, 48)
+    assert (assetcache.hits, assetcache.misses)==(2, 1)
+    # the unscaled image isn't written to the disk cache
+    assert diskcache.written==stored
+
+def test_loader_native_size_is_a_hit(image_file):
+    img = generate_surface(image_file, 64, 48)
+    hits = assetcache.hits
+    assert assetloader.load_image(image_file, 64, 48).surface is img
+    assert assetcache.hits==hits+1
@@ -0,0 +1,103 @@
+import os, time, wave
+import pytest
+import pygame as pg
+from src import assets
+from src.assets import *
+
+@pytest.fixture
+def loader():
+    pg.display.set_mode((1, 1))
+    pg.event.clear()
+    l = asset_loader(threads=2)
+    yield l
+    l.shutdown()
+
+@pytest.fixture
+def sound_file():
+    sounddir = os.path.join(os.path.dirname(assets.__file__), 'sounds')
+    made = not os.path.isdir(sounddir)
+    os.makedirs(sounddir, exist_ok=True)
+    name = '_test_%d.wav' % os.getpid()
+    with wave.open(os.path.join(sounddir, name), 'wb') as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(44100)
+        w.writeframes(bytes(4*4410))
+    yield name
+    os.remove(os.path.join(sounddir, name))
+    if made: os.rmdir(sounddir)
+
+def finish(l:asset_loader):
+    deadline = time.perf_counter()+10
+    while l.pump():
+        assert time.perf_counter()<deadline
+        time.sleep(.001)
+    return [(e.msg, e.__dict__) for e in pg.event.get(pg.USEREVENT)]
+
+def test_images_load_through_the_pool(loader, image_file):
+    scaled, full = loader.load_image(image_file, 32, 24), loader.load_image(image_file, 64, 48, False)
+    assert loader.load_image(image_file, 32, 24) is scaled and loader.pending()==2
+    # placeholders of the right size until then
+    assert scaled.surface.get_size()==(32, 24) and not scaled.loaded
+    events = finish(loader)
+    assert scaled.loaded and full.loaded and scaled.error==None and full.error==None
+    assert scaled.surface.get_size()==(32, 24) and full.surface.get_size()==(64, 48)
+    assert scaled.surface.get_flags() & pg.SRCALPHA and not full.surface.get_flags() & pg.SRCALPHA
+    assert sorted(id(d['handle']) for msg, d in events)==sorted([id(scaled), id(full)])
+    # finished assets are in the cache for generate_surface() and later requests
+    hits = assetcache.hits
+    assert generate_surface(image_file, 32, 24) is scaled.surface and assetcache.hits==hits+1
+    again = loader.load_image(image_file, 32, 24)
+    assert again.loaded and again.surface is scaled.surface and loader.pending()==0
+
+def test_bind_and_on_load(loader, image_file):
+    class elem(object):
+        surface, w, h, dirty = None, 0, 0, False
+        def mark_dirty(self): self.dirty = True
+    e = elem()
+    handle = loader.load_image(image_file, 20, 10)
+    handle.bind(e)
+    seen = []
+    handle.on_load(seen.append)
+    assert e.surface is handle.surface and not e.dirty
+    finish(loader)
+    assert e.surface is handle.surface and (e.w, e.h)==(20, 10) and e.dirty and seen==[handle]
+    handle.on_load(seen.append)
+    assert seen==[handle, handle]
+
+def test_missing_file_sets_the_error(loader):
+    class elem(object):
+        surface = None
+    e = elem()
+    handle = loader.load_image('_no_such_image.png', 8, 8)
+    handle.bind(e)
+    events = finish(loader)
+    assert handle.loaded and isinstance(handle.error, FileNotFoundError)
+    # the placeholder stays
+    assert e.surface is handle.surface and handle.surface.get_size()==(8, 8)
+    assert events==[('asset_loaded', {'msg':'asset_loaded', 'handle':handle})]
+
+def test_manifest_group_events(loader, image_file, sound_file):
+    if pg.mixer.get_init()==None: pytest.skip('no mixer')
+    group = loader.load_manifest({'images':[[image_file, 32, 24], ['_no_such_image.png', 4, 4]], 'sounds':[sound_file]}, 'level')
+    assert group.name=='level' and group.total==3 and group.done==0 and not group.ready
+    assert set(group.handles)=={image_file, '_no_such_image.png', sound_file}
+    events = finish(loader)
+    assert group.ready and group.done==3
+    # every asset is announced before the progress it makes, and the group is ready after the last one
+    msgs = [msg for msg, d in events]
+    assert msgs==['asset_loaded', 'asset_progress']*3+['assets_ready']
+    assert [d['done'] for msg, d in events if msg=='asset_progress']==[1, 2, 3]
+    assert all(d['group'] is group and d['total']==3 for msg, d in events if msg=='asset_progress')
+    assert all(d['handle'].groups==[] for msg, d in events if msg=='asset_loaded')
+    assert group.handles[image_file].surface.get_size()==(32, 24)
+    assert group.handles[sound_file].sound.get_length()==pytest.approx(.1, abs=.01)
+    assert group.handles['_no_such_image.png'].error!=None
+
+def test_loaded_manifest_is_ready_at_once(loader, image_file):
+    generate_surface(image_file, 16, 12)
+    # cached sizes finish right away, and so do other sizes of a cached image
+    group = loader.load_manifest({'images':[[image_file, 16, 12], [image_file, 8, 6]]}, 'menu')
+    assert group.ready and group.done==2 and loader.pending()==0
+    assert group.handles[image_file].size==(8, 6)
+    assert [(e.msg, e.group) for e in pg.event.get(pg.USEREVENT)]==[('assets_ready', group)]
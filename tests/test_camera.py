@@ -0,0 +1,46 @@
+import pytest
+import pygame as pg
+from src.templates import *
+
+class marker(element):
+    # draws a square through an overridden blit(), and records where
+    def __init__(self, pos):
+        surf = pg.Surface((4, 4))
+        surf.fill((0, 255, 0))
+        super().__init__(1, surf, pos)
+        self.seen = []
+    def blit(self, screen):
+        self.seen.append(self.pos.tuple)
+        screen.blit(self.surface, (self.x, self.y))
+    def blit_at(self, screen, offset):
+        screen.blit(self.surface, (self.x-offset[0], self.y-offset[1]))
+
+def world(elems):
+    s = scene((40, 30), elems, (0, 0, 0))
+    s.camera = camera((100, 50))
+    return s
+
+def test_snapshot_draws_at_the_camera_offset():
+    sq = pg.Surface((4, 4))
+    sq.fill((255, 0, 0))
+    plain, custom = element(1, sq, (110, 60)), marker((120, 70))
+    s = world([plain, custom])
+    s.render()
+    live = pg.image.tobytes(s.surface, 'RGBA')
+    assert s.surface.get_at((10, 10))==(255, 0, 0) and s.surface.get_at((20, 20))==(0, 255, 0)
+    s.snapshot().render()
+    assert pg.image.tobytes(s.surface, 'RGBA')==live
+
+def test_drawing_does_not_move_elements():
+    e = marker((120, 70))
+    s = world([e])
+    s.render()
+    s.snapshot().render()
+    assert all(p==(120, 70) for p in e.seen)
+
+def test_camera_requires_full_redraws():
+    with pytest.raises(AssertionError):
+        scene((40, 30), [], 'black', dirty_rendering=True).camera = camera((0, 0))
+    s = world([])
+    s.static_layers = True
+    with pytest.raises(AssertionError): s.render()
@@ -0,0 +1,63 @@
+import os
+import pygame as pg
+from src import assets
+from src.assets import *
+
+def images(name):
+    return os.path.join(os.path.dirname(assets.__file__), 'images', name)
+
+def test_round_trip(image_file, tmp_path):
+    pg.display.set_mode((1, 1))
+    dc = disk_cache(str(tmp_path/'dc'))
+    assert dc.load_image(image_file, (64, 48), True)==None and dc.misses==1
+    src = pg.image.load(images(image_file)).convert_alpha()
+    dc.store_image(image_file, (64, 48), True, src)
+    dc.store_image(image_file, (64, 48), True, src)
+    assert dc.written==1
+    got = dc.load_image(image_file, (64, 48), True)
+    assert dc.hits==1 and got.get_size()==(64, 48)
+    assert pg.image.tobytes(got, 'RGBA')==pg.image.tobytes(src, 'RGBA')
+    # other sizes and alpha modes are other files
+    assert dc.load_image(image_file, (32, 24), True)==None and dc.load_image(image_file, (64, 48), False)==None
+
+def test_edited_image_is_missed_and_pruned(image_file, tmp_path):
+    pg.display.set_mode((1, 1))
+    dc = disk_cache(str(tmp_path/'dc'))
+    surf = pg.image.load(images(image_file)).convert_alpha()
+    dc.store_image(image_file, (64, 48), True, surf)
+    surf.fill((1, 2, 3, 4))
+    pg.image.save(surf, images(image_file))
+    os.utime(images(image_file), ns=(1, 1))
+    assert dc.load_image(image_file, (64, 48), True)==None
+    assert dc.prune()==1 and os.listdir(tmp_path/'dc')==[]
+
+def test_font_table_is_reused(tmp_path, monkeypatch):
+    looked = []
+    monkeypatch.setattr(pg.font, 'match_font', lambda name: looked.append(name) or None)
+    disk_cache(str(tmp_path)).font_path('nosuchfont')
+    assert disk_cache(str(tmp_path)).font_path('nosuchfont')==None
+    assert looked==['nosuchfont']
+
+def test_disabled_cache(image_file):
+    dc = disk_cache(None)
+    dc.store_image(image_file, (64, 48), True, pg.Surface((64, 48)))
+    assert dc.load_image(image_file, (64, 48), True)==None and dc.written==0 and dc.prune()==0
+
+def test_generate_surface_fills_the_cache(image_file):
+    pg.display.set_mode((1, 1))
+    written = diskcache.written
+    generate_surface(image_file, 32, 24)
+    assert diskcache.written==written+1
+    assetcache.clear()
+    before = diskcache.hits
+    assert generate_surface(image_file, 32, 24).get_size()==(32, 24)
+    assert diskcache.hits==before+1
+
+def test_off_by_default():
+    assert ASSET_DISK_CACHE=='' and disk_cache(None).path==None
+
+def test_prebuild_fills_the_given_folder(image_file, tmp_path, monkeypatch, capsys):
+    from src.prebuild import prebuild_main
+    monkeypatch.setattr(diskcache, 'path', None)
+    prebuild_main(['--cache', str(tmp_path/'built'), '--image', image_file, '32', '24'])
+    assert diskcache.path==str(tmp_path/'built') and len(os.listdir(tmp_path/'built'))==1
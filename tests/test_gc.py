@@ -0,0 +1,44 @@
+import gc
+import pytest
+from src import utils
+
+@pytest.fixture
+def controller(monkeypatch):
+    collected = []
+    state = {'counts':(0, 0, 0)}
+    monkeypatch.setattr(gc, 'get_threshold', lambda: (700, 10, 10))
+    monkeypatch.setattr(gc, 'get_count', lambda: state['counts'])
+    monkeypatch.setattr(gc, 'collect', lambda gen=2: collected.append(gen))
+    c = utils.gc_controller(True)
+    c.collected, c.state = collected, state
+    yield c
+    c.idle_collect = False
+
+def test_younger_generations_run_when_the_oldest_does_not_fit(controller):
+    controller._last_ms = [.1, 1., 50.]
+    controller.state['counts'] = (800, 12, 11)
+    controller.idle(5)
+    assert controller.collected==[1]
+
+def test_every_generation_is_forced(controller):
+    controller._last_ms = [20., 20., 50.]
+    controller.state['counts'] = (7000, 5, 11)
+    controller.idle(5)
+    assert controller.collected==[0]
+    controller.state['counts'] = (800, 5, 100)
+    controller.idle(5)
+    assert controller.collected==[0, 2]
+
+def test_nothing_runs_without_time(controller):
+    controller._last_ms = [20., 20., 50.]
+    controller.state['counts'] = (800, 12, 11)
+    controller.idle(5)
+    assert controller.collected==[]
+
+def test_callback_only_while_enabled():
+    c = utils.gc_controller(False)
+    assert c._track not in gc.callbacks
+    c.idle_collect = True
+    try: assert c._track in gc.callbacks and not gc.isenabled()
+    finally: c.idle_collect = False
+    assert c._track not in gc.callbacks and gc.isenabled()
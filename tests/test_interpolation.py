@@ -0,0 +1,36 @@
+import pygame as pg
+from src.templates import *
+
+class mover(element):
+    def __init__(self, interpolate=True):
+        surf = pg.Surface((10, 10))
+        surf.fill((255, 0, 0))
+        super().__init__(1, surf, (10, 10))
+        self.interpolate = interpolate
+    def step(self, dt):
+        super().step(dt)
+        self.x += 17
+
+def frames(dirty):
+    m = mover()
+    s = scene((120, 40), [m], (0, 0, 80), dirty_rendering=dirty)
+    out = []
+    for _ in range(3):
+        s.step(.01)
+        for a in (0., .3, .6, 1.):
+            s.interp_alpha = a
+            s.render()
+            out.append(pg.image.tobytes(s.surface, 'RGBA'))
+    return out
+
+def test_dirty_rendering_follows_interpolated_position():
+    assert frames(True)==frames(False)
+
+def test_interpolate_enabled_after_adding():
+    m = mover(False)
+    s = scene((120, 40), [m], 'black')
+    m.interpolate = True
+    s.step(.01)
+    assert m.prev_pos==(10, 10)
+    m.interpolate = False
+    assert m not in s._interpolated
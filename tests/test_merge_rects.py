@@ -0,0 +1,28 @@
+import random
+import pygame as pg
+from src.utils import merge_rects
+
+def covered(rects, w, h):
+    surf = pg.Surface((w, h))
+    for r in rects: surf.fill((255, 255, 255), r)
+    return pg.mask.from_threshold(surf, (255, 255, 255), (1, 1, 1, 255))
+
+def test_merged_rects_cover_input_without_overlapping():
+    random.seed(2)
+    for _ in range(50):
+        rects = [pg.Rect(random.randint(0, 90), random.randint(0, 90), random.randint(0, 20), random.randint(0, 20)) for _ in range(20)]
+        merged = merge_rects(rects, 100)
+        for i, a in enumerate(merged):
+            assert a.w>0 and a.h>0
+            assert not any(a.colliderect(b) for b in merged[i+1:])
+        # every input pixel is still covered
+        assert covered(rects, 120, 120).overlap_area(covered(merged, 120, 120), (0, 0))==covered(rects, 120, 120).count()
+
+def test_max_rects():
+    rects = [pg.Rect(i*20, 0, 10, 10) for i in range(10)]
+    merged = merge_rects(rects, 3)
+    assert len(merged)==3
+    assert pg.Rect(merged[0]).unionall(merged)==pg.Rect(0, 0, 190, 10)
+
+def test_empty_rects_dropped():
+    assert merge_rects([pg.Rect(0, 0, 0, 5), pg.Rect(3, 3, 4, -1)])==[]
@@ -0,0 +1,35 @@
+import pygame as pg
+from src.templates import *
+
+class wall(element, collidable):
+    def __init__(self, pos, size):
+        element.__init__(self, 0, pg.Surface(size), pos)
+        collidable.__init__(self, True)
+
+class body(element, physicsobject):
+    def __init__(self, pos, v):
+        element.__init__(self, 1, pg.Surface((20, 20)), pos)
+        physicsobject.__init__(self, 1, v)
+    def step(self, dt):
+        super().step(dt)
+        self.physics_step(dt)
+
+class hitbox_body(body):
+    # collides with a 4x4 box at the bottom right of its 20x20 surface
+    def get_rect(self):
+        return pg.Rect(self.x+16, self.y+16, 4, 4)
+
+def run(batch, cls):
+    b = cls((0, 0), (100, 0))
+    s = scene((200, 200), [wall((25, 0), (10, 10)), b], 'black', physics=True, batch_physics=batch)
+    for _ in range(10): s.step(.01)
+    return b.pos.tuple
+
+def test_batch_matches_scalar():
+    assert run(True, body)==run(False, body)
+    assert run(True, body)[0] < 10
+
+def test_batch_uses_overridden_get_rect():
+    # the hitbox passes under the wall, the surface rect would not
+    assert run(True, hitbox_body)==run(False, hitbox_body)
+    assert run(True, hitbox_body)[0] > 9
@@ -0,0 +1,40 @@
+import threading
+import pygame as pg
+from src.templates import *
+from src import assets, utils
+
+class custom(element):
+    def blit(self, screen):
+        screen.fill((255, 0, 0), self.get_rect())
+
+def test_elements_without_snapshot_make_it_live():
+    plain = element(1, pg.Surface((4, 4)), (0, 0))
+    s = scene((40, 30), [plain], 'black')
+    assert not s.snapshot().live
+    s.add_element(custom(2, pg.Surface((4, 4)), (5, 5)))
+    assert s.snapshot().live
+    outer = scene((80, 60), [scene((40, 30), [custom(1, pg.Surface((4, 4)), (0, 0))], 'black')], 'black')
+    assert outer.snapshot().live
+
+def test_main_calls_are_queued_off_the_main_thread():
+    calls = []
+    t = threading.Thread(target=utils.run_on_main, args=(calls.append, 1))
+    t.start()
+    t.join()
+    assert calls==[]
+    utils.run_main_calls()
+    assert calls==[1]
+
+def test_render_line_from_two_threads():
+    pg.font.init()
+    font = pg.font.Font(None, 12)
+    errors = []
+    def render(k):
+        try:
+            for i in range(300): assets.render_line(font, str((i*7+k)%50), (255, 255, 255))
+        except Exception as e: errors.append(e)
+    threads = [threading.Thread(target=render, args=(k,)) for k in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert errors==[]
+    assert assets.render_line(font, '3', (255, 255, 255)) is assets.render_line(font, '3', (255, 255, 255))
@@ -0,0 +1,50 @@
+import pygame as pg
+from src.templates import *
+
+class spawner(element):
+    # runs `fn` during its scene's step
+    def __init__(self, fn):
+        super().__init__(0, pg.Surface((1, 1)), (0, 0))
+        self.fn = fn
+    def step(self, dt):
+        super().step(dt)
+        self.fn()
+
+def test_two_bursts_in_one_step_use_different_emitters():
+    pool = particle_pool(3, 1)
+    s = scene((40, 30), [], 'black')
+    got = []
+    s.add_element(spawner(lambda: got.extend((pool.burst(s, (5, 5), 10), pool.burst(s, (20, 20), 10)))))
+    s.step(.01)
+    assert got[0] is not got[1]
+    assert sum(isinstance(e, particle_emitter) for e in s.elements)==2
+
+def test_full_pool_reuses_a_pending_emitter_once():
+    pool = particle_pool(1, 1)
+    s = scene((40, 30), [], 'black')
+    s.add_element(spawner(lambda: (pool.burst(s, (5, 5), 10), pool.burst(s, (20, 20), 10))))
+    s.step(.01)
+    assert s.elements.count(pool.emitters[0])==1
+
+def test_release_before_a_deferred_add():
+    pool = element_pool(lambda: element(1, pg.Surface((2, 2)), (0, 0)))
+    s = scene((40, 30), [], 'black')
+    def spawn():
+        e = pool.acquire(s)
+        pool.release(e)
+    s.add_element(spawner(spawn))
+    s.step(.01)
+    assert len(s.elements)==1 and len(pool.free)==1
+    e = pool.acquire(s)
+    s.step(.01)
+    assert s.elements.count(e)==1
+
+def test_pool_reuses_released_elements():
+    pool = element_pool(lambda: element(1, pg.Surface((2, 2)), (0, 0)), size=2, max_size=2)
+    s = scene((40, 30), [], 'black')
+    a, b = pool.acquire(s), pool.acquire(s)
+    assert pool.created==2 and pool.reused==2 and len(s.elements)==2
+    pool.release(a)
+    pool.release(a)
+    assert pool.free==[a] and a.parent_scene==None
+    assert pool.acquire() is a
@@ -0,0 +1,37 @@
+import json
+import pygame as pg
+from src.templates import *
+
+class two_scenes(gametemplate):
+    def __init__(self, screen_ref):
+        super().__init__(screen_ref)
+        self.world = scene((300, 200), [element(0, pg.Surface((10, 10)), (250, 150))], (40, 120, 200), dirty_rendering=True)
+        self.hud = scene((50, 50), [], (0, 0, 0, 0), pos=(250, 0))
+        self.curscenes = [self.world]
+
+def test_overlay_does_not_build_up_under_dirty_rendering():
+    screen = pg.Surface((300, 200))
+    g = two_scenes(screen)
+    g.enable_profiler(overlay=True)
+    colors = []
+    for _ in range(6):
+        g.step(.01)
+        g.update_screen(screen)
+        colors.append(tuple(screen.get_at((150, 1))))
+    assert len(set(colors[1:]))==1
+    g.disable_profiler()
+
+def test_scenes_timed_separately(tmp_path):
+    screen = pg.Surface((300, 200))
+    g = two_scenes(screen)
+    g.curscenes = [g.world, g.hud]
+    prof = g.enable_profiler()
+    for _ in range(3):
+        g.process_input(pg.event.Event(pg.KEYDOWN, key=pg.K_a))
+        g.step(.01)
+        g.update_screen(screen)
+    g.disable_profiler()
+    assert set(prof.scene_times(prof.frames[-1]))=={f'{n}.{p}' for n in ('world', 'hud') for p in ('input', 'step', 'blit')}
+    prof.dump_trace(str(tmp_path/'trace.json'))
+    with open(tmp_path/'trace.json') as f: names = {e['name'] for e in json.load(f)['traceEvents']}
+    assert 'world.blit' in names and 'hud.step' in names
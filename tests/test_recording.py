@@ -0,0 +1,61 @@
+import threading
+import pytest
+import pygame as pg
+from src import bench, utils
+from src.main import *
+
+class counting_game(gametemplate):
+    def __init__(self, screen_ref):
+        super().__init__(screen_ref)
+        self.steps = []
+    def step(self, dt):
+        self.steps.append(dt)
+
+@pytest.fixture
+def screen():
+    pg.display.init()
+    return pg.display.set_mode((64, 48))
+
+def record(path, frames, **kw):
+    r = input_recorder(str(path), seed=7, **kw)
+    for events, dt in frames: r.frame(events, dt)
+    r.close()
+
+def test_round_trip(tmp_path):
+    frames = [([pg.event.Event(pg.KEYDOWN, {'key':pg.K_a, 'mod':0, 'unicode':'a', 'scancode':4, 'window':None})], .016),
+              ([], .02),
+              ([pg.event.Event(pg.MOUSEBUTTONDOWN, {'pos':(3, 4), 'button':1}), pg.event.Event(pg.USEREVENT, {'msg':'x'})], .015)]
+    record(tmp_path/'a.rec', frames)
+    header, got = read_recording(str(tmp_path/'a.rec'))
+    assert header['seed']==7 and header['tps']==TPS
+    assert [dt for _, dt in got]==[dt for _, dt in frames]
+    assert [[(e.type, e.dict) for e in events] for events, _ in got][:2]==[[(e.type, e.dict) for e in events] for events, _ in frames][:2]
+    # events the game posts itself aren't recorded
+    assert [e.type for e in got[2][0]]==[pg.MOUSEBUTTONDOWN]
+
+def test_truncated_recording(tmp_path):
+    record(tmp_path/'a.rec', [([], .01)]*100, flush_frames=10)
+    data = (tmp_path/'a.rec').read_bytes()
+    (tmp_path/'b.rec').write_bytes(data[:-5])
+    assert 0 < len(read_recording(str(tmp_path/'b.rec'))[1]) <= 100
+
+def test_replay_uses_the_recorded_timestep(screen):
+    g = counting_game(screen)
+    bench.run_frames(g, screen, [([], .0625)]*3, fixed_timestep=True, sim_tick=.015625)
+    assert g.steps==[.015625]*12
+    g = counting_game(screen)
+    bench.run_frames(g, screen, [([], .05)]*3, fixed_timestep=False)
+    assert g.steps==[.05]*3
+
+def test_replay_refuses_another_tps(tmp_path, monkeypatch):
+    record(tmp_path/'a.rec', [([], .01)])
+    monkeypatch.setattr(bench, 'TPS', TPS+1)
+    with pytest.raises(ValueError): bench.replay_game(str(tmp_path/'a.rec'))
+
+def test_replay_runs_main_calls(screen):
+    calls = []
+    t = threading.Thread(target=utils.run_on_main, args=(calls.append, 1))
+    t.start()
+    t.join()
+    bench.run_frames(counting_game(screen), screen, [([], .01)])
+    assert calls==[1]
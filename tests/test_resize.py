@@ -0,0 +1,54 @@
+import pytest
+import pygame as pg
+from src.main import *
+
+@pytest.fixture
+def window(monkeypatch):
+    pg.display.set_mode((INIT_TRUE_WIDTH, INIT_TRUE_HEIGHT))
+    for attr in ('TRUE_WIDTH', 'TRUE_HEIGHT', 'WIDTH', 'HEIGHT', 'WINDOW_W_SCALE', 'WINDOW_H_SCALE'):
+        monkeypatch.setattr(scfg, attr, getattr(scfg, attr))
+
+def resize(w, h):
+    return pg.event.Event(pg.VIDEORESIZE, {'w':w, 'h':h, 'size':(w, h)})
+
+def test_resizes_collapse_into_one_event(window):
+    key = pg.event.Event(pg.KEYDOWN, {'key':pg.K_a})
+    motion = pg.event.Event(pg.MOUSEMOTION, {'pos':(1, 2)})
+    posted = pg.event.Event(pg.USEREVENT, {'msg':'window_resize'})
+    other = pg.event.Event(pg.USEREVENT, {'msg':'other'})
+    up = pg.event.Event(pg.KEYUP, {'key':pg.K_a})
+    events, running = collect_events([key, resize(100, 80), motion, resize(300, 200), posted, other, up, resize(320, 240)])
+    assert running
+    assert events[:1]+events[2:]==[key, motion, other, up]
+    assert events[1].type==pg.USEREVENT and events[1].msg=='window_resize'
+    # the size is the last one
+    assert (scfg.TRUE_WIDTH, scfg.TRUE_HEIGHT)==(320, 240)
+    assert scfg.WINDOW_W_SCALE==320/INIT_TRUE_WIDTH and scfg.WIDTH==320/scfg.SCALE_FACTOR
+
+def test_posted_resize_alone_and_quit(window):
+    posted = pg.event.Event(pg.USEREVENT, {'msg':'window_resize'})
+    events, running = collect_events([posted, posted])
+    assert running and len(events)==1 and events[0].msg=='window_resize'
+    events, running = collect_events([pg.event.Event(pg.KEYDOWN, {'key':pg.K_a}), pg.event.Event(pg.QUIT), resize(10, 10)])
+    assert not running and [e.type for e in events]==[pg.KEYDOWN]
+    assert collect_events([])==([], True)
+
+def test_background_is_cached_per_size(window):
+    s = scene((40, 30), [], (10, 20, 30))
+    def window_scale(ws, hs):
+        scfg.WINDOW_W_SCALE, scfg.WINDOW_H_SCALE = ws, hs
+        s.handle_resize()
+        return s.scaled_init_env, s.surface
+    first = window_scale(2, 2)
+    assert first[0].get_size()==(int(40*2/scfg.SCALE_FACTOR), int(30*2/scfg.SCALE_FACTOR))
+    assert first[0].get_at((0, 0))[:3]==(10, 20, 30)
+    sizes = [window_scale(1+i/4, 1+i/4) for i in range(1, BG_CACHE_SIZES)]
+    # going back to a size reuses its surfaces, and keeps it from being the next one evicted
+    assert window_scale(2, 2)==first
+    window_scale(3, 3)
+    assert len(s._bg_cache)==BG_CACHE_SIZES
+    assert window_scale(2, 2)==first
+    assert window_scale(*[1+1/4]*2)[0] is not sizes[0][0]
+    # a new background drops the old sizes
+    s.init_env = pg.Surface((40, 30), pg.SRCALPHA)
+    assert window_scale(2, 2)[0] is not first[0] and len(s._bg_cache)==1
@@ -0,0 +1,61 @@
+import pygame as pg
+from src.templates import *
+
+class listener(element):
+    subscriptions = {pg.KEYDOWN}
+    def __init__(self):
+        super().__init__(0, pg.Surface((4, 4)), (0, 0))
+        self.got = 0
+    def process_input(self, inpt):
+        self.got += 1
+
+def key():
+    return pg.event.Event(pg.KEYDOWN, key=pg.K_a)
+
+def test_hand_edits_reach_routes():
+    a, b = listener(), listener()
+    s = scene((100, 100), [a], 'black')
+    s.process_input(key())
+    s.elements.remove(a)
+    s.elements.append(b)
+    b.parent_scene = s
+    s.process_input(key())
+    assert (a.got, b.got)==(1, 1)
+
+def test_click_routes_follow_hand_edits():
+    pressed = []
+    btn = element(0, pg.Surface((10, 10)), (0, 0), pressed_behavior=lambda: pressed.append(1))
+    s = scene((100, 100), [], 'black')
+    s.process_input(pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=(5, 5)))
+    s.elements.append(btn)
+    btn.parent_scene = s
+    s.process_input(pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=(5, 5)))
+    s.step(.01)
+    assert pressed==[1]
+
+def test_made_pressable_after_adding():
+    pressed = []
+    btn = element(0, pg.Surface((10, 10)), (0, 0))
+    s = scene((100, 100), [btn], 'black')
+    click = pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=(5, 5))
+    s.process_input(click)
+    btn.pressed_behavior = lambda: pressed.append(1)
+    btn.pressable = True
+    s.process_input(click)
+    s.step(.01)
+    assert pressed==[1]
+
+def test_subscribed_after_adding():
+    class late(element):
+        def __init__(self):
+            super().__init__(0, pg.Surface((4, 4)), (0, 0))
+            self.subscriptions = set()
+            self.got = 0
+        def process_input(self, inpt):
+            self.got += 1
+    e = late()
+    s = scene((100, 100), [e], 'black')
+    s.process_input(key())
+    e.subscriptions = {pg.KEYDOWN}
+    s.process_input(key())
+    assert e.got==1
@@ -0,0 +1,40 @@
+import pytest
+import pygame as pg
+from src.utils import *
+
+@pytest.mark.parametrize('mode, scaling, resolved', [
+    ('auto', 1, 'none'), ('auto', 2, 'nearest'), ('auto', 3, 'nearest'), ('auto', 1.5, 'smooth'),
+    ('smooth', 1, 'none'), ('smooth', 2, 'smooth'), ('smooth', 1.5, 'smooth'),
+    ('nearest', 1, 'none'), ('nearest', 2, 'nearest'), ('nearest', 1.5, 'nearest'),
+    ('scale2x', 1, 'none'), ('scale2x', 2, 'scale2x'), ('scale2x', 3, 'nearest'), ('scale2x', 2.5, 'smooth'),
+])
+def test_resolve_scale_mode(mode, scaling, resolved):
+    assert mode in SCALE_MODES and resolve_scale_mode(mode, scaling)==resolved
+
+def checkerboard(w, h):
+    surf = pg.Surface((w, h), 0, 32)
+    for x in range(w):
+        for y in range(h): surf.set_at((x, y), (255, 255, 255) if (x+y)%2 else (0, 0, 0))
+    return surf
+
+def colors(surf):
+    return {tuple(surf.get_at((x, y)))[:3] for x in range(surf.get_width()) for y in range(surf.get_height())}
+
+@pytest.mark.parametrize('mode', SCALE_MODES)
+@pytest.mark.parametrize('scaling', [1, 2, 3, 1.5])
+def test_scale_surface(mode, scaling):
+    src = checkerboard(8, 6)
+    size = (int(8*scaling), int(6*scaling))
+    resolved = resolve_scale_mode(mode, scaling)
+    out = scale_surface(src, size, resolved)
+    assert out.get_size()==size
+    if resolved=='none': assert out is src
+    # nearest and scale2x only copy pixels, smooth scaling blends neighbours
+    if resolved in ('none', 'nearest', 'scale2x'): assert colors(out)=={(0, 0, 0), (255, 255, 255)}
+    else: assert len(colors(out))>2
+    if resolved=='nearest': assert all(out.get_at((x, y))==src.get_at((x*8//size[0], y*6//size[1])) for x in range(size[0]) for y in range(size[1]))
+    # drawing into a surface of the right size gives the same pixels
+    if resolved!='none':
+        dest = pg.Surface(size, 0, src)
+        assert scale_surface(src, size, resolved, dest) is dest
+        assert pg.image.tobytes(dest, 'RGB')==pg.image.tobytes(out, 'RGB')
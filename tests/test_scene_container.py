@@ -0,0 +1,94 @@
+import pygame as pg
+import pytest
+from src.templates import *
+
+def elem(z, x=0):
+    return element(z, pg.Surface((4, 4)), (x, 0))
+
+class crasher(element):
+    def step(self, dt):
+        raise RuntimeError('step failed')
+
+def test_exception_in_step_does_not_leave_scene_iterating():
+    s = scene((100, 100), [crasher(0, pg.Surface((1, 1)), (0, 0))], 'black')
+    with pytest.raises(RuntimeError): s.step(.01)
+    e = elem(1)
+    s.add_element(e)
+    assert e in s.elements and s._iterating==0
+
+def test_exception_in_process_input_does_not_leave_scene_iterating():
+    class bad(element):
+        subscriptions = {pg.KEYDOWN}
+        def process_input(self, inpt):
+            raise RuntimeError('input failed')
+    s = scene((100, 100), [bad(0, pg.Surface((1, 1)), (0, 0))], 'black')
+    with pytest.raises(RuntimeError): s.process_input(pg.event.Event(pg.KEYDOWN, key=pg.K_a))
+    e = elem(1)
+    s.add_element(e)
+    assert e in s.elements
+
+def test_same_length_swap_by_hand_is_noticed():
+    a, b, c = elem(0), elem(1), elem(2)
+    s = scene((100, 100), [a, b], 'black')
+    # replaces an element without changing the length
+    s.elements[1] = c
+    c.parent_scene = s
+    s.remove_element(c)
+    assert s.elements==[a]
+    s.add_element(elem(5))
+    s.add_element(b)
+    assert [e.z for e in s.elements]==[0, 1, 5]
+
+def test_elements_reassigned_by_hand():
+    s = scene((100, 100), [elem(0)], 'black')
+    s.elements = [elem(3), elem(1)]
+    s.add_element(elem(2))
+    assert [e.z for e in s.elements]==[1, 2, 3]
+
+def panel(z, color, pos):
+    surf = pg.Surface((10, 10))
+    surf.fill(color)
+    return element(z, surf, pos)
+
+@pytest.mark.parametrize('kwargs', [{}, {'dirty_rendering':True}, {'static_layers':True}, {'auto_static':1}])
+def test_changing_z_restacks(kwargs):
+    a, b = panel(1, (255, 0, 0), (0, 0)), panel(1, (0, 0, 255), (5, 5))
+    s = scene((20, 20), [a, b], 'black', **kwargs)
+    for _ in range(3): s.render()
+    assert s.surface.get_at((7, 7))==(0, 0, 255)
+    a.z = 2
+    s.render()
+    assert s.surface.get_at((7, 7))==(255, 0, 0)
+
+def test_changing_z_while_stepping_restacks():
+    a, b = panel(1, (255, 0, 0), (0, 0)), panel(1, (0, 0, 255), (5, 5))
+    class raiser(element):
+        def step(self, dt):
+            a.z = 2
+    s = scene((20, 20), [a, b, raiser(0, pg.Surface((0, 0)), (0, 0))], 'black', dirty_rendering=True)
+    s.render()
+    s.step(.01)
+    s.render()
+    assert s.surface.get_at((7, 7))==(255, 0, 0)
+
+class wall(element, collidable):
+    def __init__(self):
+        element.__init__(self, 0, pg.Surface((10, 10)), (0, 0))
+        collidable.__init__(self, True)
+
+def test_elements_removed_by_hand_are_unregistered():
+    w = wall()
+    s = scene((100, 100), [w], 'black', physics=True)
+    assert w in s.pushers
+    s.elements.remove(w)
+    s.step(.01)
+    assert w not in s.pushers and w not in s.broadphase and w.parent_scene==None
+    s.elements.append(w)
+    s.step(.01)
+    assert w in s.pushers and w.parent_scene is s
+
+def test_elements_are_copied():
+    elems = [elem(0)]
+    s = scene((100, 100), elems, 'black')
+    elems.append(elem(1))
+    assert len(s.elements)==1
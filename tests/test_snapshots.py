@@ -0,0 +1,98 @@
+import os, zlib
+import pytest
+import pygame as pg
+from src import utils
+from src.utils import *
+
+@pytest.fixture
+def saves(tmp_path, monkeypatch):
+    pg.display.init()
+    monkeypatch.setattr(utils, 'savefile_path', lambda filename: str(tmp_path/filename))
+    pg.event.clear()
+    yield tmp_path
+    utils._snapshots.clear()
+
+def finished():
+    return [(e.filename, e.error) for e in pg.event.get(pg.USEREVENT) if e.msg=='save_finished']
+
+@pytest.mark.parametrize('codec', list(SAVE_CODECS))
+def test_round_trip(saves, codec):
+    sections = {'world':{'tiles':list(range(500)), 'seed':3}, 'player':('x', 1.5)}
+    write_snapshot('a.sav', sections, codec).result()
+    snap = read_snapshot('a.sav')
+    assert snap.names==['world', 'player'] and snap['world']==sections['world'] and snap.get('player')==('x', 1.5)
+    assert snap.get('missing', 4)==4 and all(snap.raw(nm)[0]==SAVE_CODECS[codec] for nm in snap.names)
+    assert finished()==[('a.sav', None)]
+
+def test_lzma_sections_are_lzma(saves):
+    write_snapshot('a.sav', {'s':'text'*100}, 'lzma', background=False)
+    codec, blob, rawlen, crc = read_snapshot('a.sav').raw('s')
+    assert codec==2 and blob.startswith(b'\xfd7zXZ') and len(blob)<rawlen
+
+def test_partial_keeps_other_sections(saves):
+    write_snapshot('a.sav', {'a':1, 'b':2}, background=False)
+    write_snapshot('a.sav', {'b':3, 'c':4}, partial=True, background=False)
+    snap = read_snapshot('a.sav')
+    assert [(nm, snap[nm]) for nm in snap.names]==[('a', 1), ('b', 3), ('c', 4)]
+    # a new session merges with the file on disk
+    utils._snapshots.clear()
+    write_snapshot('a.sav', {'a':5}, partial=True, background=False)
+    snap = read_snapshot('a.sav')
+    assert [snap[nm] for nm in snap.names]==[5, 3, 4]
+    write_snapshot('a.sav', {'d':6}, background=False)
+    assert read_snapshot('a.sav').names==['d']
+
+def test_unchanged_sections_reuse_their_bytes(saves):
+    write_snapshot('a.sav', {'a':list(range(100)), 'b':0}, background=False)
+    blob = utils._snapshots[str(saves/'a.sav')]['a'][2]
+    write_snapshot('a.sav', {'a':list(range(100)), 'b':1}, background=False)
+    assert utils._snapshots[str(saves/'a.sav')]['a'][2] is blob
+    # other codecs compress again
+    write_snapshot('a.sav', {'a':list(range(100)), 'b':1}, 'lzma', background=False)
+    assert read_snapshot('a.sav').raw('a')[0]==2
+
+def test_corrupted_section_fails_its_crc(saves):
+    write_snapshot('a.sav', {'a':'hello', 'b':'world'}, 'none', background=False)
+    snap = read_snapshot('a.sav')
+    offset = snap._entries['a'][1]
+    data = bytearray((saves/'a.sav').read_bytes())
+    data[offset+len(data[offset:])//4] ^= 0xff
+    (saves/'a.sav').write_bytes(bytes(data))
+    snap = read_snapshot('a.sav')
+    with pytest.raises(ValueError, match='corrupted'): snap['a']
+    assert snap['b']=='world'
+    # a compressed section that no longer decompresses is reported the same way
+    write_snapshot('z.sav', {'a':'hello'*50}, background=False)
+    offset = read_snapshot('z.sav')._entries['a'][1]
+    data = bytearray((saves/'z.sav').read_bytes())
+    data[offset+4] ^= 0xff
+    (saves/'z.sav').write_bytes(bytes(data))
+    with pytest.raises(ValueError, match='corrupted'): read_snapshot('z.sav')['a']
+
+def test_truncated_file(saves):
+    write_snapshot('a.sav', {'a':'hello'*50, 'b':'world'*50}, background=False)
+    data = (saves/'a.sav').read_bytes()
+    (saves/'a.sav').write_bytes(data[:-10])
+    snap = read_snapshot('a.sav')
+    snap['a']
+    with pytest.raises(ValueError, match='truncated'): snap['b']
+    (saves/'a.sav').write_bytes(data[:12])
+    with pytest.raises(ValueError, match='truncated'): read_snapshot('a.sav')
+    (saves/'a.sav').write_bytes(b'junk'+data[4:])
+    with pytest.raises(ValueError, match='not a save'): read_snapshot('a.sav')
+
+def test_failed_write_keeps_the_old_file(saves, monkeypatch):
+    write_snapshot('a.sav', {'a':1}, background=False)
+    finished()
+    def fail(src, dst): raise OSError('disk full')
+    monkeypatch.setattr(utils.os, 'replace', fail)
+    with pytest.raises(OSError): write_snapshot('a.sav', {'a':2}, background=False)
+    (name, error), = finished()
+    assert name=='a.sav' and isinstance(error, OSError)
+    assert read_snapshot('a.sav')['a']==1
+    # the failed snapshot isn't remembered as written, so the next write stores it in full
+    monkeypatch.undo()
+    monkeypatch.setattr(utils, 'savefile_path', lambda filename: str(saves/filename))
+    write_snapshot('a.sav', {'b':3}, partial=True, background=False)
+    snap = read_snapshot('a.sav')
+    assert [snap[nm] for nm in snap.names]==[1, 3]
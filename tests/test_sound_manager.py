@@ -0,0 +1,90 @@
+import itertools
+import pytest
+import pygame as pg
+from src import assets
+from src.assets import *
+
+@pytest.fixture
+def manager(monkeypatch):
+    # long silent sounds so voices stay busy, and a clock that ticks on every play
+    if pg.mixer.get_init()==None: pytest.skip('no mixer')
+    silence = pg.mixer.Sound(buffer=bytes(44100*4*10))
+    monkeypatch.setattr(assets, 'get_audio', lambda soundname: silence)
+    clock = itertools.count(1000)
+    monkeypatch.setattr(assets.time, 'perf_counter', lambda: float(next(clock)))
+    made = []
+    def make(channels):
+        made.append(sound_manager(channels))
+        return made[-1]
+    yield make
+    for m in made: m.stop_all()
+    pg.mixer.set_num_channels(MIXER_CHANNELS)
+
+def test_max_voices_restart_the_oldest(manager):
+    m = manager(8)
+    m.configure('a', max_voices=2)
+    first, second, third = m.play('a'), m.play('a'), m.play('a')
+    assert not m.playing(first) and m.playing(second) and m.playing(third)
+    assert m.stats()['busy']==2 and m.stolen==1
+
+def test_full_pool_steals_the_oldest_lowest_priority(manager):
+    m = manager(3)
+    m.configure('high', priority=2)
+    low = m.play('low')
+    mid_a, mid_b = m.play('mid', priority=1), m.play('mid', priority=1)
+    high = m.play('high')
+    assert not m.playing(low) and m.stolen==1
+    # equal priorities lose the oldest voice
+    mid_c = m.play('other', priority=1)
+    assert not m.playing(mid_a) and m.playing(mid_b) and m.playing(mid_c) and m.playing(high)
+    # nothing playing has a priority this low
+    assert m.play('low')==None and m.dropped==1
+    assert m.stats()=={'played':5, 'throttled':0, 'stolen':2, 'dropped':1, 'busy':3, 'channels':3}
+
+def test_stopped_voices_free_their_channel(manager):
+    m = manager(2)
+    a, b = m.play('a', priority=5), m.play('b', priority=5)
+    assert m.play('c')==None
+    m.stop(a)
+    c = m.play('c')
+    assert m.playing(c) and m.playing(b) and m.stolen==0
+    m.stop_sound('b')
+    assert not m.playing(b) and m.stats()['busy']==1
+
+def test_cooldown_throttles(manager, monkeypatch):
+    m = manager(4)
+    m.configure('step', cooldown=1.5)
+    now = [10.]
+    monkeypatch.setattr(assets.time, 'perf_counter', lambda: now[0])
+    assert m.play('step')!=None
+    now[0] = 11.
+    assert m.play('step')==None and m.throttled==1
+    now[0] = 11.5
+    assert m.play('step')!=None and m.played==2
+
+class recorded(object):
+    # a channel that remembers the volumes set on it
+    def __init__(self, ch):
+        self.ch = ch
+        self.volumes = []
+    def __getattr__(self, name):
+        return getattr(self.ch, name)
+    def set_volume(self, *volume):
+        self.volumes.append(volume)
+        self.ch.set_volume(*volume)
+
+def test_voice_changes_apply_on_update(manager):
+    m = manager(2)
+    m.configure('a', volume=.5)
+    voice = m.play('a')
+    i = m._find(voice)
+    ch = m._pool[i] = recorded(m._pool[i])
+    m.set_voice(voice, .5, 1.)
+    m.set_voice(voice, .8, -.5)
+    assert ch.volumes==[]
+    m.update()
+    assert ch.volumes==[(.4, .2)]
+    m.stop(voice)
+    m.set_voice(voice, 1., 0.)
+    m.update()
+    assert len(ch.volumes)==1
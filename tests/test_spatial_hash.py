@@ -0,0 +1,31 @@
+import random
+import pygame as pg
+from src.templates import *
+
+def box(x, y, w=10, h=10):
+    return element(0, pg.Surface((w, h)), (x, y))
+
+def brute(elems, rect):
+    return [e for e in elems if e.get_rect().colliderect(rect)]
+
+def test_query_finds_every_overlap_in_insertion_order():
+    random.seed(1)
+    grid = spatial_hash(32)
+    elems = [box(random.uniform(-100, 300), random.uniform(-100, 300), random.randint(1, 80), random.randint(1, 80)) for _ in range(200)]
+    for e in elems: grid.insert(e)
+    for _ in range(100):
+        r = pg.Rect(random.uniform(-100, 300), random.uniform(-100, 300), random.randint(1, 100), random.randint(1, 100))
+        found = grid.query(r)
+        assert [e for e in found if e.get_rect().colliderect(r)]==brute(elems, r)
+        assert found==sorted(found, key=elems.index)
+
+def test_update_and_remove():
+    grid = spatial_hash(32)
+    e = box(0, 0)
+    grid.insert(e)
+    e.pos.set(200, 200)
+    grid.update(e)
+    assert grid.query(pg.Rect(0, 0, 10, 10))==[]
+    assert grid.query(pg.Rect(200, 200, 10, 10))==[e]
+    grid.remove(e)
+    assert e not in grid and grid.cells=={}
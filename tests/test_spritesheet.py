@@ -0,0 +1,15 @@
+import pygame as pg
+from src.assets import *
+
+def test_sheet_decoded_once(image_file, monkeypatch):
+    loads = []
+    load = pg.image.load
+    monkeypatch.setattr(pg.image, 'load', lambda *a: loads.append(a) or load(*a))
+    sheet = load_spritesheet(image_file, (16, 16), scale=2)
+    assert len(loads)==1
+    assert sheet.surface.get_size()==(128, 96) and len(sheet.frames)==12
+    assert sheet.frames[5]==pg.Rect(32, 32, 32, 32)
+
+def test_unscaled_sheet_shares_image(image_file):
+    sheet = load_spritesheet(image_file, (16, 16))
+    assert sheet.surface is assetcache.peek(('image', image_file, None, True))
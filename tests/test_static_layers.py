@@ -0,0 +1,54 @@
+import random
+import pygame as pg
+from src.templates import *
+
+class drifter(element):
+    def step(self, dt):
+        super().step(dt)
+        self.x = (self.x + 3) % 110
+
+def elements(seed, static):
+    # translucent, surface alpha and opaque elements overlapping each other, odd z bands move
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(30):
+        z = rnd.randint(0, 3)
+        surf = pg.Surface((rnd.randint(5, 40), rnd.randint(5, 40)), pg.SRCALPHA if rnd.random()<.7 else 0)
+        surf.fill((rnd.randrange(256), rnd.randrange(256), rnd.randrange(256), rnd.randrange(40, 256)))
+        if rnd.random()<.2: surf.set_alpha(rnd.randrange(40, 200))
+        e = (drifter if z%2 else element)(z, surf, (rnd.randint(0, 100), rnd.randint(0, 80)))
+        e.static = static and z%2==0
+        out.append(e)
+    return out
+
+def frames(seed, static=False, dirty=False, **kwargs):
+    s = scene((120, 100), elements(seed, static), (30, 60, 90), dirty_rendering=dirty, **kwargs)
+    out = []
+    for _ in range(4):
+        s.step(.01)
+        s.render()
+        out.append(pg.image.tobytes(s.surface, 'RGBA'))
+    return out
+
+def test_overlapping_translucent_elements():
+    def panel(color):
+        surf = pg.Surface((20, 20), pg.SRCALPHA)
+        surf.fill(color)
+        return surf
+    renders = []
+    for kwargs in ({}, {'static_layers':True}, {'auto_static':1}):
+        base = element(0, panel((0, 0, 0, 255)), (0, 0))
+        a, b = element(1, panel((255, 0, 0, 120)), (0, 0)), element(1, panel((0, 0, 255, 120)), (10, 10))
+        a.static = b.static = 'static_layers' in kwargs
+        s = scene((40, 40), [base, drifter(0, panel((0, 255, 0, 255)), (30, 30)), a, b], (200, 200, 100), **kwargs)
+        for _ in range(3): s.render()
+        renders.append(s.surface.get_at((15, 15)))
+    assert renders[0]==renders[1]==renders[2]
+
+def test_layers_draw_like_plain_rendering():
+    for seed in range(20):
+        plain = frames(seed)
+        assert frames(seed, static=True, static_layers=True)==plain
+        assert frames(seed, auto_static=1)==plain
+        assert frames(seed, static=True, dirty=True, static_layers=True)==plain
+        assert frames(seed, dirty=True, auto_static=1)==plain
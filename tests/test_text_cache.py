@@ -0,0 +1,24 @@
+import pygame as pg
+from src import assets
+from src.assets import *
+
+def test_render_line_keeps_the_most_recent(monkeypatch):
+    pg.font.init()
+    monkeypatch.setattr(assets, 'TEXT_CACHE_LINES', 2)
+    monkeypatch.setattr(assets, '_lines', type(assets._lines)())
+    font = pg.font.Font(None, 12)
+    a = render_line(font, 'a', (255, 255, 255))
+    b = render_line(font, 'b', (255, 255, 255))
+    assert render_line(font, 'a', [255, 255, 255]) is a
+    render_line(font, 'c', (255, 255, 255))
+    assert render_line(font, 'a', (255, 255, 255)) is a
+    assert render_line(font, 'b', (255, 255, 255)) is not b
+    assert len(assets._lines)==2
+
+def test_render_line_keys_on_every_argument():
+    pg.font.init()
+    font = pg.font.Font(None, 12)
+    a = render_line(font, 'x', (255, 255, 255))
+    assert render_line(font, 'x', (255, 0, 0)) is not a
+    assert render_line(font, 'x', (255, 255, 255), False) is not a
+    assert render_line(pg.font.Font(None, 14), 'x', (255, 255, 255)) is not a
@@ -0,0 +1,39 @@
+import pygame as pg
+from src.templates import *
+
+def tileset():
+    surf = pg.Surface((16, 8), pg.SRCALPHA)
+    surf.fill((200, 0, 0), (0, 0, 8, 8))
+    surf.fill((0, 0, 200), (8, 0, 8, 8))
+    return spritesheet(surf, [(0, 0, 8, 8), (8, 0, 8, 8)])
+
+def grid(cols=40, rows=30):
+    return [[(c+r)%3-1 for c in range(cols)] for r in range(rows)]
+
+def test_changing_solid_rebuilds_the_mask():
+    tm = tilemap(0, tileset(), grid(), solid={0}, chunk_size=4)
+    r = pg.Rect(8, 0, 8, 8)
+    assert tm.tile_at(1, 0)==0 and tm.solid_in(r)
+    tm.solid = {1}
+    assert not tm.solid_in(r)
+    assert tm.solid_in(pg.Rect(16, 0, 8, 8))
+
+def test_snapshot_draws_like_the_tilemap():
+    tm = tilemap(0, tileset(), grid(), (3, 5), chunk_size=4)
+    s = scene((120, 90), [tm], (0, 0, 0))
+    s.render()
+    live = pg.image.tobytes(s.surface, 'RGBA')
+    snap = s.snapshot()
+    assert not snap.live
+    tm.set_tile(1, 1, 1 - tm.tile_at(1, 1) if tm.tile_at(1, 1)>=0 else 0)
+    snap.render()
+    assert pg.image.tobytes(s.surface, 'RGBA')==live
+
+def test_snapshot_with_a_camera():
+    tm = tilemap(0, tileset(), grid(200, 150), chunk_size=4)
+    s = scene((120, 90), [tm], (0, 0, 0))
+    s.camera = camera((301, 207))
+    s.render()
+    live = pg.image.tobytes(s.surface, 'RGBA')
+    s.snapshot().render()
+    assert pg.image.tobytes(s.surface, 'RGBA')==live
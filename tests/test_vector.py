@@ -0,0 +1,56 @@
+import copy, math
+import pytest
+import pygame as pg
+from src.templates import *
+
+def test_slots():
+    v = vector(1, 2)
+    assert vector.__slots__==('x', 'y') and not hasattr(v, '__dict__')
+    with pytest.raises(AttributeError): v.z = 3
+
+def test_in_place_methods_return_the_same_vector():
+    v = vector(3, 4)
+    assert v.set(1, 2) is v and v.tuple==(1, 2)
+    assert v.scale(3) is v and v.tuple==(3, 6)
+    assert v.add_scaled(vector(1, 1), 2) is v and v.tuple==(5, 8)
+    assert v.add_scaled(vector(1, 0), 1, vector(0, 1), -2) is v and v.tuple==(6, 6)
+    assert v.set(3, 4).normalize() is v and v.tuple==pytest.approx((.6, .8))
+    assert vector(0, 0).normalize().tuple==(0, 0)
+    assert v.set(1, 0).rotate(math.pi/2) is v and v.tuple==pytest.approx((0, 1))
+    assert v.set(3, 4).length_squared()==25 and v.dot(vector(2, -1))==2
+
+def test_augmented_assignment_is_in_place():
+    v = vector(1, 2)
+    alias = v
+    v += vector(2, 3)
+    v -= vector(1, 1)
+    v *= 4
+    v /= 2
+    assert v is alias and v.tuple==(4, 8)
+
+def test_operators_return_new_vectors():
+    a, b = vector(1, 2), vector(3, 5)
+    results = [a+b, a-b, a*2, 2*a, a/2, copy.copy(a)]
+    assert [r.tuple for r in results]==[(4, 7), (-2, -3), (2, 4), (2, 4), (.5, 1), (1, 2)]
+    assert all(r is not a for r in results) and a.tuple==(1, 2) and b.tuple==(3, 5)
+
+def test_polar_and_properties():
+    v = vector(math.pi/2, 2., polar=True)
+    assert v.tuple==pytest.approx((0, 2)) and v.magnitude==pytest.approx(2)
+    v.magnitude = 4
+    assert v.tuple==pytest.approx((0, 4))
+    z = vector(0, 0)
+    z.magnitude = 3
+    assert z.tuple==(3, 0) and (z[0], z[1])==(3, 0)
+    with pytest.raises(IndexError): z[2]
+    with pytest.raises(ValueError): vector((1, 2, 3))
+
+def test_handle_resize_moves_pos_in_place():
+    s = scene((40, 30), [], 'black')
+    e = element(1, pg.Surface((4, 4)), (10, 10), 'center')
+    s.add_element(e)
+    held = e.pos
+    s.w, s.h = 80, 60
+    e.handle_resize()
+    # the center anchor doubles, the offset from it doesn't
+    assert e.pos is held and held.tuple==(30, 25)